@@ -0,0 +1,14 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import os
+import sys
+
+# PySpark is found in SPARK_HOME or, as in tests, in tests/spark
+spark_home = os.environ.get('SPARK_HOME')
+if not spark_home:
+    spark_home = os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), 'tests', 'spark')
+    os.environ['SPARK_HOME'] = spark_home
+sys.path.insert(0, os.path.join(spark_home, 'python'))
+sys.path.insert(0, os.path.join(spark_home, 'python/lib/py4j-0.9-src.zip'))
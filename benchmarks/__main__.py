@@ -0,0 +1,123 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+
+from benchmarks.datasets import generate
+from benchmarks.timing import measure, summarize
+from pyspark import SparkContext
+
+from microdrill.dal.dataframe import DataFrameDAL
+from microdrill.dal.parquet import ParquetDAL
+from microdrill.table import ParquetTable
+
+TABLE = 'benchmark'
+DALS = {'parquet': ParquetDAL, 'dataframe': DataFrameDAL}
+QUERIES = [
+    ('filter', lambda dal, table: dal.select(table('c0'), table('c1')).where(
+        table('c1') < 10)),
+    ('aggregate', lambda dal, table: dal.select(
+        table('c2'), table('c1').sum, table('c0').count).group_by(
+        table('c2'))),
+    ('limit', lambda dal, table: dal.select(table('c0')).limit(100)),
+]
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Times MicroDrill over a synthetic parquet table')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--columns', type=int, default=20)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--partitions', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--dal', choices=sorted(DALS), default='parquet')
+    parser.add_argument('--master', default='local[*]')
+    parser.add_argument('--directory', help='where the table is written, '
+                        'a temporary directory removed at the end by default')
+    parser.add_argument('--output', help='JSON file, stdout by default')
+    return parser.parse_args(args)
+
+
+def run(sc, options, directory):
+    def new_dal():
+        dal = DALS[options.dal](directory, sc)
+        dal.wide_table_columns = None
+        return dal
+
+    def new_table():
+        if options.partitions:
+            return ParquetTable(TABLE, partitions=['p'])
+        return ParquetTable(TABLE)
+
+    dal = new_dal()
+    generate(dal.context, "%s/%s" % (directory, TABLE), options.rows,
+             options.columns, options.files, options.partitions)
+
+    results = [dict(query=None, phase='set_table', **summarize(measure(
+        lambda dal: dal.set_table(new_table()), options.repeat, new_dal)))]
+
+    table = new_table()
+    dal.set_table(table)
+    for name, build in QUERIES:
+        phases = [
+            ('compile', lambda: build(dal, table).query, None),
+            ('execute', dal.execute, lambda: _compiled(build(dal, table))),
+            ('collect', lambda df: df.collect(),
+             lambda: dal.execute(build(dal, table))),
+        ]
+        for phase, function, setup in phases:
+            results.append(dict(query=name, phase=phase, **summarize(
+                measure(function, options.repeat, setup))))
+    return results
+
+
+def main(args=None):
+    options = parse_args(sys.argv[1:] if args is None else args)
+    sc = SparkContext(options.master, 'microdrill-benchmarks')
+    directory = options.directory or tempfile.mkdtemp()
+    try:
+        results = run(sc, options, directory)
+    finally:
+        if not options.directory:
+            shutil.rmtree(directory)
+        sc.stop()
+
+    report = {
+        'microdrill': _version(),
+        'spark': sc.version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': dict((key, value) for key, value in vars(options).items()
+                        if key not in ('directory', 'output')),
+        'results': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+
+
+def _compiled(statement):
+    statement.query
+    return statement
+
+
+def _version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('microdrill').version
+    except Exception:
+        return 'unknown'
+
+
+if __name__ == '__main__':
+    main()
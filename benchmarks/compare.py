@@ -0,0 +1,46 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import argparse
+import json
+import sys
+
+__all__ = ['compare']
+
+
+def compare(base, current, threshold=1.2):
+    """Ratios of the median timings of current to those of base, as
+    (query, phase, ratio, regressed) for phases found in both reports"""
+    base_medians = dict(((result['query'], result['phase']), result['median'])
+                        for result in base['results'])
+    comparison = []
+    for result in current['results']:
+        key = (result['query'], result['phase'])
+        if not base_medians.get(key):
+            continue
+        ratio = result['median'] / base_medians[key]
+        comparison.append(key + (ratio, ratio > threshold))
+    return comparison
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.compare',
+        description='Compares two reports of python -m benchmarks, failing '
+                    'when a median got slower than threshold times')
+    parser.add_argument('base')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+
+    with open(options.base) as base, open(options.current) as current:
+        comparison = compare(json.load(base), json.load(current),
+                             options.threshold)
+    for query, phase, ratio, regressed in comparison:
+        print "%-10s %-10s %6.2fx%s" % (
+            query or '-', phase, ratio, ' REGRESSION' if regressed else '')
+    return 1 if any(regressed for _, _, _, regressed in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from functools import partial
+
+from pyspark.sql.types import LongType, StructField, StructType
+
+__all__ = ['generate']
+
+
+def generate(context, path, rows, columns, files, partitions=0):
+    """Writes a table of ``rows`` rows with long columns c0 (a row id) to
+    c<columns - 1> in ``files`` parquet files. With ``partitions`` rows are
+    split by a column p in that many directories, each one with up to
+    ``files`` files."""
+    fields = [StructField('c%d' % index, LongType(), False)
+              for index in range(columns)]
+    if partitions:
+        fields.append(StructField('p', LongType(), False))
+
+    rdd = context._sc.parallelize(xrange(rows), files).map(
+        partial(_row, columns, partitions))
+    writer = context.createDataFrame(rdd, StructType(fields)).write.mode(
+        'overwrite')
+    if partitions:
+        writer = writer.partitionBy('p')
+    writer.parquet(path)
+
+
+def _row(columns, partitions, index):
+    # Column k cycles through 1000 values with a different step each
+    row = [index] + [(index * (2 * column + 1)) % 1000
+                     for column in range(1, columns)]
+    if partitions:
+        row.append(index % partitions)
+    return row
@@ -0,0 +1,34 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import time
+
+__all__ = ['measure', 'summarize']
+
+
+def measure(function, repeat=5, setup=None):
+    """Seconds each of ``repeat`` calls of function took, calling setup,
+    not timed, before each one and passing what it returns"""
+    timings = []
+    for _ in range(repeat):
+        args = (setup(), ) if setup else ()
+        start = time.time()
+        function(*args)
+        timings.append(time.time() - start)
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    middle = len(timings) // 2
+    if len(timings) % 2:
+        median = timings[middle]
+    else:
+        median = (timings[middle - 1] + timings[middle]) / 2.0
+    return {
+        'repeat': len(timings),
+        'min': timings[0],
+        'median': median,
+        'mean': sum(timings) / len(timings),
+        'max': timings[-1],
+    }
@@ -3,3 +3,9 @@
 
 from table import *
 from dal import *
+from catalog import *
+from statistics import *
+from statement import *
+from query import *
+from incremental import *
+from manifest import *
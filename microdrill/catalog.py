@@ -0,0 +1,37 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from utils import JSONStore, listing_changes
+
+__all__ = ['SchemaCatalog', 'merge_schemas']
+
+
+def merge_schemas(*schemas):
+    fields = []
+    types = dict()
+    for schema in schemas:
+        for field in schema['fields']:
+            name = field['name']
+            if name not in types:
+                types[name] = field['type']
+                fields.append(field)
+            elif types[name] != field['type']:
+                raise ValueError("Field %s found with types %s and %s" % (
+                    name, types[name], field['type']))
+    return {'type': 'struct', 'fields': fields}
+
+
+class SchemaCatalog(JSONStore):
+    """Schemas stored in a local JSON file, keyed by the schema index path
+    and holding the listing (path, size, mtime) they were read from."""
+
+    def set(self, key, files, schema):
+        self._set(key, {
+            'files': [list(status) for status in files],
+            'schema': schema,
+        })
+
+    def changes(self, key, files):
+        """Returns the cached entry and the files added since it was stored,
+        or no entry when files were removed or rewritten."""
+        return listing_changes(self.get(key), files)
@@ -28,7 +28,7 @@ class BaseDAL(object):
     def connect(self, *args, **kwargs):
         raise NotImplementedError()
 
-    def execute(self):
+    def execute(self, statement):
         raise NotImplementedError()
 
     def set_table(self, table_obj):
@@ -0,0 +1,86 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from microdrill.field import BaseField
+from microdrill.query import FieldList
+from microdrill.rollup import Rollup
+
+__all__ = ['IncrementalAggregator']
+
+
+class IncrementalAggregator(object):
+    """Executes aggregations of a DAL reading only the files of their table
+    not yet folded into the partial aggregates kept in an AggregateState"""
+
+    def __init__(self, dal):
+        self._dal = dal
+
+    def execute(self, statement, state):
+        if statement.params:
+            raise ValueError("Parameters not bound: %s" %
+                             ", ".join(statement.params))
+        select = statement.clause('select')
+        if (len(statement.tables) != 1 or statement.joins or
+                statement.sampling or not isinstance(select, FieldList) or
+                any(statement.clause(name) is not None
+                    for name in ('having', 'order_by', 'limit'))):
+            raise ValueError("Only select, where and group_by over one "
+                             "table are executed incrementally")
+        name = statement.tables[0]
+        group_by = statement.clause('group_by')
+        groups = group_by.fields if group_by is not None else []
+        names = [field.name for field in groups]
+        if any(not field.sql_template and field.name not in names
+               for field in select.fields):
+            raise ValueError("Fields selected should be grouped")
+        rollup = Rollup(name, groups, [field for field in select.fields
+                                       if field.sql_template])
+        aggregate_functions = [function for function, column
+                               in rollup.aggregates]
+        if not aggregate_functions:
+            raise ValueError("Only aggregations are executed incrementally")
+
+        files = [status for statuses in self._dal._table_listing(name)
+                 for status in statuses]
+        entry, new_files = state.changes(statement.query, files)
+        if new_files or not entry:
+            table = self._dal.tables.get(name)
+            partial_statement = statement.select(*(groups + [
+                BaseField(column, table,
+                          sql_template="%s(%%s)" % function.upper())
+                for function, column in rollup.aggregates
+            ]))
+            df = self._dal._read(name, [status.path for status in new_files])
+            df = df.select(*["`%s`" % column
+                             for column in partial_statement.columns(name)])
+            rows = [list(row) for row in self._dal._query(
+                partial_statement, [(name, None, df)]).collect()]
+            entry = state.fold(statement.query, files, aggregate_functions,
+                               rows, entry)
+
+        if not entry['rows']:
+            return self._dal._query(statement,
+                                    [(name, None, self._dal._read(name, []))])
+        return self._dal.context.createDataFrame(
+            [_aggregate_row(select.fields, names, rollup.aggregates, row)
+             for row in entry['rows']],
+            [field.name if not field.sql_template else "_c%s" % index
+             for index, field in enumerate(select.fields)]
+        )
+
+
+def _aggregate_row(fields, names, aggregates, row):
+    # Values of fields from a row of group values and partial aggregates
+    partials = dict(zip(aggregates, row[len(names):]))
+    values = []
+    for field in fields:
+        function = Rollup.function(field)
+        if function is None:
+            values.append(row[names.index(field.name)])
+        elif function == 'avg':
+            total = partials[('sum', field.name)]
+            count = partials[('count', field.name)]
+            values.append(float(total) / count if count else None)
+        else:
+            values.append(partials[(function, field.name)])
+    return values
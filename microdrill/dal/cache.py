@@ -0,0 +1,159 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from microdrill.dal.filesystem import FileSystem
+
+__all__ = ['ResultCache', 'normalize_sql']
+
+
+def normalize_sql(sql):
+    """Collapses whitespace outside of quoted literals and identifiers"""
+    normalized = []
+    quote = None
+    escaped = False
+    space = False
+    for char in sql.strip():
+        if quote:
+            normalized.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char.isspace():
+            space = True
+        else:
+            if space:
+                normalized.append(' ')
+                space = False
+            if char in ("'", '"', '`'):
+                quote = char
+            normalized.append(char)
+    return ''.join(normalized)
+
+
+class ResultCache(object):
+    """Query results kept in memory while they have up to ``max_rows`` rows,
+    or else written as parquet to ``directory`` while all of them fit in
+    ``max_bytes``. Least recently used results are evicted first and results
+    older than ``ttl`` seconds are never returned."""
+
+    def __init__(self, max_rows=10000, directory=None, max_bytes=None,
+                 ttl=None):
+        self._max_rows = max_rows
+        self._directory = directory.rstrip('/') if directory else None
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._memory = OrderedDict()
+        self._disk = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def key(self, sql, fingerprint):
+        return hashlib.sha1(repr((normalize_sql(sql),
+                                  fingerprint))).hexdigest()
+
+    def get(self, key, context):
+        with self._lock:
+            entry, expired = self._hit(self._memory, key)
+            if entry:
+                return context.createDataFrame(entry['rows'], entry['schema'])
+
+            entry, expired = self._hit(self._disk_entries(context), key)
+            if entry:
+                return context.read.parquet(entry['path'])
+            if expired:
+                FileSystem(context).delete(expired['path'])
+        return None
+
+    def put(self, key, df, context):
+        if self._max_rows:
+            rows = df.limit(self._max_rows + 1).collect()
+            if len(rows) <= self._max_rows:
+                with self._lock:
+                    self._add(self._memory, key, len(rows), self._max_rows,
+                              rows=rows, schema=df.schema)
+                return context.createDataFrame(rows, df.schema)
+
+        if self._directory:
+            filesystem = FileSystem(context)
+            path = "%s/%s" % (self._directory, key)
+            tmp_path = "%s/_%s" % (self._directory, uuid.uuid4().hex)
+            df.write.parquet(tmp_path)
+            filesystem.delete(path)
+            filesystem.rename(tmp_path, path)
+            size = sum(status.size for status in filesystem.files(path))
+            if self._max_bytes is not None and size > self._max_bytes:
+                filesystem.delete(path)
+                return df
+            with self._lock:
+                for evicted in self._add(self._disk_entries(context), key,
+                                         size, self._max_bytes, path=path):
+                    filesystem.delete(evicted['path'])
+            return context.read.parquet(path)
+
+        return df
+
+    def invalidate(self, context=None):
+        with self._lock:
+            self._memory.clear()
+            if self._disk and context:
+                filesystem = FileSystem(context)
+                for entry in self._disk.values():
+                    filesystem.delete(entry['path'])
+            self._disk = None
+
+    def _disk_entries(self, context):
+        # Results written by other processes are found listing the directory
+        if self._disk is None:
+            self._disk = OrderedDict()
+            if self._directory:
+                filesystem = FileSystem(context)
+                entries = []
+                for path in filesystem.directories(self._directory):
+                    files = filesystem.files(path)
+                    if files:
+                        entries.append((
+                            max(status.mtime for status in files),
+                            path.rsplit('/', 1)[-1],
+                            {'path': path,
+                             'size': sum(status.size for status in files)}
+                        ))
+                for created, key, entry in sorted(entries):
+                    entry['created'] = created
+                    self._disk[key] = entry
+        return self._disk
+
+    def _hit(self, entries, key):
+        # Returns the entry, moved to the end of entries, or the expired one
+        entry = entries.pop(key, None)
+        if entry is None:
+            return None, None
+        if (self._ttl is not None and
+                time.time() - entry['created'] > self._ttl):
+            return None, entry
+        entries[key] = entry
+        return entry, None
+
+    def _add(self, entries, key, size, max_size, **entry):
+        entry.update(size=size, created=time.time())
+        entries.pop(key, None)
+        entries[key] = entry
+
+        evicted = []
+        total = sum(item['size'] for item in entries.values())
+        while max_size is not None and total > max_size and len(entries) > 1:
+            evicted_entry = entries.popitem(last=False)[1]
+            total -= evicted_entry['size']
+            evicted.append(evicted_entry)
+        return evicted
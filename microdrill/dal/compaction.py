@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import math
+import time
+import uuid
+import warnings
+from collections import OrderedDict
+
+from pyspark.sql import functions
+
+__all__ = ['TableCompactor']
+
+TARGET_FILE_SIZE = 128 * 1024 * 1024
+RETIRED_FILES_AGE = 60 * 60
+
+
+class TableCompactor(object):
+    """Rewrites the small files of tables of a DAL into files of a target
+    size, maybe sorted. New files are written in the directories of the
+    files they replace and the manifest of the DAL switches readers to them
+    in one write, the files replaced are retired and deleted by purge."""
+
+    def __init__(self, dal):
+        self._dal = dal
+
+    def compact(self, name, target_file_size=TARGET_FILE_SIZE, sort_by=None,
+                where=None):
+        table = self._table(name)
+        if target_file_size <= 0:
+            raise ValueError("Target file size should be positive, %s found"
+                             % target_file_size)
+        if not table.partitions and any(_is_glob(path) for path
+                                        in self._dal._paths(name)):
+            raise ValueError("Table %s is configured with globs, only its "
+                             "partitions or directories are compacted" % name)
+        columns = [functions.col(field.name).desc() if field.invert
+                   else functions.col(field.name)
+                   for field in sort_by or []]
+
+        manifest = self._dal.manifest
+        key = self._dal._table_path(name)
+        predicate = where.predicate if where is not None else None
+        self._dal._manifest_files(table, predicate)
+        entry = manifest.get(key)
+        pinned = self._pinned(name)
+
+        compacted = []
+        for partition in self._dal._table_paths(name, predicate):
+            for directory, files in self._directories(
+                    entry[partition]['files'], pinned).items():
+                new_files = self._rewrite(directory, files, target_file_size,
+                                          columns)
+                if new_files is not None:
+                    manifest.replace(key, partition, files, new_files)
+                    compacted.append(directory)
+
+        if compacted:
+            self._dal.invalidate(name)
+        return compacted
+
+    def purge(self, name, age=RETIRED_FILES_AGE):
+        table = self._table(name)
+        manifest = self._dal.manifest
+        key = self._dal._table_path(table.name)
+        oldest = time.time() - age
+        paths = sorted(path for path, retired_at
+                       in manifest.retired(key).items()
+                       if retired_at <= oldest)
+        for path in paths:
+            self._dal._filesystem.delete(path)
+        manifest.purge(key, paths)
+        if self._dal.statistics:
+            self._dal.statistics.remove(paths)
+        return paths
+
+    def _table(self, name):
+        table = self._dal.tables.get(name)
+        if not table:
+            raise ValueError("Table %s not found" % name)
+        if not self._dal.manifest:
+            raise ValueError("Tables are compacted only with a manifest, "
+                             "which switches readers to the new files")
+        return table
+
+    def _pinned(self, name):
+        # Files named by the table config, not by a directory, keep their
+        # names so the config still finds them
+        filesystem = self._dal._filesystem
+        pinned = set()
+        for pattern in self._dal._paths(name):
+            matched = set(filesystem.glob(pattern))
+            pinned.update(status.path for status in filesystem.files(pattern)
+                          if status.path in matched)
+        return pinned
+
+    def _directories(self, files, pinned):
+        # Files of a partition by directory, nested directories are
+        # compacted apart so the layout of the table is kept
+        directories = OrderedDict()
+        for status in files:
+            if status[0] not in pinned:
+                directories.setdefault(status[0].rsplit('/', 1)[0],
+                                       []).append(tuple(status))
+        return directories
+
+    def _rewrite(self, directory, files, target_file_size, columns):
+        # Writes files in new ones in directory, which are returned, or None
+        # when they are already as many as needed or changed meanwhile
+        filesystem = self._dal._filesystem
+        context = self._dal.context
+        size = sum(status[1] for status in files)
+        count = max(1, int(math.ceil(float(size) / target_file_size)))
+        if not files or (len(files) <= count and not columns):
+            return None
+        if not self._listed(directory, files):
+            warnings.warn("Files of %s changed since they were listed, "
+                          "refresh the table to compact it" % directory)
+            return None
+
+        if columns:
+            # Sorting range partitions rows into spark.sql.shuffle.partitions
+            # partitions, then sorts each one, so with a session where they
+            # are count each file holds a range of values
+            context = context.newSession()
+            context.setConf('spark.sql.shuffle.partitions', str(count))
+        # Only the files listed are read, with directory as basePath so
+        # partition values stay in the path
+        df = context.read.option('basePath', directory).parquet(
+            *[status[0] for status in files])
+        if columns:
+            df = df.sort(*columns)
+        elif count < df.rdd.getNumPartitions():
+            df = df.coalesce(count)
+        else:
+            df = df.repartition(count)
+
+        # Written in a hidden directory, so it is not listed, then moved
+        # next to the files it replaces
+        tmp_path = "%s/_%s" % (directory, uuid.uuid4().hex)
+        df.write.parquet(tmp_path)
+        try:
+            if not self._listed(directory, files):
+                warnings.warn("Files of %s changed while compacting, it was "
+                              "not compacted" % directory)
+                return None
+
+            paths = []
+            try:
+                # Its own name is hidden, so its files are listed by a glob
+                for status in filesystem.files("%s/*" % tmp_path):
+                    path = "%s/%s" % (directory, _basename(status.path))
+                    filesystem.rename(status.path, path)
+                    paths.append(path)
+            except Exception:
+                for path in paths:
+                    filesystem.delete(path)
+                raise
+            return [status for path in paths
+                    for status in filesystem.files(path)]
+        finally:
+            filesystem.delete(tmp_path)
+
+    def _listed(self, directory, files):
+        # Tells if files are still in directory, not removed or rewritten
+        current = set(tuple(status)
+                      for status in self._dal._filesystem.files(directory))
+        return set(files) <= current
+
+
+def _basename(path):
+    return path.rstrip('/').rsplit('/', 1)[-1]
+
+
+def _is_glob(path):
+    return any(char in path for char in '*?[{')
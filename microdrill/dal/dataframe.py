@@ -0,0 +1,167 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from pyspark.sql import functions
+
+from microdrill.dal.parquet import ParquetDAL
+from microdrill.pruning import _literal
+
+__all__ = ['DataFrameDAL']
+
+AGGREGATES = {
+    'AVG(%s)': functions.avg,
+    'COUNT(%s)': functions.count,
+    'MAX(%s)': functions.max,
+    'MIN(%s)': functions.min,
+    'SUM(%s)': functions.sum,
+}
+
+
+class DataFrameDAL(ParquetDAL):
+    """ParquetDAL compiling queries over one table to DataFrame operations,
+    so filters are applied to the parquet reader with no temp table or SQL
+    parsing. Queries joining tables or with raw SQL parts run as SQL."""
+
+    def _query(self, statement, dataframes):
+        if len(dataframes) == 1:
+            with self._measure('planning', statement):
+                result = self.compile(statement, dataframes[0][2])
+            if result is not None:
+                return result
+        return super(DataFrameDAL, self)._query(statement, dataframes)
+
+    def compile(self, statement, df):
+        """Applies statement to df, or returns None when it can not be
+        expressed with DataFrame operations"""
+        condition = _predicate(statement.clause('where'))
+        if condition is False:
+            return None
+        if condition is not None:
+            df = df.filter(condition)
+
+        select = statement.clause('select')
+        fields = select.fields if select is not None else []
+        if select is not None and not fields and select.query != "SELECT *":
+            return None
+        group_by = statement.clause('group_by')
+        groups = group_by.fields if group_by is not None else []
+        having = statement.clause('having')
+        order_by = statement.clause('order_by')
+        orders = order_by.fields if order_by is not None else []
+
+        # Aggregates are named as SQL names unnamed expressions, _c<index>
+        names = {}
+        for index, field in enumerate(fields):
+            if field.sql_template:
+                names.setdefault(_field_key(field), "_c%s" % index)
+        for index, field in enumerate(orders):
+            if field.sql_template:
+                names.setdefault(_field_key(field), "_aggregate%s" % index)
+        if any(template not in AGGREGATES for name, template in names):
+            return None
+
+        having_condition = _predicate(having)
+        if having_condition is False:
+            return None
+
+        columns = dict((key, functions.col(name))
+                       for key, name in names.items())
+        aggregated = bool(names or groups)
+        if aggregated:
+            if not fields:
+                return None
+            df = df.groupBy(*[field.name for field in groups]).agg(
+                *[AGGREGATES[template](name).alias(names[name, template])
+                  for name, template in names])
+            if having_condition is not None:
+                df = df.filter(having_condition)
+
+        if orders:
+            df = df.orderBy(*[_order(_field_column(field, columns), field)
+                              for field in orders])
+
+        if fields:
+            df = df.select(*[_field_column(field, columns)
+                             for field in fields])
+        if having_condition is not None and not aggregated:
+            # With no aggregation SQL filters the rows selected by HAVING
+            df = df.filter(having_condition)
+
+        limit = statement.clause('limit')
+        if limit is not None:
+            df = df.limit(int(limit.query.split()[-1]))
+        return df
+
+
+def _field_key(field):
+    return field.name, field.sql_template
+
+
+def _field_column(field, columns):
+    if field.sql_template:
+        return columns[_field_key(field)]
+    return functions.col(field.name)
+
+
+def _order(column, field):
+    if field.invert:
+        return column.desc()
+    return column.asc()
+
+
+def _predicate(clause):
+    # Column for the conditions of clause, None without conditions or False
+    # when they have SQL parts that can not be translated
+    if clause is None:
+        return None
+    condition = None
+    for part in clause.parts[1:]:
+        if part.predicate is None:
+            return False
+        column = _column(part.predicate)
+        if column is None:
+            return False
+        condition = column if condition is None else condition & column
+    return condition
+
+
+def _column(predicate):
+    # Comparisons are compiled to SQL on the column, with no aggregate
+    operator = getattr(predicate, 'operator', None)
+    if operator in ('AND', 'OR'):
+        left, right = [_column(operand)
+                       for operand in predicate.operands]
+        if left is None or right is None:
+            return None
+        return left & right if operator == 'AND' else left | right
+    if operator == 'NOT':
+        operand = _column(predicate.operand)
+        return None if operand is None else ~operand
+    if operator is None or predicate.field.sql_template:
+        return None
+
+    column = functions.col(predicate.field.name)
+    if operator == 'IN':
+        return column.isin(*[_literal(value) for value in predicate.values])
+    if predicate.compares_fields:
+        if predicate.value.sql_template:
+            return None
+        value = functions.col(predicate.value.name)
+    else:
+        value = _literal(predicate.value)
+
+    if operator == '=':
+        return column == value
+    if operator == '<>':
+        return column != value
+    if operator == '>':
+        return column > value
+    if operator == '>=':
+        return column >= value
+    if operator == '<':
+        return column < value
+    if operator == '<=':
+        return column <= value
+    if operator == 'REGEXP':
+        return column.rlike(value)
+    return None
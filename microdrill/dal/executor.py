@@ -0,0 +1,90 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import threading
+import uuid
+from multiprocessing.pool import ThreadPool
+
+__all__ = ['QueryExecutor', 'QueryFuture']
+
+SCHEDULER_POOL = 'spark.scheduler.pool'
+
+
+class QueryFuture(object):
+    def __init__(self, job_group, async_result):
+        self._job_group = job_group
+        self._async_result = async_result
+
+    @property
+    def job_group(self):
+        return self._job_group
+
+    def ready(self):
+        return self._async_result.ready()
+
+    def successful(self):
+        return self._async_result.successful()
+
+    def wait(self, timeout=None):
+        self._async_result.wait(timeout)
+
+    def get(self, timeout=None):
+        return self._async_result.get(timeout)
+
+
+class QueryExecutor(object):
+    """Executes statements of a DAL in a thread pool. Each one is given its
+    own Spark job group and, optionally, FAIR scheduler pool so independent
+    queries share the cluster instead of queueing.
+
+    Job groups and pools are local properties of the JVM thread serving the
+    Python thread. py4j 0.9 hands its connections, and their JVM threads,
+    to Python threads from a shared pool, so with many workers the action of
+    a query may run in another JVM thread than the one its group was set
+    in. Groups and pools only label and schedule queries, they are not used
+    to cancel them, which could stop another query."""
+
+    def __init__(self, dal, workers=4):
+        self._dal = dal
+        self._workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self):
+        return self._workers
+
+    def submit(self, statement, action='collect', scheduler_pool=None,
+               callback=None):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self._workers)
+            pool = self._pool
+
+        job_group = uuid.uuid4().hex
+        async_result = pool.apply_async(
+            self._run, (statement, job_group, action, scheduler_pool),
+            callback=callback
+        )
+        return QueryFuture(job_group, async_result)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.close()
+            pool.join()
+
+    def _run(self, statement, job_group, action, scheduler_pool):
+        sc = self._dal.context._sc
+        sc.setJobGroup(job_group, "MicroDrill query on %s" %
+                       ", ".join(statement.tables))
+        sc.setLocalProperty(SCHEDULER_POOL, scheduler_pool)
+        try:
+            result = self._dal.execute(statement)
+            if action:
+                result = self._dal._action(statement, result, action)
+            return result
+        finally:
+            sc.setLocalProperty(SCHEDULER_POOL, None)
+            sc._jsc.clearJobGroup()
@@ -0,0 +1,56 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import re
+from collections import namedtuple
+
+__all__ = ['Explanation', 'TableScan', 'pushed_filters']
+
+PUSHED_FILTERS = re.compile(r'PushedFilters?: \[([^\]]*)\]')
+
+TableScan = namedtuple('TableScan', ['table', 'paths', 'files',
+                                     'pruned_files', 'bytes',
+                                     'estimated_bytes', 'columns'])
+
+
+class Explanation(namedtuple('Explanation', ['query', 'logical_plan',
+                                             'physical_plan', 'predicate',
+                                             'pushed_filters', 'scans'])):
+    """Plans Spark made for a query and the files MicroDrill reads for it,
+    one TableScan for each table, with no job run"""
+
+    __slots__ = ()
+
+    @property
+    def bytes(self):
+        return sum(scan.bytes for scan in self.scans)
+
+    @property
+    def estimated_bytes(self):
+        return sum(scan.estimated_bytes for scan in self.scans)
+
+    def __str__(self):
+        lines = ["Query: %s" % self.query,
+                 "Predicate: %s" % self.predicate,
+                 "Pushed filters: %s" % ", ".join(self.pushed_filters)]
+        for scan in self.scans:
+            lines.append(
+                "Scan %s: %s files, %s pruned, %s bytes, %s estimated, "
+                "columns %s" % (scan.table, len(scan.files),
+                                len(scan.pruned_files), scan.bytes,
+                                scan.estimated_bytes,
+                                ", ".join(scan.columns)
+                                if scan.columns is not None else "*"))
+        lines += ["", "Logical plan:", self.logical_plan,
+                  "Physical plan:", self.physical_plan]
+        return "\n".join(lines)
+
+
+def pushed_filters(physical_plan):
+    """Filters the parquet scans of a physical plan apply on read"""
+    filters = []
+    for match in PUSHED_FILTERS.finditer(physical_plan):
+        filters += [item.strip() for item in
+                    re.split(r',\s*(?=[A-Z]\w*\()', match.group(1))
+                    if item.strip()]
+    return filters
@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import glob
+import os
+import shutil
+from collections import namedtuple
+from urlparse import urlparse
+
+__all__ = ['FileStatus', 'FileSystem']
+
+
+FileStatus = namedtuple('FileStatus', ['path', 'size', 'mtime'])
+
+
+class FileSystem(object):
+    """Lists parquet data files the same way Spark does: globs are expanded,
+    directories are walked and names starting with ``_`` or ``.`` are
+    ignored. Local paths use ``os``, any other scheme goes through the
+    Hadoop FileSystem of the given context."""
+
+    def __init__(self, context):
+        self._context = context
+
+    def files(self, pattern):
+        if self.is_local(pattern):
+            return self._local_files(pattern)
+        return self._hadoop_files(pattern)
+
+    def glob(self, pattern):
+        """Paths of the files and directories pattern matches, not walked"""
+        if self.is_local(pattern):
+            return [path for path in sorted(glob.glob(urlparse(pattern).path))
+                    if not self.is_hidden(path)]
+        path, fs = self._hadoop_path(pattern)
+        return sorted(status.getPath().toString()
+                      for status in fs.globStatus(path) or []
+                      if not self.is_hidden(status.getPath().getName()))
+
+    def directories(self, path):
+        if self.is_local(path):
+            local_path = urlparse(path).path
+            if not os.path.isdir(local_path):
+                return []
+            return ["%s/%s" % (path.rstrip('/'), name)
+                    for name in sorted(os.listdir(local_path))
+                    if not self.is_hidden(name) and
+                    os.path.isdir(os.path.join(local_path, name))]
+
+        jpath, fs = self._hadoop_path(path)
+        if not fs.exists(jpath):
+            return []
+        return sorted(status.getPath().toString()
+                      for status in fs.listStatus(jpath)
+                      if status.isDirectory() and
+                      not self.is_hidden(status.getPath().getName()))
+
+    def delete(self, path):
+        if self.is_local(path):
+            local_path = urlparse(path).path
+            if os.path.isdir(local_path):
+                shutil.rmtree(local_path)
+            elif os.path.exists(local_path):
+                os.remove(local_path)
+        else:
+            jpath, fs = self._hadoop_path(path)
+            fs.delete(jpath, True)
+
+    def rename(self, source, destination):
+        if self.is_local(source):
+            os.rename(urlparse(source).path, urlparse(destination).path)
+        else:
+            jsource, fs = self._hadoop_path(source)
+            jdestination, fs = self._hadoop_path(destination)
+            if not fs.rename(jsource, jdestination):
+                raise IOError("Could not rename %s to %s" %
+                              (source, destination))
+
+    @staticmethod
+    def is_local(path):
+        return urlparse(path).scheme in ('', 'file')
+
+    @staticmethod
+    def is_hidden(path):
+        return os.path.basename(path.rstrip('/'))[:1] in ('_', '.')
+
+    def _local_files(self, pattern):
+        pattern = urlparse(pattern).path
+        files = []
+        for path in sorted(glob.glob(pattern)):
+            if self.is_hidden(path):
+                continue
+            if os.path.isdir(path):
+                for root, dirs, names in os.walk(path):
+                    dirs[:] = sorted(d for d in dirs if not self.is_hidden(d))
+                    for name in sorted(names):
+                        if not self.is_hidden(name):
+                            files.append(self._local_status(
+                                os.path.join(root, name)))
+            else:
+                files.append(self._local_status(path))
+        return files
+
+    def _local_status(self, path):
+        stat = os.stat(path)
+        return FileStatus(path, stat.st_size, stat.st_mtime)
+
+    def _hadoop_files(self, pattern):
+        path, fs = self._hadoop_path(pattern)
+        files = []
+        for status in fs.globStatus(path) or []:
+            files += self._hadoop_walk(fs, status)
+        return files
+
+    def _hadoop_path(self, path):
+        sc = self._context._sc
+        path = sc._jvm.org.apache.hadoop.fs.Path(path)
+        return path, path.getFileSystem(sc._jsc.hadoopConfiguration())
+
+    def _hadoop_walk(self, fs, status):
+        path = status.getPath().toString()
+        if self.is_hidden(path):
+            return []
+        if not status.isDirectory():
+            return [FileStatus(path, status.getLen(),
+                               status.getModificationTime() / 1000.0)]
+        files = []
+        for child in sorted(fs.listStatus(status.getPath()),
+                            key=lambda child: child.getPath().toString()):
+            files += self._hadoop_walk(fs, child)
+        return files
@@ -0,0 +1,86 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import math
+import threading
+from collections import deque, namedtuple
+
+__all__ = ['PHASES', 'QueryEvent', 'QueryMetrics']
+
+# Phases timed by a DAL, in the order they happen for a query
+PHASES = ['compile', 'listing', 'read', 'register', 'planning', 'execute',
+          'execution']
+
+QueryEvent = namedtuple('QueryEvent', ['phase', 'duration', 'query',
+                                       'tables', 'rows', 'bytes'])
+
+
+class QueryMetrics(object):
+    """Hook of a DAL keeping the durations of the last ``size`` events of
+    each phase, from which counts and percentiles are computed"""
+
+    def __init__(self, size=1000):
+        self._size = size
+        self._durations = dict()
+        self._counts = dict()
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            durations = self._durations.get(event.phase)
+            if durations is None:
+                durations = self._durations[event.phase] = deque(
+                    maxlen=self._size)
+            durations.append(event.duration)
+            self._counts[event.phase] = self._counts.get(event.phase, 0) + 1
+
+    @property
+    def phases(self):
+        with self._lock:
+            return sorted(self._durations, key=_phase_order)
+
+    def count(self, phase):
+        """Events of phase since the metrics were created or reset"""
+        with self._lock:
+            return self._counts.get(phase, 0)
+
+    def percentile(self, phase, percent):
+        """Duration of phase not exceeded by ``percent`` of its last
+        events, or None when there are none"""
+        with self._lock:
+            durations = sorted(self._durations.get(phase, []))
+        return _nearest_rank(durations, percent)
+
+    def summary(self, percents=(50, 90, 99)):
+        """Count, mean, max and percentiles of the durations of each phase"""
+        with self._lock:
+            durations = dict((phase, sorted(values))
+                             for phase, values in self._durations.items())
+            counts = dict(self._counts)
+
+        summary = dict()
+        for phase, values in durations.items():
+            summary[phase] = dict(
+                count=counts[phase],
+                mean=sum(values) / len(values),
+                max=values[-1],
+                **dict(("p%s" % percent, _nearest_rank(values, percent))
+                       for percent in percents)
+            )
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+
+
+def _nearest_rank(values, percent):
+    if not values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def _phase_order(phase):
+    return PHASES.index(phase) if phase in PHASES else len(PHASES), phase
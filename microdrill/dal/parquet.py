@@ -1,9 +1,37 @@
 #! /usr/bin/env python
 # -*- coding: UTF-8 -*- #
 
+import json
+import threading
+import warnings
+from collections import OrderedDict
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from urllib import unquote
+
 from microdrill.pool import ParquetPool
-from pyspark.sql import SQLContext
+from pyspark.sql import HiveContext, SQLContext, functions
+from pyspark.sql.types import StructType
+from microdrill.catalog import merge_schemas
+from microdrill.pruning import _literal, may_match
+from microdrill.query import FieldList, Membership
+from microdrill.sampling import count_error, sample_files
 from microdrill.dal.sql import SQLDAL
+from microdrill.dal.aggregation import IncrementalAggregator
+from microdrill.dal.compaction import (RETIRED_FILES_AGE, TARGET_FILE_SIZE,
+                                       TableCompactor)
+from microdrill.dal.executor import QueryExecutor
+from microdrill.dal.explain import Explanation, TableScan, pushed_filters
+from microdrill.dal.prepared import PreparedStatement
+from microdrill.dal.rollups import RollupStore
+from microdrill.dal.filesystem import FileStatus, FileSystem
+
+
+HIVE_DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+REGISTRY_SIZE = 64
+WIDE_TABLE_COLUMNS = 100
+ISIN_BROADCAST_SIZE = 1000
+BROADCAST_JOIN_BYTES = 10 * 1024 * 1024
 
 
 class ParquetDAL(SQLDAL):
@@ -11,38 +39,695 @@ class ParquetDAL(SQLDAL):
         super(ParquetDAL, self).__init__()
         self._tables = ParquetPool()
         self._uri = uri
-        self._context = SQLContext(*args, **kwargs)
+        if kwargs.pop('hive', False):
+            self._context = HiveContext(*args, **kwargs)
+        else:
+            self._context = SQLContext(*args, **kwargs)
+        self._filesystem = FileSystem(self._context)
+        self._registered = OrderedDict()
+        self._versions = dict()
+        self._version = 0
+        self._lock = threading.RLock()
+        self._catalog = None
+        self._lazy = False
+        self._statistics = None
+        self._manifest = None
+        self._cache = None
+        self._executor = QueryExecutor(self)
+        self._rollups = RollupStore(self)
+        self._aggregator = IncrementalAggregator(self)
+        self._compactor = TableCompactor(self)
+        self._wide_table_columns = WIDE_TABLE_COLUMNS
+        self._refuse_wide_select = False
+        self._isin_broadcast_size = ISIN_BROADCAST_SIZE
+        self._broadcast_join_bytes = BROADCAST_JOIN_BYTES
+
+    @property
+    def catalog(self):
+        return self._catalog
+
+    @catalog.setter
+    def catalog(self, catalog):
+        self._catalog = catalog
+
+    @property
+    def lazy(self):
+        return self._lazy
+
+    @lazy.setter
+    def lazy(self, lazy):
+        self._lazy = lazy
+
+    @property
+    def statistics(self):
+        return self._statistics
+
+    @statistics.setter
+    def statistics(self, statistics):
+        self._statistics = statistics
+
+    @property
+    def manifest(self):
+        return self._manifest
+
+    @manifest.setter
+    def manifest(self, manifest):
+        self._manifest = manifest
+
+    @property
+    def wide_table_columns(self):
+        return self._wide_table_columns
+
+    @wide_table_columns.setter
+    def wide_table_columns(self, columns):
+        self._wide_table_columns = columns
+
+    @property
+    def refuse_wide_select(self):
+        return self._refuse_wide_select
+
+    @refuse_wide_select.setter
+    def refuse_wide_select(self, refuse):
+        self._refuse_wide_select = refuse
+
+    @property
+    def isin_broadcast_size(self):
+        return self._isin_broadcast_size
+
+    @isin_broadcast_size.setter
+    def isin_broadcast_size(self, size):
+        self._isin_broadcast_size = size
+
+    @property
+    def broadcast_join_bytes(self):
+        return self._broadcast_join_bytes
+
+    @broadcast_join_bytes.setter
+    def broadcast_join_bytes(self, size):
+        self._broadcast_join_bytes = size
+
+    @property
+    def executor(self):
+        return self._executor
+
+    @executor.setter
+    def executor(self, executor):
+        self._executor = executor
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache):
+        self._cache = cache
 
     def set_table(self, table_obj):
-        super(ParquetDAL, self).set_table(table_obj)
-        self._connect_for_schema(table_obj.name)
+        self.set_tables([table_obj])
+
+    def set_tables(self, tables, workers=4):
+        for table_obj in tables:
+            super(ParquetDAL, self).set_table(table_obj)
+            self.invalidate(table_obj.name)
+            table_obj.loader = partial(self._connect_for_schema,
+                                       table_obj.name)
+
+        if self._lazy:
+            return
+
+        if workers > 1 and len(tables) > 1:
+            pool = ThreadPool(min(workers, len(tables)))
+            try:
+                pool.map(lambda table_obj: table_obj.load(), tables)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for table_obj in tables:
+                table_obj.load()
 
     def _connect_for_schema(self, name):
         table = self._tables.get(name)
         if table:
-            table.config['files'] = [table.schema_index_file]
-            table.connection = self.connect(name)
+            # Files configured before a lazy table is first used are kept
+            table.config.setdefault('files', [table.schema_index_file])
+            if self._catalog:
+                table.connection = self._connect_from_catalog(name)
+            else:
+                table.connection = self.connect(name)
         else:
             raise ValueError("Table %s not found" % name)
 
-    def execute(self):
+    def _connect_from_catalog(self, name):
+        key = self._paths(name)[0]
+        files = self._filesystem.files(key)
+        if not files:
+            return self.connect(name)
+
+        entry, new_files = self._catalog.changes(key, files)
+        if entry and not new_files:
+            schema = entry['schema']
+        elif entry:
+            new_df = self._context.read.option('mergeSchema', 'true').parquet(
+                *[status.path for status in new_files])
+            schema = merge_schemas(entry['schema'], new_df.schema.jsonValue())
+        else:
+            schema = self.connect(name).schema.jsonValue()
+        self._catalog.set(key, files, schema)
+
+        return self._context.createDataFrame([], StructType.fromJson(schema))
+
+    def execute(self, statement):
+        return self._execute(statement, self._plan, self._run)
+
+    def _execute(self, statement, plan, run):
+        # Measured execution of statement, planned and run by the given
+        # callables so prepared statements can reuse their plans
+        with self._measure('execute', statement):
+            with self._measure('compile', statement):
+                statement.query
+            statement, dataframes = plan(statement)
+
+            if self._cache:
+                key = self._cache.key(statement.query,
+                                      ([signature for name, signature, df
+                                        in dataframes], statement.sampling))
+                result = self._cache.get(key, self._context)
+                if result is not None:
+                    return result
+
+            result = run(statement, dataframes)
+
+            if self._cache:
+                result = self._cache.put(key, result, self._context)
+            return result
+
+    def explain(self, statement):
+        """Returns the Spark plans of the statement, the files read from
+        each table and those pruned, with no Spark job run"""
+        routed = self._rollups.route(statement)
+        if routed:
+            planned, dataframes = routed
+        else:
+            planned, dataframes = statement, self._dataframes(statement)
+        execution = self._run(planned, dataframes)._jdf.queryExecution()
+        physical_plan = execution.executedPlan().toString()
 
-        for table_name in [field.table.name for field in self.base_query.fields]:
-            self.connect(table_name).registerTempTable(table_name)
-        result = self._context.sql(self.query)
-        self._query = {}
+        scans = []
+        for name, signature, df in dataframes:
+            files = [status for statuses in signature[1]
+                     for status in statuses]
+            read = set(status.path for status in files)
+            if routed:
+                pruned_files = []
+            else:
+                pruned_files = [status.path
+                                for files in self._table_listing(name)
+                                for status in files
+                                if status.path not in read]
+            columns = planned.columns(name)
+            scans.append(TableScan(
+                name, list(signature[0]), [status.path for status in files],
+                pruned_files, sum(status.size for status in files),
+                self.estimate_size(name, signature, columns), columns))
 
+        predicate = planned.predicate
+        return Explanation(planned.query, execution.analyzed().toString(),
+                           physical_plan,
+                           predicate.query if predicate is not None else None,
+                           pushed_filters(physical_plan), scans)
+
+    def prepare(self, statement, size=REGISTRY_SIZE):
+        return PreparedStatement(self, statement, size)
+
+    def materialize(self, name, rollups=None):
+        """Writes the rollups of a table, or only those named in rollups,
+        computed from its current files"""
+        self._rollups.materialize(name, rollups)
+
+    def execute_incremental(self, statement, state):
+        """Executes an aggregation reading only the files of the table not
+        yet folded into the partial aggregates kept in state, an
+        AggregateState, or all of them when files were removed or
+        rewritten"""
+        return self._aggregator.execute(statement, state)
+
+    def compact(self, name, target_file_size=TARGET_FILE_SIZE, sort_by=None,
+                where=None):
+        """Rewrites the files of each partition of a table matching where, or
+        of the directories configured, into files of about target_file_size
+        bytes, sorted by the fields in sort_by. The manifest switches to the
+        new files at once and the directories rewritten are returned."""
+        return self._compactor.compact(name, target_file_size, sort_by,
+                                       where)
+
+    def purge(self, name, age=RETIRED_FILES_AGE):
+        """Deletes the files of a table replaced by compactions more than age
+        seconds ago and returns their paths"""
+        return self._compactor.purge(name, age)
+
+    def _plan(self, statement):
+        # Returns the statement to run, maybe over a rollup, and its tables
+        routed = self._rollups.route(statement)
+        if routed:
+            return routed
+        return statement, self._dataframes(statement)
+
+    def _dataframes(self, statement):
+        if statement.params:
+            raise ValueError("Parameters not bound: %s" %
+                             ", ".join(statement.params))
+        if statement.sampling and len(statement.tables) > 1:
+            raise ValueError("Only queries over one table can be sampled")
+        dataframes = []
+        for name in statement.tables:
+            columns = statement.columns(name)
+            if columns is None:
+                self._check_select_all(name)
+            dataframes.append((name, ) + self._dataframe(
+                name, statement.predicate, columns, statement.sampling,
+                statement))
+        return dataframes
+
+    def _run(self, statement, dataframes):
+        result = self._query(*self._semi_join(statement, dataframes))
+        if statement.sampling:
+            result = self._scale(statement, result)
         return result
 
+    def _scale(self, statement, result):
+        # Files are sampled with probability fraction, so dividing counts
+        # and sums by it estimates them over all files
+        fraction, seed, confidence = statement.sampling
+        select = statement.clause('select')
+        fields = select.fields if isinstance(select, FieldList) else []
+        columns = []
+        for index, column in enumerate(result.columns):
+            template = fields[index].sql_template if fields else None
+            if template not in ('COUNT(%s)', 'SUM(%s)'):
+                columns.append(result[column])
+                continue
+            estimate = result[column] / fraction
+            columns.append(estimate.alias(column))
+            if confidence and template == 'COUNT(%s)':
+                columns.append(count_error(estimate, fraction,
+                                           confidence).alias(
+                    "%s_error" % column))
+        return result.select(*columns)
+
+    def _semi_join(self, statement, dataframes):
+        # Big isin conditions ANDed to the others are replaced by a semi join
+        # with a broadcast DataFrame of values, keeping their range as hint
+        memberships = [
+            predicate for predicate in _conjuncts(statement.predicate)
+            if isinstance(predicate, Membership) and
+            len(predicate.values) > self._isin_broadcast_size and
+            predicate.range() is not None
+        ]
+        if not memberships:
+            return statement, dataframes
+
+        joined = []
+        for name, signature, df in dataframes:
+            for membership in memberships:
+                if membership.field.table.name != name:
+                    continue
+                values = self._context.createDataFrame(
+                    [(value, ) for value in set(
+                        _literal(value) for value in membership.values)],
+                    ['value'])
+                df = df.join(functions.broadcast(values),
+                             df[membership.field.name] == values['value'],
+                             'leftsemi')
+            joined.append((name, signature, df))
+        return statement.replace(dict(
+            (membership.key, membership.range()) for membership in memberships
+        )), joined
+
+    def _query(self, statement, dataframes):
+        broadcast = self._broadcast_tables(statement, dataframes)
+        # Temp tables are shared by the context, the plan is resolved by
+        # sql() so they can be replaced by other threads right after it
+        with self._lock:
+            with self._measure('register', statement):
+                for name, signature, df in dataframes:
+                    if name in broadcast:
+                        df = functions.broadcast(df)
+                    df.registerTempTable(name)
+            with self._measure('planning', statement):
+                return self._context.sql(statement.query)
+
+    def estimate_size(self, name, signature, columns=None):
+        """Bytes of the files in signature, in proportion to the columns
+        read when they are given"""
+        size = sum(status.size for files in signature[1] for status in files)
+        if columns is not None:
+            width = len(self._tables.get(name).schema())
+            size = size * len(columns) / max(width, 1)
+        return size
+
+    def _broadcast_tables(self, statement, dataframes):
+        # Joined tables small enough are sent whole to every executor so the
+        # other side of the join is not shuffled
+        if self._broadcast_join_bytes is None:
+            return set()
+        signatures = dict((name, signature)
+                          for name, signature, df in dataframes)
+        return set(
+            join.table.name for join in statement.joins
+            if join.table.name in signatures and
+            self.estimate_size(join.table.name, signatures[join.table.name],
+                               statement.columns(join.table.name)) <=
+            self._broadcast_join_bytes
+        )
+
+    def iterate(self, statement, batch_size=None):
+        """Yields rows, or lists of up to batch_size rows, computing one
+        partition at a time so only one of them is in driver memory"""
+        df = self.execute(statement)
+        with self._measure('execution', statement) as event:
+            event['rows'] = 0
+            batch = []
+            for row in df.rdd.toLocalIterator():
+                event['rows'] += 1
+                if not batch_size:
+                    yield row
+                    continue
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def stream(self, statement, serializer=None, batch_size=1000):
+        """Yields chunks of serialized rows, one per line, to be written to
+        files or HTTP responses as they are consumed"""
+        serializer = serializer or _json_row
+        for batch in self.iterate(statement, batch_size):
+            yield "".join("%s\n" % serializer(row) for row in batch)
+
+    def execute_many(self, statements, action='collect'):
+        """Executes statements reading each table once for all statements
+        with the same table and files, filtered by any of their conditions
+        and cached. With no action the cached scans are kept for the
+        returned DataFrames."""
+        for statement in statements:
+            if statement.params:
+                raise ValueError("Parameters not bound: %s" %
+                                 ", ".join(statement.params))
+
+        results = [None] * len(statements)
+        groups = OrderedDict()
+        for index, statement in enumerate(statements):
+            tables = statement.tables
+            if len(tables) != 1 or statement.sampling:
+                continue
+            signature, df = self._dataframe(tables[0], statement.predicate)
+            groups.setdefault((tables[0], signature), []).append(
+                (index, statement, df))
+
+        scans = []
+        for (name, signature), members in groups.items():
+            if len(members) < 2:
+                continue
+            scan = self._shared_scan(name, members)
+            with self._lock:
+                scan.registerTempTable(name)
+                for index, statement, df in members:
+                    results[index] = self._context.sql(statement.query)
+            scans.append(scan)
+
+        for index, statement in enumerate(statements):
+            if results[index] is None:
+                results[index] = self.execute(statement)
+
+        if action:
+            results = [self._action(statement, result, action)
+                       for statement, result in zip(statements, results)]
+            for scan in scans:
+                scan.unpersist()
+        return results
+
+    def _shared_scan(self, name, members):
+        columns = set()
+        conditions = []
+        for index, statement, df in members:
+            statement_columns = statement.columns(name)
+            if columns is not None and statement_columns is not None:
+                columns.update(statement_columns)
+            else:
+                columns = None
+            if conditions is not None and statement.condition:
+                conditions.append(statement.condition)
+            else:
+                conditions = None
+
+        sql = "SELECT %s FROM %s" % (
+            ", ".join("`%s`.`%s`" % (name, column)
+                      for column in sorted(columns))
+            if columns else "*", name)
+        if conditions:
+            sql += " WHERE %s" % reduce(lambda x, y: x | y, conditions).query
+
+        with self._lock:
+            members[0][2].registerTempTable(name)
+            scan = self._context.sql(sql)
+        return scan.cache()
+
+    def execute_async(self, statement, action='collect', scheduler_pool=None,
+                      callback=None):
+        return self._executor.submit(statement, action, scheduler_pool,
+                                     callback)
+
+    def close(self):
+        self._executor.close()
+
+    def _action(self, statement, df, action):
+        # Runs the Spark job of a result calling the DataFrame method action
+        with self._measure('execution', statement) as event:
+            result = getattr(df, action)()
+            if isinstance(result, list):
+                event['rows'] = len(result)
+            elif action == 'count':
+                event['rows'] = result
+            return result
+
     def connect(self, name):
+        return self._read(name, self._paths(name))
+
+    def register(self, name, predicate=None):
+        signature, df = self._dataframe(name, predicate)
+        with self._lock:
+            df.registerTempTable(name)
+        return df
+
+    def refresh(self, name):
+        """Lists all the files of a table again into the manifest"""
+        table = self._tables.get(name)
+        if not table:
+            raise ValueError("Table %s not found" % name)
+        if self._manifest:
+            self._manifest_files(table, relist=True)
+        self.invalidate(name)
+
+    def invalidate(self, name=None):
+        with self._lock:
+            for key in self._registered.keys():
+                if name is None or key[0] == name:
+                    del self._registered[key]
+            self._version += 1
+            self._versions[name] = self._version
+
+    def _table_version(self, name):
+        # Changes each time the table, or all of them, are invalidated
+        with self._lock:
+            return max(self._versions.get(name, 0),
+                       self._versions.get(None, 0))
+
+    def _check_select_all(self, name):
+        width = len(self._tables.get(name).schema())
+        if (self._wide_table_columns is not None and
+                width > self._wide_table_columns):
+            message = "SELECT * reads all %s columns of table %s" % (width,
+                                                                     name)
+            if self._refuse_wide_select:
+                raise ValueError(message)
+            warnings.warn(message)
+
+    def _dataframe(self, name, predicate=None, columns=None, sampling=None,
+                   statement=None):
+        # Phases are measured for the statement when it is given
+        with self._measure('listing', statement) as event:
+            paths = self._scan_paths(name, predicate, sampling)
+            signature = (tuple(paths),
+                         tuple(tuple(self._files(path)) for path in paths))
+            event['bytes'] = sum(status.size for files in signature[1]
+                                 for status in files)
+        key = (name, tuple(paths),
+               tuple(columns) if columns is not None else None)
+
+        def read():
+            with self._measure('read', statement):
+                df = self._read(name, paths)
+                if columns is not None:
+                    df = df.select(*["`%s`" % column for column in columns])
+                return df
+        return self._register_dataframe(key, signature, read)
+
+    def _register_dataframe(self, key, signature, read):
+        with self._lock:
+            registered = self._registered.pop(key, None)
+            if registered and registered[0] == signature:
+                self._registered[key] = registered
+                return registered
+
+        df = read()
+        with self._lock:
+            self._registered[key] = (signature, df)
+            while len(self._registered) > REGISTRY_SIZE:
+                self._registered.popitem(last=False)
+        return signature, df
+
+    def _read(self, name, paths):
+        table = self._tables.get(name)
+        reader = self._context.read
+        if table.partitions:
+            reader = reader.option('basePath', self._table_path(table.name))
+        if not paths:
+            return reader.parquet(*self._paths(name)).limit(0)
+        return reader.parquet(*paths)
+
+    def _files(self, path):
+        # Files of path, from the manifest when it is one of its files
+        if self._manifest:
+            status = self._manifest.status(path)
+            if status is not None:
+                return [status]
+        return self._filesystem.files(path)
+
+    def _table_listing(self, name):
+        # Files of each path of a table
+        table = self._tables.get(name)
+        if table and self._manifest:
+            return (tuple(self._manifest_files(table)), )
+        return tuple(tuple(self._filesystem.files(path))
+                     for path in self._table_paths(name))
+
+    def _table_paths(self, name, predicate=None):
+        # Partition directories that may match predicate, or the configured
+        # files, the same for scans and for listings of the whole table
+        table = self._tables.get(name)
+        if table and table.partitions:
+            return self._partition_paths(table, predicate)
+        return self._paths(name)
+
+    def _manifest_files(self, table, predicate=None, relist=False):
+        # Files of the partitions that may match predicate, listing only
+        # the partitions not in the manifest yet, or all of them to relist
+        key = self._table_path(table.name)
+        partitions = self._table_paths(table.name, predicate)
+        entry = self._manifest.get(key) or dict()
+
+        listed = [path for path in partitions
+                  if relist or path not in entry]
+        # Partitions removed are only found walking all the directories
+        removed = ((table.partitions or relist) and predicate is None and
+                   set(entry) - set(partitions))
+        if listed or removed:
+            updated = dict((path, entry[path]) for path in entry
+                           if not removed or path not in removed)
+            for path in listed:
+                # Files retired by compactions are not listed again
+                retired = entry.get(path, dict()).get('retired', {})
+                files = self._filesystem.files(path)
+                updated[path] = {
+                    'values': self._partition_values(table, path),
+                    'files': [status for status in files
+                              if status.path not in retired],
+                    'retired': dict((status.path, retired[status.path])
+                                    for status in files
+                                    if status.path in retired),
+                }
+            self._manifest.set(key, updated)
+            entry = self._manifest.get(key)
+
+        return [FileStatus(*status) for path in partitions
+                for status in entry[path]['files']]
+
+    def _partition_values(self, table, path):
+        values = dict()
+        for directory in path.split('/'):
+            column, _, value = directory.partition('=')
+            if column in table.partitions:
+                values[column] = self._partition_range(value)[0]
+        return values
+
+    def _table_path(self, name):
+        return "%s/%s" % (self._uri, name)
+
+    def _paths(self, name):
         table = self._tables.get(name)
 
         if table and table.config.get('files'):
-            files = table.config.get('files')
-            parquet_list = list()
-            for filename in files:
-                parquet_list.append("%s/%s/%s" % (self._uri,
-                                                  table.name,
-                                                  filename))
-            return self._context.read.parquet(*parquet_list)
+            return ["%s/%s/%s" % (self._uri, table.name, filename)
+                    for filename in table.config.get('files')]
         raise ValueError("Table (%s) and files needed" % name)
+
+    def _scan_paths(self, name, predicate=None, sampling=None):
+        table = self._tables.get(name)
+        if table and self._manifest:
+            paths = [status.path
+                     for status in self._manifest_files(table, predicate)]
+        else:
+            paths = self._table_paths(name, predicate)
+
+        if self._statistics and predicate:
+            paths = self._skip_files(table, paths, predicate)
+        if sampling:
+            paths = sample_files([status.path for path in paths
+                                  for status in self._files(path)],
+                                 *sampling[:2])
+        return paths
+
+    def _skip_files(self, table, paths, predicate):
+        files = [status for path in paths for status in self._files(path)]
+        self._statistics.update(files)
+        return [status.path for status in files
+                if self._statistics.may_match(status.path, predicate,
+                                              table.name)]
+
+    def _partition_paths(self, table, predicate):
+        paths = [(self._table_path(table.name), dict())]
+        for column in table.partitions:
+            children = []
+            for path, ranges in paths:
+                for child in self._filesystem.directories(path):
+                    key, _, value = child.rsplit('/', 1)[-1].partition('=')
+                    if key != column:
+                        continue
+                    child_ranges = dict(ranges)
+                    child_ranges[column] = self._partition_range(value)
+                    if may_match(predicate, table.name, child_ranges):
+                        children.append((child, child_ranges))
+            paths = children
+        return [path for path, ranges in paths]
+
+    def _partition_range(self, value):
+        if value == HIVE_DEFAULT_PARTITION:
+            return None, None
+        value = unquote(value)
+        return value, value
+
+
+def _conjuncts(predicate):
+    if predicate is None:
+        return []
+    if getattr(predicate, 'operator', None) == 'AND':
+        return [conjunct for operand in predicate.operands
+                for conjunct in _conjuncts(operand.predicate)]
+    return [predicate]
+
+
+def _json_row(row):
+    return json.dumps(row.asDict(), default=str)
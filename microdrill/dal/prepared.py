@@ -0,0 +1,77 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import threading
+from collections import OrderedDict
+from functools import partial
+
+__all__ = ['PreparedStatement']
+
+
+class PreparedStatement(object):
+    """Statement with ``Param`` placeholders bound on each execute. The files
+    read and the DataFrames of the last ``size`` distinct values are kept,
+    with the plans Spark analyzed for them, until their tables are
+    invalidated."""
+
+    def __init__(self, dal, statement, size=64):
+        self._dal = dal
+        self._statement = statement
+        self._size = size
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def statement(self):
+        return self._statement
+
+    @property
+    def params(self):
+        return self._statement.params
+
+    def bind(self, **values):
+        return self._statement.bind(**values)
+
+    def execute(self, **values):
+        statement = self.bind(**values)
+        key = repr(sorted((name, values[name]) for name in self.params))
+        return self._dal._execute(statement, partial(self._plan, key),
+                                  partial(self._run, key))
+
+    def execute_async(self, action='collect', scheduler_pool=None,
+                      callback=None, **values):
+        return self._dal.execute_async(self.bind(**values), action,
+                                       scheduler_pool, callback)
+
+    def _plan(self, key, statement):
+        # Statement to run and its DataFrames, planned again only when its
+        # tables were invalidated since they were kept
+        versions = tuple(self._dal._table_version(name)
+                         for name in statement.tables)
+        with self._lock:
+            plan = self._plans.pop(key, None)
+            if plan and plan['versions'] == versions:
+                self._plans[key] = plan
+                return plan['statement'], plan['dataframes']
+
+        statement, dataframes = self._dal._plan(statement)
+        with self._lock:
+            self._plans[key] = dict(versions=versions, statement=statement,
+                                    dataframes=dataframes, result=None)
+            while len(self._plans) > self._size:
+                self._plans.popitem(last=False)
+        return statement, dataframes
+
+    def _run(self, key, statement, dataframes):
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan and plan['dataframes'] is not dataframes:
+                plan = None
+            if plan and plan['result'] is not None:
+                return plan['result']
+
+        result = self._dal._run(statement, dataframes)
+        if plan:
+            with self._lock:
+                plan['result'] = result
+        return result
@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import hashlib
+import threading
+import uuid
+
+__all__ = ['RollupStore']
+
+
+class RollupStore(object):
+    """Rollups of the tables of a DAL, written as parquet in
+    ``uri/table_name__rollup_name`` and found by a digest of the files they
+    were computed from, kept until the table is invalidated"""
+
+    def __init__(self, dal):
+        self._dal = dal
+        self._digests = dict()
+        self._lock = threading.Lock()
+
+    def materialize(self, name, rollups=None):
+        table = self._dal.tables.get(name)
+        if not table:
+            raise ValueError("Table %s not found" % name)
+
+        filesystem = self._dal._filesystem
+        digest = self.digest(name, relist=True)
+        for rollup in table.rollups.values():
+            if rollups is not None and rollup.name not in rollups:
+                continue
+            directory = self.path(name, rollup.name)
+            tmp_path = "%s/_%s" % (directory, uuid.uuid4().hex)
+            signature, df = self._dal._dataframe(name)
+            with self._dal._lock:
+                df.registerTempTable(name)
+                result = self._dal.context.sql(rollup.sql(name))
+            result.write.parquet(tmp_path)
+            path = self.path(name, rollup.name, digest)
+            filesystem.delete(path)
+            filesystem.rename(tmp_path, path)
+            for old_path in filesystem.directories(directory):
+                if old_path.rstrip('/') != path:
+                    filesystem.delete(old_path)
+
+    def route(self, statement):
+        """Statement reading the smallest rollup answering it, with its
+        DataFrame, or None"""
+        tables = statement.tables
+        table = self._dal.tables.get(tables[0]) if len(tables) == 1 else None
+        if not table or statement.params:
+            return None
+        rollups = [rollup for rollup in table.rollups.values()
+                   if rollup.matches(statement)]
+        if not rollups:
+            return None
+
+        with self._dal._measure('listing', statement) as event:
+            digest = self.digest(table.name)
+            smallest = None
+            for rollup in rollups:
+                path = self.path(table.name, rollup.name, digest)
+                files = tuple(self._dal._filesystem.files(path))
+                size = sum(status.size for status in files)
+                if files and (smallest is None or size < smallest[0]):
+                    smallest = (size, rollup, path, files)
+            if smallest is not None:
+                event['bytes'] = smallest[0]
+        if smallest is None:
+            return None
+
+        size, rollup, path, files = smallest
+
+        def read():
+            with self._dal._measure('read', statement):
+                return self._dal.context.read.parquet(path)
+        signature, df = self._dal._register_dataframe(
+            (table.name, (path, ), None), ((path, ), (files, )), read)
+        return rollup.rewrite(statement), [(table.name, signature, df)]
+
+    def digest(self, name, relist=False):
+        """Digest of the listing of the files of a table, listed again only
+        when the table was invalidated since or to relist"""
+        version = self._dal._table_version(name)
+        with self._lock:
+            cached = self._digests.get(name)
+        if cached and cached[0] == version and not relist:
+            return cached[1]
+
+        digest = hashlib.sha1(repr(self._dal._table_listing(name))).hexdigest()
+        with self._lock:
+            self._digests[name] = (version, digest)
+        return digest
+
+    def path(self, name, rollup_name, digest=None):
+        path = "%s/%s__%s" % (self._dal._uri, name, rollup_name)
+        if digest:
+            path += "/%s" % digest
+        return path
@@ -1,107 +1,69 @@
 #! /usr/bin/env python
 # -*- coding: UTF-8 -*- #
 
-from microdrill.query import BaseQuery
+import time
+import warnings
+from contextlib import contextmanager
+
+from microdrill.statement import Statement
 from microdrill.dal import BaseDAL
+from microdrill.dal.cache import normalize_sql
+from microdrill.dal.metrics import QueryEvent
 
 
 class SQLDAL(BaseDAL):
     def __init__(self):
         super(SQLDAL, self).__init__()
-        self._query = {}
+        self._hooks = []
 
     @property
-    def base_query(self):
-        return (
-            self._query.get('select', BaseQuery()) +
-            self._from() +
-            self._query.get('where', BaseQuery()) +
-            self._query.get('group_by', BaseQuery()) +
-            self._query.get('having', BaseQuery()) +
-            self._query.get('order_by', BaseQuery()) +
-            self._query.get('limit', BaseQuery())
-        )
+    def hooks(self):
+        """Callables receiving a QueryEvent for each phase of each query"""
+        return self._hooks
 
-    @property
-    def query(self):
-        return self.base_query.query
+    @hooks.setter
+    def hooks(self, hooks):
+        self._hooks = list(hooks)
 
-    def group_by(self, *fields):
-        self._query['group_by'] = self._make_simple_statement(
-            BaseQuery("GROUP BY", fields)
-        )
+    def statement(self):
+        return Statement(self)
 
-        return self
+    def group_by(self, *fields):
+        return self.statement().group_by(*fields)
 
     def having(self, *base_queries):
-        self._query['having'] = self._make_conditional_statement(
-            BaseQuery("HAVING"), base_queries
-        )
+        return self.statement().having(*base_queries)
 
-        return self
+    def join(self, table, on, how='inner'):
+        return self.statement().join(table, on, how)
 
     def limit(self, limit):
-        query = "LIMIT %s" % limit
-        self._query['limit'] = BaseQuery(query)
-
-        return self
+        return self.statement().limit(limit)
 
     def order_by(self, *fields):
-        self._query['order_by'] = self._make_simple_statement(
-            BaseQuery("ORDER BY", fields),
-            extra_action=self._treat_order_by
-        )
-
-        return self
+        return self.statement().order_by(*fields)
 
     def select(self, *fields):
-        if fields:
-            self._query['select'] = self._make_simple_statement(
-                BaseQuery("SELECT", fields)
-            )
-        else:
-            self._query['select'] = BaseQuery("SELECT *")
-        return self
+        return self.statement().select(*fields)
 
     def where(self, *base_queries):
-        self._query['where'] = self._make_conditional_statement(
-            BaseQuery("WHERE"), base_queries
-        )
-
-        return self
-
-    def _from(self):
-        tables = []
-        for query in self._query.values():
-            tables += [field.table.name for field in query.fields]
-
-        query = BaseQuery("FROM")
-        query += BaseQuery(", ".join(set(tables)))
-        return query
-
-    def _make_conditional_statement(self, query, base_queries):
-        for base_query in base_queries:
-            query += base_query
-
-        return query
-
-    def _make_simple_statement(self, base_query, extra_action=None):
-        query_fields = []
-        for field in base_query.fields:
-
-            sql_name = field.sql()
-            if extra_action:
-                sql_name = extra_action(field)
-
-            query_fields.append(sql_name)
-
-        base_query += BaseQuery(", ".join(query_fields))
-        return base_query
-
-    def _treat_order_by(self, field):
-        sql = field.sql('%s ASC')
-
-        if field.invert:
-            sql = field.sql('%s DESC')
-
-        return sql
+        return self.statement().where(*base_queries)
+
+    @contextmanager
+    def _measure(self, phase, statement):
+        # Yields a dict where rows and bytes can be set, sent with the time
+        # spent in the block to the hooks when it does not raise
+        if not self._hooks or statement is None:
+            yield dict()
+            return
+        values = dict()
+        start = time.time()
+        yield values
+        event = QueryEvent(phase, time.time() - start,
+                           normalize_sql(statement.query), statement.tables,
+                           values.get('rows'), values.get('bytes'))
+        for hook in list(self._hooks):
+            try:
+                hook(event)
+            except Exception as e:
+                warnings.warn("Hook %r failed: %s" % (hook, e))
@@ -1,16 +1,23 @@
 #! /usr/bin/env python
 # -*- coding: UTF-8 -*- #
-from query import BaseQuery
+from query import Comparison, Membership
 
 __all__ = ['BaseField']
 
 
 class BaseField(object):
+    """Column of a table, maybe aggregated by ``sql_template`` or inverted.
+    Aggregated and inverted fields are created once and kept by the field
+    they come from, so tables only hold the fields used."""
+
+    __slots__ = ('_name', '_table', '_invert', '_sql_template', '_derived')
+
     def __init__(self, name, table_obj, sql_template=None, invert=False):
         self._name = name
         self._table = table_obj
         self._invert = invert
         self._sql_template = sql_template
+        self._derived = None
 
     @property
     def name(self):
@@ -24,17 +31,36 @@ class BaseField(object):
     def invert(self):
         return self._invert
 
+    @property
+    def key(self):
+        return (self._table.name, self._name, self._sql_template, self._invert)
+
     @property
     def avg(self):
-        return BaseField(self._name, self._table, sql_template='AVG(%s)')
+        return self._derive('AVG(%s)')
 
     @property
     def count(self):
-        return BaseField(self._name, self._table, sql_template='COUNT(%s)')
+        return self._derive('COUNT(%s)')
 
     @property
     def sum(self):
-        return BaseField(self._name, self._table, sql_template='SUM(%s)')
+        return self._derive('SUM(%s)')
+
+    @property
+    def min(self):
+        return self._derive('MIN(%s)')
+
+    @property
+    def max(self):
+        return self._derive('MAX(%s)')
+
+    def approx_count_distinct(self, rsd=0.05):
+        return self._derive('APPROXCOUNTDISTINCT(%%s, %r)' % rsd)
+
+    def approx_percentile(self, percentage, accuracy=10000):
+        return self._derive('PERCENTILE_APPROX(%%s, %r, %d)' % (percentage,
+                                                                accuracy))
 
     @property
     def sql_template(self):
@@ -58,7 +84,15 @@ class BaseField(object):
         try:
             value = int(value)
         except ValueError:
-            value = "'%s'" % value
+            # Spark SQL string literals have no escapes, only two quotes
+            if "'" not in value:
+                value = "'%s'" % value
+            elif '"' not in value:
+                value = '"%s"' % value
+            else:
+                raise ValueError('String with both quotes can not be quoted')
+            if '\n' in value:
+                raise ValueError('String with new line can not be quoted')
         except TypeError:
             raise TypeError('It should be string or integer, type %s found' % type(value))
         return value
@@ -68,75 +102,47 @@ class BaseField(object):
             base_query = ~base_query
         return base_query
 
+    def _compare(self, operator, y):
+        return self._check_and_do_invert(Comparison(operator, self, y))
+
     def __eq__(self, y):
-        return self._check_and_do_invert(
-            BaseQuery("`%s`.`%s` = %s" % (
-                self._table.name,
-                self._name,
-                self._quote(y)
-                ), [self]
-            )
-        )
+        return self._compare('=', y)
 
     def __ne__(self, y):
-        return self._check_and_do_invert(
-            BaseQuery("`%s`.`%s` <> %s" % (
-                self._table.name,
-                self._name,
-                self._quote(y)
-                ), [self]
-            )
-        )
+        return self._compare('<>', y)
 
     def __gt__(self, y):
-        return self._check_and_do_invert(
-            BaseQuery("`%s`.`%s` > %s" % (
-                self._table.name,
-                self._name,
-                self._quote(y)
-                ), [self]
-            )
-        )
+        return self._compare('>', y)
 
     def __ge__(self, y):
-        return self._check_and_do_invert(
-            BaseQuery("`%s`.`%s` >= %s" % (
-                self._table.name,
-                self._name,
-                self._quote(y)
-                ), [self]
-            )
-        )
+        return self._compare('>=', y)
 
     def __lt__(self, y):
-        return self._check_and_do_invert(
-            BaseQuery("`%s`.`%s` < %s" % (
-                self._table.name,
-                self._name,
-                self._quote(y)
-                ), [self]
-            )
-        )
+        return self._compare('<', y)
 
     def __le__(self, y):
-        return self._check_and_do_invert(
-            BaseQuery("`%s`.`%s` <= %s" % (
-                self._table.name,
-                self._name,
-                self._quote(y)
-                ), [self]
-            )
-        )
+        return self._compare('<=', y)
 
     def regexp(self, y):
-        return self._check_and_do_invert(
-            BaseQuery("`%s`.`%s` REGEXP %s" % (
-                self._table.name,
-                self._name,
-                self._quote(y)
-                ), [self]
-            )
-        )
+        return self._compare('REGEXP', y)
+
+    def isin(self, values):
+        values = list(values)
+        if not values:
+            raise ValueError('At least one value is needed')
+        return self._check_and_do_invert(Membership(self, values))
 
     def __invert__(self):
-        return BaseField(self._name, self._table, invert=True)
+        return self._derive(invert=True)
+
+    def _derive(self, sql_template=None, invert=False):
+        # Field of the same column, kept to be returned on next calls
+        if self._derived is None:
+            self._derived = dict()
+        key = (sql_template, invert)
+        field = self._derived.get(key)
+        if field is None:
+            field = self._derived.setdefault(key, BaseField(
+                self._name, self._table, sql_template=sql_template,
+                invert=invert))
+        return field
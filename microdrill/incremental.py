@@ -0,0 +1,94 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import datetime
+from decimal import Decimal
+
+from utils import JSONStore, listing_changes
+
+__all__ = ['AggregateState', 'merge_partials']
+
+
+def merge_partials(functions, left, right):
+    """Merges two lists of partial aggregates computed by functions, as
+    ``sum``, ``count``, ``min`` or ``max``. Nulls are ignored."""
+    merged = []
+    for function, x, y in zip(functions, left, right):
+        if x is None or y is None:
+            merged.append(y if x is None else x)
+        elif function in ('sum', 'count'):
+            merged.append(x + y)
+        elif function == 'min':
+            merged.append(min(x, y))
+        elif function == 'max':
+            merged.append(max(x, y))
+        else:
+            raise ValueError("Aggregate %s can not be merged" % function)
+    return merged
+
+
+class AggregateState(JSONStore):
+    """Partial aggregates of queries by group, stored in a local JSON file
+    keyed by the query and holding the listing (path, size, mtime) of the
+    files already folded into them. Dates, datetimes and decimals are
+    stored tagged and returned as they were."""
+
+    def get(self, key):
+        entry = super(AggregateState, self).get(key)
+        if entry is None:
+            return None
+        return dict(entry, rows=[[_decode(value) for value in row]
+                                 for row in entry['rows']])
+
+    def changes(self, key, files):
+        """Returns the stored entry and the files added since it was folded,
+        or no entry when files were removed or rewritten."""
+        return listing_changes(self.get(key), files)
+
+    def fold(self, key, files, functions, rows, entry=None):
+        """Stores rows of group values followed by partial aggregates, merged
+        into those of entry when it is given, as computed up to files."""
+        if not functions:
+            raise ValueError("At least one aggregate is needed")
+        groups = dict()
+        if entry:
+            for row in entry['rows']:
+                groups[tuple(row[:-len(functions)])] = row[-len(functions):]
+        for row in rows:
+            group = tuple(row[:-len(functions)])
+            partials = list(row[-len(functions):])
+            if group in groups:
+                partials = merge_partials(functions, groups[group], partials)
+            groups[group] = partials
+
+        entry = {
+            'files': [list(status) for status in files],
+            'functions': list(functions),
+            'rows': [list(group) + partials
+                     for group, partials in sorted(groups.items())],
+        }
+        self._set(key, dict(entry, rows=[[_encode(value) for value in row]
+                                         for row in entry['rows']]))
+        return entry
+
+
+def _encode(value):
+    # JSON value of a group or aggregate, tagged when it is not one
+    if isinstance(value, datetime.datetime):
+        return {'datetime': value.strftime('%Y-%m-%dT%H:%M:%S.%f')}
+    if isinstance(value, datetime.date):
+        return {'date': value.strftime('%Y-%m-%d')}
+    if isinstance(value, Decimal):
+        return {'decimal': str(value)}
+    return value
+
+
+def _decode(value):
+    if not isinstance(value, dict):
+        return value
+    if 'datetime' in value:
+        return datetime.datetime.strptime(value['datetime'],
+                                          '%Y-%m-%dT%H:%M:%S.%f')
+    if 'date' in value:
+        return datetime.datetime.strptime(value['date'], '%Y-%m-%d').date()
+    return Decimal(value['decimal'])
@@ -0,0 +1,84 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import json
+import time
+
+from dal.filesystem import FileStatus
+from utils import JSONStore
+
+__all__ = ['FileManifest']
+
+
+class FileManifest(JSONStore):
+    """Files of tables stored in a local JSON file, keyed by the table path
+    and grouped by partition directory with their partition values and the
+    listing (path, size, mtime) of their files. Partitions are listed once,
+    only new ones are listed again until the table is refreshed.
+
+    Files replaced by a compaction are kept as retired, with the time they
+    were replaced, and left out of the listings until they are purged."""
+
+    def __init__(self, filename):
+        super(FileManifest, self).__init__(filename)
+        self._statuses = None
+
+    def set(self, key, partitions):
+        """Stores partitions, a dict of partition path to a dict with its
+        ``values``, ``files`` and maybe ``retired`` files"""
+        # Kept as loaded from JSON, the same in every process
+        self._set(key, json.loads(json.dumps(dict(
+            (path, {'values': partition['values'],
+                    'files': [list(status) for status in partition['files']],
+                    'retired': partition.get('retired', {})})
+            for path, partition in partitions.items()
+        ))))
+
+    def replace(self, key, partition, files, new_files):
+        """Replaces files of a partition by new_files in one write, so every
+        reader of the manifest switches to them at once, and retires them"""
+        paths = set(status[0] for status in files)
+        new_files = json.loads(json.dumps([list(status)
+                                           for status in new_files]))
+        retired_at = time.time()
+
+        def replace(entries):
+            entry = entries[key][partition]
+            entry['files'] = [status for status in entry['files']
+                              if status[0] not in paths] + new_files
+            entry.setdefault('retired', {}).update(
+                dict.fromkeys(paths, retired_at))
+        self._update(replace)
+
+    def retired(self, key):
+        """Time each file of a table was retired at, by path"""
+        retired = dict()
+        for partition in (self.get(key) or dict()).values():
+            retired.update(partition.get('retired', {}))
+        return retired
+
+    def purge(self, key, paths):
+        """Forgets retired files, once they are deleted"""
+        paths = set(paths)
+
+        def purge(entries):
+            for partition in entries.get(key, dict()).values():
+                retired = partition.get('retired', {})
+                for path in paths.intersection(retired):
+                    del retired[path]
+        self._update(purge)
+
+    def status(self, path):
+        """FileStatus of a file in the manifest, or None"""
+        with self._lock:
+            if self._statuses is None:
+                self._statuses = dict(
+                    (status[0], FileStatus(*status))
+                    for entry in self._load_once().values()
+                    for partition in entry.values()
+                    for status in partition['files']
+                )
+            return self._statuses.get(path)
+
+    def _changed(self):
+        self._statuses = None
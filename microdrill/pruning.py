@@ -0,0 +1,89 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+__all__ = ['may_match']
+
+
+def may_match(predicate, table_name, ranges):
+    """Tells if rows with values inside ``ranges``, a dict of column name to
+    ``(min, max)``, may satisfy ``predicate``. ``(None, None)`` means only
+    nulls. Anything that can not be decided is assumed to match."""
+    return _evaluate(predicate, table_name, ranges)[0]
+
+
+def _evaluate(predicate, table_name, ranges):
+    # Returns (may match, must match) for predicate
+    if predicate is None:
+        return True, False
+
+    operator = predicate.operator
+    if operator in ('AND', 'OR'):
+        left, right = [_evaluate(operand.predicate, table_name, ranges)
+                       for operand in predicate.operands]
+        if operator == 'AND':
+            return left[0] and right[0], left[1] and right[1]
+        return left[0] or right[0], left[1] or right[1]
+    if operator == 'NOT':
+        may, must = _evaluate(predicate.operand.predicate, table_name, ranges)
+        return not must, not may
+
+    field = predicate.field
+    if (field.table.name != table_name or field.sql_template or
+            field.name not in ranges or
+            getattr(predicate, 'compares_fields', False)):
+        return True, False
+    if operator == 'IN':
+        results = [_compare('=', ranges[field.name], _literal(value))
+                   for value in predicate.values]
+        return (any(may for may, must in results),
+                any(must for may, must in results))
+    return _compare(operator, ranges[field.name], _literal(predicate.value))
+
+
+def _literal(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def _coerce(value_range, value):
+    # Bounds comparable to value, or None when they are not
+    low, high = value_range
+    if low is None or high is None:
+        return None
+    strings = [isinstance(item, basestring) for item in (low, high, value)]
+    if len(set(strings)) == 1:
+        return low, high
+    # Only a single string value, as a partition value, is cast to the type
+    # of value. Min and max of strings are byte-wise, '100' < '5' < '99'
+    if strings[0] and strings[1] and low == high:
+        try:
+            bound = type(value)(low)
+        except ValueError:
+            return None
+        return bound, bound
+    return None
+
+
+def _compare(operator, value_range, value):
+    if value_range[0] is None and value_range[1] is None:
+        return False, False
+    bounds = _coerce(value_range, value)
+    if bounds is None:
+        return True, False
+    low, high = bounds
+
+    if operator == '=':
+        return low <= value <= high, low == high == value
+    if operator == '<>':
+        return not (low == high == value), value < low or value > high
+    if operator == '>':
+        return high > value, low > value
+    if operator == '>=':
+        return high >= value, low >= value
+    if operator == '<':
+        return low < value, high < value
+    if operator == '<=':
+        return low <= value, high <= value
+    return True, False
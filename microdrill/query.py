@@ -1,39 +1,442 @@
 #! /usr/bin/env python
 # -*- coding: UTF-8 -*- #
 
-__all__ = ['BaseQuery']
+__all__ = ['BaseQuery', 'BooleanQuery', 'Comparison', 'Concatenation',
+           'FieldList', 'Join', 'Membership', 'NotQuery', 'Param']
+
+
+class Param(object):
+    """Placeholder for a value bound when a prepared query is executed"""
+
+    __slots__ = ('_name', )
+
+    def __init__(self, name):
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    def __str__(self):
+        return ":%s" % self._name
+
+    def __repr__(self):
+        return "Param(%r)" % self._name
+
+    def __hash__(self):
+        return hash((Param, self._name))
+
+    def __eq__(self, y):
+        return isinstance(y, Param) and self._name == y.name
+
+    def __ne__(self, y):
+        return not self == y
 
 
 class BaseQuery(object):
+    """Immutable SQL expression. Subclasses build a tree that is compiled to
+    SQL once, on first access to ``query``, and compared or hashed by its
+    structure through ``key``."""
+
+    __slots__ = ('_query', '_fields', '_sql')
 
     def __init__(self, query="", fields=[]):
         self._query = query
         self._fields = list(fields)
+        self._sql = None
 
     @property
     def query(self):
-        return self._query.strip()
+        if self._sql is None:
+            self._sql = self._compile().strip()
+        return self._sql
 
     @property
     def fields(self):
         return self._fields
 
+    @property
+    def predicate(self):
+        return None
+
+    @property
+    def params(self):
+        return set()
+
+    @property
+    def key(self):
+        return (self.__class__.__name__, self._query,
+                tuple(field.key for field in self._fields))
+
+    def bind(self, values):
+        return self
+
+    def replace(self, queries):
+        """Returns the tree with queries, a dict of key to query, replaced"""
+        return queries.get(self.key, self)
+
+    def _compile(self):
+        return self._query
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, y):
+        return isinstance(y, BaseQuery) and self.key == y.key
+
+    def __ne__(self, y):
+        return not self == y
+
     def __and__(self, y):
-        return BaseQuery("(%s) AND (%s)" % (self.query, y.query),
-                         self.fields + y.fields)
+        return BooleanQuery('AND', self, y)
 
     def __or__(self, y):
-        return BaseQuery("(%s) OR (%s)" % (self.query, y.query),
-                         self.fields + y.fields)
+        return BooleanQuery('OR', self, y)
 
     def __invert__(self):
-        return BaseQuery("NOT (%s)" % self.query, self.fields)
+        return NotQuery(self)
 
     def __add__(self, y):
         if isinstance(y, str):
-            return BaseQuery("%s %s" % (self.query, y), self.fields)
+            return Concatenation(self, BaseQuery(y))
         elif isinstance(y, BaseQuery):
-            return BaseQuery("%s %s" % (self.query, y.query),
-                             self.fields + y.fields)
+            return Concatenation(self, y)
         else:
             raise ValueError('Only BaseQuery or String objects are added')
+
+
+class Comparison(BaseQuery):
+    """Field compared to a value, a ``Param`` or, as in join conditions,
+    another field"""
+
+    __slots__ = ('_operator', '_field', '_value', '_compares_fields',
+                 '_literal')
+
+    def __init__(self, operator, field, value):
+        compares_fields = hasattr(value, 'table') and hasattr(value, 'sql')
+        super(Comparison, self).__init__(
+            fields=[field, value] if compares_fields else [field])
+        self._operator = operator
+        self._field = field
+        self._value = value
+        self._compares_fields = compares_fields
+        if compares_fields:
+            self._literal = value.sql()
+        elif isinstance(value, Param):
+            self._literal = value
+        else:
+            self._literal = field._quote(value)
+
+    @property
+    def operator(self):
+        return self._operator
+
+    @property
+    def field(self):
+        return self._field
+
+    @property
+    def value(self):
+        return self._value
+
+    @property
+    def compares_fields(self):
+        return self._compares_fields
+
+    @property
+    def predicate(self):
+        return self
+
+    @property
+    def params(self):
+        if isinstance(self._value, Param):
+            return set([self._value.name])
+        return set()
+
+    @property
+    def key(self):
+        return (self.__class__.__name__, self._operator, self._field.key,
+                self._literal)
+
+    def bind(self, values):
+        if not isinstance(self._value, Param):
+            return self
+        if self._value.name not in values:
+            raise ValueError("Parameter %s not bound" % self._value.name)
+        return Comparison(self._operator, self._field,
+                          values[self._value.name])
+
+    def _compile(self):
+        return "`%s`.`%s` %s %s" % (self._field.table.name, self._field.name,
+                                    self._operator, self._literal)
+
+
+class Membership(BaseQuery):
+    operator = 'IN'
+
+    __slots__ = ('_field', '_values', '_literals')
+
+    def __init__(self, field, values):
+        super(Membership, self).__init__(fields=[field])
+        self._field = field
+        self._values = tuple(values)
+        self._literals = tuple(field._quote(value) for value in self._values)
+
+    @property
+    def field(self):
+        return self._field
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def predicate(self):
+        return self
+
+    @property
+    def key(self):
+        return (self.__class__.__name__, self._field.key, self._literals)
+
+    def range(self):
+        """Comparisons between the lowest and highest values, or None when
+        strings and numbers are mixed"""
+        values = [value if isinstance(literal, basestring) else literal
+                  for value, literal in zip(self._values, self._literals)]
+        if len(set(isinstance(value, basestring) for value in values)) > 1:
+            return None
+        return (Comparison('>=', self._field, min(values)) &
+                Comparison('<=', self._field, max(values)))
+
+    def _compile(self):
+        return "`%s`.`%s` IN (%s)" % (
+            self._field.table.name, self._field.name,
+            ", ".join("%s" % literal for literal in self._literals))
+
+
+class BooleanQuery(BaseQuery):
+    __slots__ = ('_operator', '_operands')
+
+    def __init__(self, operator, left, right):
+        super(BooleanQuery, self).__init__(fields=left.fields + right.fields)
+        self._operator = operator
+        self._operands = (left, right)
+
+    @property
+    def operator(self):
+        return self._operator
+
+    @property
+    def operands(self):
+        return self._operands
+
+    @property
+    def predicate(self):
+        return self
+
+    @property
+    def params(self):
+        return self._operands[0].params | self._operands[1].params
+
+    @property
+    def key(self):
+        return (self.__class__.__name__, self._operator,
+                tuple(operand.key for operand in self._operands))
+
+    def bind(self, values):
+        return BooleanQuery(self._operator,
+                            *[operand.bind(values)
+                              for operand in self._operands])
+
+    def replace(self, queries):
+        if self.key in queries:
+            return queries[self.key]
+        return BooleanQuery(self._operator,
+                            *[operand.replace(queries)
+                              for operand in self._operands])
+
+    def _compile(self):
+        return "(%s) %s (%s)" % (self._operands[0].query, self._operator,
+                                 self._operands[1].query)
+
+
+class NotQuery(BaseQuery):
+    operator = 'NOT'
+
+    __slots__ = ('_operand', )
+
+    def __init__(self, operand):
+        super(NotQuery, self).__init__(fields=operand.fields)
+        self._operand = operand
+
+    @property
+    def operand(self):
+        return self._operand
+
+    @property
+    def predicate(self):
+        return self
+
+    @property
+    def params(self):
+        return self._operand.params
+
+    @property
+    def key(self):
+        return (self.__class__.__name__, self._operand.key)
+
+    def bind(self, values):
+        return NotQuery(self._operand.bind(values))
+
+    def replace(self, queries):
+        if self.key in queries:
+            return queries[self.key]
+        return NotQuery(self._operand.replace(queries))
+
+    def _compile(self):
+        return "NOT (%s)" % self._operand.query
+
+
+class Concatenation(BaseQuery):
+    __slots__ = ('_parts', '_predicate')
+
+    def __init__(self, *parts):
+        flat_parts = []
+        for part in parts:
+            if isinstance(part, Concatenation):
+                flat_parts += part.parts
+            else:
+                flat_parts.append(part)
+
+        fields = []
+        for part in flat_parts:
+            fields += part.fields
+        super(Concatenation, self).__init__(fields=fields)
+        self._parts = tuple(flat_parts)
+        self._predicate = None
+
+    @property
+    def parts(self):
+        return self._parts
+
+    @property
+    def predicate(self):
+        # Conditions added one after another, as in where(a, b), are ANDed
+        if self._predicate is None:
+            for part in self._parts:
+                if part.predicate is None:
+                    continue
+                if self._predicate is None:
+                    self._predicate = part.predicate
+                else:
+                    self._predicate = BooleanQuery('AND', self._predicate,
+                                                   part.predicate)
+        return self._predicate
+
+    @property
+    def params(self):
+        params = set()
+        for part in self._parts:
+            params |= part.params
+        return params
+
+    @property
+    def key(self):
+        return (self.__class__.__name__,
+                tuple(part.key for part in self._parts))
+
+    def bind(self, values):
+        return Concatenation(*[part.bind(values) for part in self._parts])
+
+    def replace(self, queries):
+        if self.key in queries:
+            return queries[self.key]
+        return Concatenation(*[part.replace(queries) for part in self._parts])
+
+    def _compile(self):
+        return " ".join(part.query for part in self._parts if part.query)
+
+
+class Join(BaseQuery):
+    KEYWORDS = {
+        'inner': 'INNER JOIN',
+        'left': 'LEFT OUTER JOIN',
+        'semi': 'LEFT SEMI JOIN',
+    }
+
+    __slots__ = ('_table', '_on', '_how')
+
+    def __init__(self, table, on, how='inner'):
+        if how not in self.KEYWORDS:
+            raise ValueError('Join should be one of %s, %s found' % (
+                ", ".join(sorted(self.KEYWORDS)), how))
+        super(Join, self).__init__(fields=on.fields)
+        self._table = table
+        self._on = on
+        self._how = how
+
+    @property
+    def table(self):
+        return self._table
+
+    @property
+    def on(self):
+        return self._on
+
+    @property
+    def how(self):
+        return self._how
+
+    @property
+    def params(self):
+        return self._on.params
+
+    @property
+    def key(self):
+        return (self.__class__.__name__, self._how, self._table.name,
+                self._on.key)
+
+    def bind(self, values):
+        return Join(self._table, self._on.bind(values), self._how)
+
+    def replace(self, queries):
+        if self.key in queries:
+            return queries[self.key]
+        return Join(self._table, self._on.replace(queries), self._how)
+
+    def _compile(self):
+        return "%s %s ON %s" % (self.KEYWORDS[self._how], self._table.name,
+                                self._on.query)
+
+
+class FieldList(BaseQuery):
+    """Keyword followed by comma separated fields, as in SELECT or GROUP BY.
+    With ``order`` fields are suffixed by ASC or DESC when inverted."""
+
+    __slots__ = ('_keyword', '_order')
+
+    def __init__(self, keyword, fields, order=False):
+        super(FieldList, self).__init__(fields=fields)
+        self._keyword = keyword
+        self._order = order
+
+    @property
+    def keyword(self):
+        return self._keyword
+
+    @property
+    def key(self):
+        return (self.__class__.__name__, self._keyword, self._order,
+                tuple(field.key for field in self._fields))
+
+    def _compile(self):
+        return "%s %s" % (self._keyword,
+                          ", ".join(self._field_sql(field)
+                                    for field in self._fields))
+
+    def _field_sql(self, field):
+        if not self._order:
+            return field.sql()
+        if field.invert:
+            return field.sql('%s DESC')
+        return field.sql('%s ASC')
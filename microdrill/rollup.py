@@ -0,0 +1,145 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from field import BaseField
+from query import FieldList
+
+__all__ = ['Rollup']
+
+FUNCTIONS = {
+    'AVG(%s)': 'avg',
+    'COUNT(%s)': 'count',
+    'MAX(%s)': 'max',
+    'MIN(%s)': 'min',
+    'SUM(%s)': 'sum',
+}
+# Templates recombining the partial aggregates stored for each group
+TEMPLATES = {
+    'count': 'COALESCE(SUM(%s), 0)',
+    'max': 'MAX(%s)',
+    'min': 'MIN(%s)',
+    'sum': 'SUM(%s)',
+}
+
+
+class Rollup(object):
+    """Aggregates of a table pre-computed by ``groups``, from which queries
+    grouping by some of these columns and filtering only by them are
+    answered. AVG is stored as SUM and COUNT."""
+
+    def __init__(self, name, groups, aggregates):
+        self._name = name
+        self._groups = [field.name for field in groups]
+        self._aggregates = set()
+        for field in aggregates:
+            function = FUNCTIONS.get(field.sql_template)
+            if function is None:
+                raise ValueError('Aggregate %s can not be rolled up' %
+                                 field.sql())
+            if function == 'avg':
+                self._aggregates.update([('sum', field.name),
+                                         ('count', field.name)])
+            else:
+                self._aggregates.add((function, field.name))
+
+    @staticmethod
+    def function(field):
+        """Name of the aggregate of field, or None"""
+        return FUNCTIONS.get(field.sql_template)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def groups(self):
+        return self._groups
+
+    @property
+    def aggregates(self):
+        return sorted(self._aggregates)
+
+    @property
+    def columns(self):
+        return self._groups + [_column(function, name)
+                               for function, name in self.aggregates]
+
+    def sql(self, table_name):
+        """Query materializing the rollup from the table"""
+        columns = ["`%s`.`%s`" % (table_name, name) for name in self._groups]
+        columns += ["%s(`%s`.`%s`) AS `%s`" % (function.upper(), table_name,
+                                               name, _column(function, name))
+                    for function, name in self.aggregates]
+        sql = "SELECT %s FROM %s" % (", ".join(columns), table_name)
+        if self._groups:
+            sql += " GROUP BY %s" % ", ".join(
+                "`%s`.`%s`" % (table_name, name) for name in self._groups)
+        return sql
+
+    def matches(self, statement):
+        """Tells if the statement, over one table, can read the rollup"""
+        select = statement.clause('select')
+        if (len(statement.tables) != 1 or statement.joins or
+                statement.sampling or not isinstance(select, FieldList)):
+            return False
+
+        # Conditions compare columns, with no aggregate, so only groups
+        for name in ('where', 'having'):
+            clause = statement.clause(name)
+            if clause is None:
+                continue
+            if any(part.predicate is None for part in clause.parts[1:]):
+                return False
+            if any(field.name not in self._groups for field in clause.fields):
+                return False
+
+        fields = []
+        for name in ('select', 'group_by', 'order_by'):
+            clause = statement.clause(name)
+            if clause is not None:
+                fields += clause.fields
+
+        aggregated = False
+        for field in fields:
+            if field.sql_template:
+                if self.field(field) is None:
+                    return False
+                aggregated = True
+            elif field.name not in self._groups:
+                return False
+        return aggregated
+
+    def field(self, field):
+        """Field of the rollup returning the same as field, or None"""
+        function = FUNCTIONS.get(field.sql_template)
+        if function == 'avg':
+            if not set([('sum', field.name),
+                        ('count', field.name)]) <= self._aggregates:
+                return None
+            template = 'SUM(%%s) / SUM(`%s`.`%s`)' % (
+                field.table.name, _column('count', field.name))
+            return BaseField(_column('sum', field.name), field.table,
+                             sql_template=template, invert=field.invert)
+        if (function, field.name) not in self._aggregates:
+            return None
+        return BaseField(_column(function, field.name), field.table,
+                         sql_template=TEMPLATES[function],
+                         invert=field.invert)
+
+    def rewrite(self, statement):
+        """Statement reading the rollup, registered with the table name"""
+        statement = statement.select(*[
+            self.field(field) if field.sql_template else field
+            for field in statement.clause('select').fields
+        ])
+        order_by = statement.clause('order_by')
+        if order_by is not None:
+            statement = statement.order_by(*[
+                self.field(field) if field.sql_template else field
+                for field in order_by.fields
+            ])
+        return statement
+
+
+def _column(function, name):
+    return "%s__%s" % (function, name)
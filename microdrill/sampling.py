@@ -0,0 +1,49 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import hashlib
+import math
+
+__all__ = ['count_error', 'sample_files', 'z_score']
+
+
+def sample_files(paths, fraction, seed=0):
+    """Chooses each path with probability ``fraction`` by hashing it with
+    ``seed``, so the same files are chosen every time. At least one path is
+    chosen when there are any."""
+    if not 0 < fraction <= 1:
+        raise ValueError('Fraction should be between 0 and 1, %s found' %
+                         fraction)
+    scored = sorted((_score(path, seed), path) for path in paths)
+    sampled = [path for score, path in scored if score < fraction]
+    if not sampled and scored:
+        sampled = [scored[0][1]]
+    return sorted(sampled)
+
+
+def z_score(confidence):
+    """Standard normal quantile of a two sided ``confidence`` interval"""
+    if not 0 < confidence < 1:
+        raise ValueError('Confidence should be between 0 and 1, %s found' %
+                         confidence)
+    low, high = 0.0, 10.0
+    for _ in range(64):
+        middle = (low + high) / 2
+        if math.erf(middle / math.sqrt(2)) < confidence:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def count_error(count, fraction, confidence=0.95):
+    """Half width of the interval of a count estimated as ``count`` from a
+    ``fraction`` of the rows, taken as a random sample. Works with numbers
+    and with Spark columns."""
+    return (z_score(confidence) * (count * fraction * (1 - fraction)) ** 0.5 /
+            fraction)
+
+
+def _score(path, seed):
+    digest = hashlib.md5("%s:%s" % (seed, path)).hexdigest()
+    return int(digest[:8], 16) / float(0x100000000)
@@ -0,0 +1,178 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from query import BaseQuery, Concatenation, FieldList, Join
+
+__all__ = ['Statement']
+
+CLAUSES = ('select', 'join', 'where', 'group_by', 'having', 'order_by',
+           'limit')
+
+
+class Statement(object):
+    """Immutable SELECT statement. Every clause method returns a new
+    statement, so one DAL can build and execute queries from many threads."""
+
+    def __init__(self, dal=None, clauses=None, sampling=None):
+        self._dal = dal
+        self._clauses = dict(clauses or {})
+        self._sampling = sampling
+        self._base_query = None
+
+    @property
+    def dal(self):
+        return self._dal
+
+    @property
+    def base_query(self):
+        if self._base_query is None:
+            empty = BaseQuery()
+            self._base_query = Concatenation(
+                self._clauses.get('select', empty),
+                self._from(),
+                *[self._clauses.get(name, empty) for name in CLAUSES[1:]]
+            )
+        return self._base_query
+
+    @property
+    def query(self):
+        return self.base_query.query
+
+    @property
+    def key(self):
+        return self.base_query.key, self._sampling
+
+    @property
+    def sampling(self):
+        return self._sampling
+
+    @property
+    def tables(self):
+        return sorted(set(field.table.name
+                          for field in self.base_query.fields))
+
+    @property
+    def condition(self):
+        where = self._clauses.get('where')
+        if where is None or len(where.parts) < 2:
+            return None
+        if len(where.parts) == 2:
+            return where.parts[1]
+        return Concatenation(*where.parts[1:])
+
+    @property
+    def predicate(self):
+        where = self._clauses.get('where')
+        return where.predicate if where else None
+
+    @property
+    def params(self):
+        params = set()
+        for clause in self._clauses.values():
+            params |= clause.params
+        return sorted(params)
+
+    def bind(self, **values):
+        """Returns the statement with its parameters replaced by values"""
+        return self.__class__(self._dal, dict(
+            (name, clause.bind(values))
+            for name, clause in self._clauses.items()
+        ), self._sampling)
+
+    def replace(self, queries):
+        return self.__class__(self._dal, dict(
+            (name, clause.replace(queries))
+            for name, clause in self._clauses.items()
+        ), self._sampling)
+
+    @property
+    def joins(self):
+        join = self._clauses.get('join')
+        if join is None:
+            return []
+        if isinstance(join, Join):
+            return [join]
+        return list(join.parts)
+
+    def clause(self, name):
+        return self._clauses.get(name)
+
+    def columns(self, table_name):
+        """Names of the columns of a table used by the statement, or None
+        when all of them are selected"""
+        if not isinstance(self._clauses.get('select'), FieldList):
+            return None
+        return sorted(set(field.name for field in self.base_query.fields
+                          if field.table.name == table_name))
+
+    def group_by(self, *fields):
+        return self._with('group_by', FieldList("GROUP BY", fields))
+
+    def having(self, *base_queries):
+        return self._with('having', Concatenation(BaseQuery("HAVING"),
+                                                  *base_queries))
+
+    def join(self, table, on, how='inner'):
+        join = Join(table, on, how)
+        if 'join' in self._clauses:
+            join = Concatenation(self._clauses['join'], join)
+        return self._with('join', join)
+
+    def limit(self, limit):
+        return self._with('limit', BaseQuery("LIMIT %s" % limit))
+
+    def order_by(self, *fields):
+        return self._with('order_by', FieldList("ORDER BY", fields,
+                                                order=True))
+
+    def sample(self, fraction, seed=0, confidence=None):
+        """Reads about ``fraction`` of the files, always the same ones for a
+        seed, scaling counts and sums. With ``confidence`` the half width of
+        the interval of each count is added as ``<column>_error``."""
+        if not 0 < fraction <= 1:
+            raise ValueError('Fraction should be between 0 and 1, %s found' %
+                             fraction)
+        return self.__class__(self._dal, self._clauses,
+                              (fraction, seed, confidence))
+
+    def select(self, *fields):
+        if fields:
+            return self._with('select', FieldList("SELECT", fields))
+        return self._with('select', BaseQuery("SELECT *"))
+
+    def where(self, *base_queries):
+        return self._with('where', Concatenation(BaseQuery("WHERE"),
+                                                 *base_queries))
+
+    def execute(self):
+        if self._dal is None:
+            raise ValueError("Statement without DAL can not be executed")
+        return self._dal.execute(self)
+
+    def execute_async(self, *args, **kwargs):
+        if self._dal is None:
+            raise ValueError("Statement without DAL can not be executed")
+        return self._dal.execute_async(self, *args, **kwargs)
+
+    def _with(self, name, clause):
+        clauses = dict(self._clauses)
+        clauses[name] = clause
+        return self.__class__(self._dal, clauses, self._sampling)
+
+    def _from(self):
+        tables = []
+        for query in self._clauses.values():
+            tables += [field.table.name for field in query.fields]
+        joined = [join.table.name for join in self.joins]
+
+        return BaseQuery("FROM %s" % ", ".join(
+            sorted(set(tables) - set(joined))))
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, y):
+        return isinstance(y, Statement) and self.key == y.key
+
+    def __ne__(self, y):
+        return not self == y
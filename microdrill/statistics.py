@@ -0,0 +1,161 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import datetime
+import warnings
+from urlparse import urlparse
+
+from pruning import may_match
+from utils import JSONStore
+
+try:
+    import pyarrow.hdfs as hdfs
+    import pyarrow.parquet as pq
+except ImportError:
+    hdfs = pq = None
+
+__all__ = ['StatisticsIndex']
+
+
+class StatisticsIndex(JSONStore):
+    """Min, max and null count of every column for each row group of parquet
+    files, read from their footers with pyarrow and stored in a local JSON
+    file. Only files with a new size or mtime have their footer read.
+
+    Local files are read directly and ``hdfs://`` ones through the HDFS
+    client of pyarrow, which needs libhdfs and the Hadoop classpath. Files
+    of other schemes, or of a namenode it can not connect to, are not
+    indexed and always read."""
+
+    def __init__(self, filename):
+        if pq is None:
+            raise ImportError("pyarrow is needed to build statistics")
+        super(StatisticsIndex, self).__init__(filename)
+        self._clients = dict()
+
+    def update(self, files):
+        # Footers are read without the lock, then merged into the entries
+        # reloaded from the file
+        entries = dict()
+        for status in files:
+            entry = self.get(status.path)
+            if (entry and entry['size'] == status.size and
+                    entry['mtime'] == status.mtime):
+                continue
+            entry = self._read_footer(status)
+            if entry is not None:
+                entries[status.path] = entry
+        if entries:
+            self._update(lambda stored: stored.update(entries))
+
+    def remove(self, paths):
+        def remove(entries):
+            for path in paths:
+                entries.pop(path, None)
+        self._update(remove)
+
+    def may_match(self, path, predicate, table_name):
+        entry = self.get(path)
+        if entry is None:
+            return True
+
+        for row_group in entry['row_groups']:
+            ranges = dict((name, (stats[0], stats[1]))
+                          for name, stats in row_group.items())
+            if may_match(predicate, table_name, ranges):
+                return True
+        return False
+
+    def _read_footer(self, status):
+        url = urlparse(status.path)
+        if url.scheme in ('', 'file'):
+            metadata = pq.ParquetFile(url.path).metadata
+        else:
+            client = self._client(url)
+            if client is None:
+                return None
+            with client.open(url.path) as source:
+                metadata = pq.ParquetFile(source).metadata
+        row_groups = []
+        for index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(index)
+            columns = dict()
+            for column_index in range(row_group.num_columns):
+                column = row_group.column(column_index)
+                stats = self._column_statistics(column, row_group.num_rows)
+                if stats:
+                    columns[column.path_in_schema] = stats
+            row_groups.append(columns)
+
+        return {
+            'size': status.size,
+            'mtime': status.mtime,
+            'num_rows': metadata.num_rows,
+            'columns': self._merge_row_groups(row_groups),
+            'row_groups': row_groups,
+        }
+
+    def _client(self, url):
+        # HDFS client of the namenode of url, None when it is not available
+        key = (url.scheme, url.netloc)
+        if key not in self._clients:
+            client = None
+            if url.scheme == 'hdfs':
+                try:
+                    client = hdfs.connect(url.hostname or 'default',
+                                          url.port or 0)
+                except Exception as error:
+                    warnings.warn("Statistics of files in %s://%s are not "
+                                  "indexed, could not connect: %s"
+                                  % (url.scheme, url.netloc, error))
+            else:
+                warnings.warn("Statistics of %s files are not indexed"
+                              % url.scheme)
+            self._clients[key] = client
+        return self._clients[key]
+
+    def _column_statistics(self, column, num_rows):
+        stats = column.statistics
+        if stats is None:
+            return None
+        if stats.has_min_max:
+            low, high = _json_value(stats.min), _json_value(stats.max)
+            if low is not None and high is not None:
+                return [low, high, stats.null_count]
+        elif stats.null_count == num_rows:
+            return [None, None, stats.null_count]
+        return None
+
+    def _merge_row_groups(self, row_groups):
+        names = set()
+        for row_group in row_groups:
+            names.update(row_group)
+
+        columns = dict()
+        for name in names:
+            if not all(name in row_group for row_group in row_groups):
+                continue
+            stats = [row_group[name] for row_group in row_groups]
+            bounds = [item for item in stats if item[0] is not None]
+            null_count = sum(item[2] for item in stats)
+            if bounds:
+                columns[name] = [min(item[0] for item in bounds),
+                                 max(item[1] for item in bounds), null_count]
+            else:
+                columns[name] = [None, None, null_count]
+        return columns
+
+
+def _json_value(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, long, float, unicode)):
+        return value
+    if isinstance(value, str):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return unicode(value)
+    return None
@@ -1,6 +1,9 @@
 #! /usr/bin/env python
 # -*- coding: UTF-8 -*- #
+import threading
+
 from field import BaseField
+from rollup import Rollup
 
 __all__ = ['ParquetTable']
 
@@ -12,6 +15,9 @@ class BaseTable(object):
         self._schema = None
         self._config = dict()
         self._fields = dict()
+        self._columns = frozenset()
+        self._loader = None
+        self._lock = threading.RLock()
 
     @property
     def config(self):
@@ -36,26 +42,60 @@ class BaseTable(object):
 
     @property
     def fields(self):
+        self.load()
+        for column in self._columns:
+            self._field(column)
         return self._fields
 
+    @property
+    def loader(self):
+        return self._loader
+
+    @loader.setter
+    def loader(self, loader):
+        self._loader = loader
+
+    def load(self):
+        with self._lock:
+            loader, self._loader = self._loader, None
+            if loader:
+                try:
+                    loader()
+                except Exception:
+                    self._loader = loader
+                    raise
+
     def schema(self):
         raise NotImplementedError()
 
     def __call__(self, field_name):
-        return self._fields.get(field_name)
+        self.load()
+        return self._field(field_name)
+
+    def _field(self, name):
+        # Fields are created on first use, wide tables only hold those used
+        field = self._fields.get(name)
+        if field is None and name in self._columns:
+            with self._lock:
+                field = self._fields.get(name)
+                if field is None:
+                    field = self._fields[name] = BaseField(name, self)
+        return field
 
 
 class ParquetTable(BaseTable):
-    def __init__(self, name, schema_index_file=None):
+    def __init__(self, name, schema_index_file=None, partitions=None):
         super(ParquetTable, self).__init__(name)
         self._schema_index_file = schema_index_file or '*'
+        self._partitions = list(partitions or [])
+        self._rollups = dict()
 
     def schema(self):
+        self.load()
         if not self._schema:
             self._schema = self._connection.schema.names
+            self._columns = frozenset(self._schema)
             del self._connection
-        for field in self._schema:
-            self._fields[field] = BaseField(field, self)
         return self._schema
 
     @property
@@ -65,3 +105,15 @@ class ParquetTable(BaseTable):
     @schema_index_file.setter
     def schema_index_file(self, value):
         self._schema_index_file = value
+
+    @property
+    def partitions(self):
+        return self._partitions
+
+    @property
+    def rollups(self):
+        return self._rollups
+
+    def add_rollup(self, name, groups, aggregates):
+        self._rollups[name] = Rollup(name, groups, aggregates)
+        return self._rollups[name]
@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import json
+import os
+import tempfile
+import threading
+
+
+def load_json(filename):
+    if not os.path.exists(filename):
+        return dict()
+    with open(filename) as json_file:
+        return json.load(json_file)
+
+
+def save_json(filename, data):
+    # Written to a temporary file and renamed, readers never see it half done
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=dirname)
+    with os.fdopen(fd, 'w') as json_file:
+        json.dump(data, json_file)
+    os.rename(tmp_filename, filename)
+
+
+def listing_changes(entry, files):
+    """Returns entry and the files not in its listing, or no entry and all
+    the files when some of its files were removed or rewritten"""
+    if not entry:
+        return None, list(files)
+
+    known = set(tuple(status) for status in entry['files'])
+    current = set(tuple(status) for status in files)
+    if not known.issubset(current):
+        return None, list(files)
+    return entry, [status for status in files if tuple(status) not in known]
+
+
+class JSONStore(object):
+    """Entries by key in a local JSON file, loaded on first use and reloaded
+    before each change so changes of other processes are kept."""
+
+    def __init__(self, filename):
+        self._filename = filename
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def get(self, key):
+        with self._lock:
+            return self._load_once().get(key)
+
+    def invalidate(self, key=None):
+        def invalidate(entries):
+            if key is None:
+                entries.clear()
+            else:
+                entries.pop(key, None)
+        self._update(invalidate)
+
+    def _set(self, key, entry):
+        self._update(lambda entries: entries.__setitem__(key, entry))
+
+    def _update(self, update):
+        # Calls update with the entries reloaded from the file and saves them
+        with self._lock:
+            self._entries = load_json(self._filename)
+            update(self._entries)
+            self._changed()
+            save_json(self._filename, self._entries)
+
+    def _changed(self):
+        # Called holding the lock after entries change
+        pass
+
+    def _load_once(self):
+        if self._entries is None:
+            self._entries = load_json(self._filename)
+        return self._entries
@@ -21,7 +21,11 @@ setup(
     packages=find_packages(
         exclude=(
             'tests',
+            'benchmarks',
         ),
     ),
-    include_package_data=True
+    include_package_data=True,
+    extras_require={
+        'statistics': ['pyarrow'],
+    },
 )
@@ -0,0 +1,52 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import patch
+
+from benchmarks.compare import compare, main
+
+
+class TestCompare(TestCase):
+
+    def setUp(self):
+        self.base = {'results': [
+            {'query': None, 'phase': 'set_table', 'median': 2.0},
+            {'query': 'filter', 'phase': 'execute', 'median': 1.0},
+            {'query': 'filter', 'phase': 'collect', 'median': 0.0},
+        ]}
+        self.current = {'results': [
+            {'query': None, 'phase': 'set_table', 'median': 1.0},
+            {'query': 'filter', 'phase': 'execute', 'median': 1.5},
+            {'query': 'filter', 'phase': 'collect', 'median': 1.0},
+            {'query': 'limit', 'phase': 'execute', 'median': 1.0},
+        ]}
+
+    def test_should_return_ratios_of_medians(self):
+        comparison = compare(self.base, self.current)
+
+        self.assertEqual([(None, 'set_table', 0.5, False),
+                          ('filter', 'execute', 1.5, True)], comparison)
+
+    def test_should_use_threshold(self):
+        comparison = compare(self.base, self.current, threshold=2)
+
+        self.assertFalse(any(regressed for _, _, _, regressed in comparison))
+
+    def test_should_fail_on_regression(self):
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        paths = []
+        for name, report in (('base', self.base), ('current', self.current)):
+            paths.append(os.path.join(dirname, name + '.json'))
+            with open(paths[-1], 'w') as report_file:
+                json.dump(report, report_file)
+
+        with patch('sys.stdout'):
+            self.assertEqual(1, main(paths))
+            self.assertEqual(0, main(paths + ['--threshold', '2']))
@@ -0,0 +1,42 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from benchmarks.timing import measure, summarize
+
+
+class TestTiming(TestCase):
+
+    @patch('benchmarks.timing.time.time')
+    def test_should_measure_each_call(self, mock_time):
+        mock_time.side_effect = [0, 1, 10, 13, 20, 22]
+        function = Mock()
+
+        timings = measure(function, repeat=3)
+
+        self.assertEqual([1, 3, 2], timings)
+        self.assertEqual(3, function.call_count)
+
+    def test_should_pass_result_of_setup(self):
+        function = Mock()
+        setup = Mock(side_effect=['a', 'b'])
+
+        measure(function, repeat=2, setup=setup)
+
+        self.assertEqual([(('a', ), {}), (('b', ), {})],
+                         function.call_args_list)
+
+    def test_should_summarize_odd_timings(self):
+        summary = summarize([3, 1, 2])
+
+        self.assertEqual({'repeat': 3, 'min': 1, 'median': 2, 'mean': 2,
+                          'max': 3}, summary)
+
+    def test_should_summarize_even_timings_with_mean_of_middle_ones(self):
+        summary = summarize([4.0, 1.0, 2.0, 3.0])
+
+        self.assertEqual(2.5, summary['median'])
+        self.assertEqual(2.5, summary['mean'])
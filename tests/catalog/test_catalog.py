@@ -0,0 +1,89 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from microdrill.catalog import SchemaCatalog, merge_schemas
+from microdrill.dal.filesystem import FileStatus
+
+
+def struct(*fields):
+    return {'type': 'struct', 'fields': [
+        {'name': name, 'type': type_name, 'nullable': True, 'metadata': {}}
+        for name, type_name in fields
+    ]}
+
+
+class TestMergeSchemas(TestCase):
+
+    def test_should_keep_fields_in_first_seen_order(self):
+        schema = merge_schemas(struct(('A', 'long'), ('B', 'string')),
+                               struct(('C', 'double'), ('A', 'long')))
+
+        self.assertEqual(['A', 'B', 'C'],
+                         [field['name'] for field in schema['fields']])
+
+    def test_should_raise_error_merging_conflicting_types(self):
+        self.assertRaises(ValueError, merge_schemas,
+                          struct(('A', 'long')), struct(('A', 'string')))
+
+
+class TestSchemaCatalog(TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, 'catalog.json')
+        self.catalog = SchemaCatalog(self.filename)
+        self.key = '/data/table/*'
+        self.files = [FileStatus('/data/table/a.parquet', 10, 1.5)]
+        self.schema = struct(('A', 'long'))
+
+    def test_should_return_none_for_unknown_key(self):
+        self.assertIsNone(self.catalog.get(self.key))
+
+    def test_should_persist_entries_across_instances(self):
+        self.catalog.set(self.key, self.files, self.schema)
+
+        entry = SchemaCatalog(self.filename).get(self.key)
+
+        self.assertEqual(self.schema, entry['schema'])
+        self.assertEqual([['/data/table/a.parquet', 10, 1.5]], entry['files'])
+
+    def test_should_return_no_changes_for_same_files(self):
+        self.catalog.set(self.key, self.files, self.schema)
+
+        entry, new_files = self.catalog.changes(self.key, self.files)
+
+        self.assertEqual(self.schema, entry['schema'])
+        self.assertEqual([], new_files)
+
+    def test_should_return_only_new_files_as_changes(self):
+        self.catalog.set(self.key, self.files, self.schema)
+        new_file = FileStatus('/data/table/b.parquet', 20, 2.5)
+
+        entry, new_files = self.catalog.changes(self.key,
+                                                self.files + [new_file])
+
+        self.assertEqual(self.schema, entry['schema'])
+        self.assertEqual([new_file], new_files)
+
+    def test_should_drop_entry_when_file_is_rewritten(self):
+        self.catalog.set(self.key, self.files, self.schema)
+        rewritten = [FileStatus('/data/table/a.parquet', 10, 3.5)]
+
+        entry, new_files = self.catalog.changes(self.key, rewritten)
+
+        self.assertIsNone(entry)
+        self.assertEqual(rewritten, new_files)
+
+    def test_should_invalidate_key(self):
+        self.catalog.set(self.key, self.files, self.schema)
+        self.catalog.invalidate(self.key)
+
+        self.assertIsNone(SchemaCatalog(self.filename).get(self.key))
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from microdrill.dal.cache import ResultCache, normalize_sql
+
+
+class TestNormalizeSQL(TestCase):
+
+    def test_should_collapse_whitespace(self):
+        self.assertEqual("SELECT * FROM t WHERE a = 1",
+                         normalize_sql("  SELECT *\n FROM   t WHERE a = 1 "))
+
+    def test_should_keep_whitespace_inside_literals(self):
+        self.assertEqual("SELECT `my  field` FROM t WHERE a = 'x  y'",
+                         normalize_sql("SELECT `my  field`  FROM t "
+                                       "WHERE a = 'x  y'"))
+
+    def test_should_keep_escaped_quotes_inside_literals(self):
+        self.assertEqual("WHERE a = 'it\\'s  ok' AND b = 1",
+                         normalize_sql("WHERE a = 'it\\'s  ok'  AND b = 1"))
+
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self.context = Mock()
+        self.dirname = tempfile.mkdtemp()
+
+    def _df(self, rows):
+        df = Mock()
+        df.limit.return_value.collect.return_value = rows
+        df.write.parquet.side_effect = self._write
+        return df
+
+    def _write(self, path):
+        os.makedirs(path)
+        with open(os.path.join(path, 'part-0.parquet'), 'w') as f:
+            f.write('x' * 10)
+
+    def test_should_return_same_key_for_equivalent_queries(self):
+        cache = ResultCache()
+
+        self.assertEqual(cache.key("SELECT  a\n FROM t", ['files']),
+                         cache.key("SELECT a FROM t", ['files']))
+
+    def test_should_return_other_key_when_files_change(self):
+        cache = ResultCache()
+
+        self.assertNotEqual(cache.key("SELECT a FROM t", [('f', 1, 1.0)]),
+                            cache.key("SELECT a FROM t", [('f', 1, 2.0)]))
+
+    def test_should_return_none_for_missing_key(self):
+        self.assertIsNone(ResultCache().get('key', self.context))
+
+    def test_should_keep_small_results_in_memory(self):
+        cache = ResultCache(max_rows=2)
+        df = self._df([1, 2])
+
+        cache.put('key', df, self.context)
+        result = cache.get('key', self.context)
+
+        self.assertIs(self.context.createDataFrame.return_value, result)
+        self.context.createDataFrame.assert_called_with([1, 2], df.schema)
+
+    def test_should_evict_least_recently_used_results(self):
+        cache = ResultCache(max_rows=3)
+        cache.put('key1', self._df([1, 2]), self.context)
+        cache.put('key2', self._df([3]), self.context)
+        cache.get('key1', self.context)
+        cache.put('key3', self._df([4]), self.context)
+
+        self.assertIsNotNone(cache.get('key1', self.context))
+        self.assertIsNone(cache.get('key2', self.context))
+        self.assertIsNotNone(cache.get('key3', self.context))
+
+    def test_should_not_return_expired_results(self):
+        cache = ResultCache(ttl=10)
+        with patch('microdrill.dal.cache.time.time', return_value=100):
+            cache.put('key', self._df([1]), self.context)
+        with patch('microdrill.dal.cache.time.time', return_value=111):
+            self.assertIsNone(cache.get('key', self.context))
+
+    def test_should_not_cache_large_results_without_directory(self):
+        cache = ResultCache(max_rows=1)
+        df = self._df([1, 2])
+
+        self.assertIs(df, cache.put('key', df, self.context))
+        self.assertIsNone(cache.get('key', self.context))
+
+    def test_should_write_large_results_to_directory(self):
+        cache = ResultCache(max_rows=1, directory=self.dirname)
+        cache.put('key', self._df([1, 2]), self.context)
+
+        result = cache.get('key', self.context)
+
+        self.assertIs(self.context.read.parquet.return_value, result)
+        self.context.read.parquet.assert_called_with(
+            os.path.join(self.dirname, 'key'))
+
+    def test_should_find_results_written_by_other_caches(self):
+        ResultCache(max_rows=0, directory=self.dirname).put(
+            'key', self._df([1, 2]), self.context)
+
+        cache = ResultCache(max_rows=0, directory=self.dirname)
+
+        self.assertIsNotNone(cache.get('key', self.context))
+
+    def test_should_evict_results_from_directory_by_size(self):
+        cache = ResultCache(max_rows=0, directory=self.dirname, max_bytes=15)
+        cache.put('key1', self._df([1]), self.context)
+        cache.put('key2', self._df([2]), self.context)
+
+        self.assertFalse(os.path.exists(os.path.join(self.dirname, 'key1')))
+        self.assertIsNone(cache.get('key1', self.context))
+        self.assertIsNotNone(cache.get('key2', self.context))
+
+    def test_should_invalidate_all_results(self):
+        cache = ResultCache(max_rows=1, directory=self.dirname)
+        cache.put('key1', self._df([1]), self.context)
+        cache.put('key2', self._df([1, 2]), self.context)
+        cache.invalidate(self.context)
+
+        self.assertIsNone(cache.get('key1', self.context))
+        self.assertIsNone(cache.get('key2', self.context))
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
@@ -0,0 +1,117 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import os
+import shutil
+from collections import OrderedDict
+from unittest import TestCase
+
+import pandas as pd
+from mock import patch
+from pyspark import SparkContext
+
+from microdrill.dal.dataframe import DataFrameDAL
+from microdrill.dal.parquet import ParquetDAL
+from microdrill.query import BaseQuery
+from microdrill.table import ParquetTable
+
+
+class TestDataFrameDal(TestCase):
+
+    def setUp(self):
+        self.sc = SparkContext._active_spark_context
+        self.dirname = os.path.dirname(os.path.abspath(__file__))
+        self.dal = DataFrameDAL(self.dirname, self.sc)
+        self.sql_dal = ParquetDAL(self.dirname, self.sc)
+        self.table_name = "test_dataframe_table"
+        self.filename = "example.parquet"
+        self.full_path_file = os.path.join(self.dirname, self.table_name,
+                                           self.filename)
+        self.dataframe = OrderedDict([('A', [1, 2, 3, 4]),
+                                      ('B', ['x', 'y', 'x', 'y']),
+                                      ('C', [10, 20, 30, 40])])
+        df = pd.DataFrame(self.dataframe)
+        self.dal.context.createDataFrame(
+            df, self.dataframe.keys()).write.parquet(self.full_path_file)
+
+        self.table = ParquetTable(self.table_name,
+                                  schema_index_file=self.filename)
+        self.sql_table = ParquetTable(self.table_name,
+                                      schema_index_file=self.filename)
+        self.dal.set_table(self.table)
+        self.sql_dal.set_table(self.sql_table)
+
+    def assertSameResult(self, build):
+        result = build(self.dal, self.table).execute()
+        expected = build(self.sql_dal, self.sql_table).execute()
+        self.assertEqual(expected.columns, result.columns)
+        self.assertEqual(expected.collect(), result.collect())
+
+    def test_should_filter_and_select_as_sql(self):
+        self.assertSameResult(
+            lambda dal, table: dal.select(table('A'), table('C')).where(
+                (table('B') == 'x') | (table('A') > 3)).order_by(table('A'))
+        )
+
+    def test_should_select_all_as_sql(self):
+        self.assertSameResult(
+            lambda dal, table: dal.select().where(~table('A') == 2).order_by(
+                ~table('C'))
+        )
+
+    def test_should_group_by_as_sql(self):
+        self.assertSameResult(
+            lambda dal, table: dal.select(
+                table('B'), table('A').sum, table('C').avg, table('A').count
+            ).group_by(table('B')).order_by(table('B'))
+        )
+
+    def test_should_filter_groups_and_limit_as_sql(self):
+        self.assertSameResult(
+            lambda dal, table: dal.select(table('B'), table('C').sum).where(
+                table('B').regexp('^[xy]$')).group_by(table('B')).having(
+                table('B') != 'z').order_by(~table('B')).limit(1)
+        )
+
+    def test_should_filter_by_having_without_aggregates_as_sql(self):
+        self.assertSameResult(
+            lambda dal, table: dal.select(table('A'), table('B')).having(
+                table('A') > 2).order_by(table('A'))
+        )
+
+    def test_should_filter_by_having_on_aggregates_as_sql(self):
+        statement = self.dal.select(self.table('B'),
+                                    self.table('C').sum).group_by(
+            self.table('B')).having(self.table('C').sum > 40)
+
+        self.assertIsNone(self.dal.compile(statement,
+                                           self.dal.connect(self.table_name)))
+        self.assertSameResult(
+            lambda dal, table: dal.select(table('B'), table('C').sum).group_by(
+                table('B')).having(table('C').sum > 40)
+        )
+
+    def test_should_filter_in_values_as_sql(self):
+        self.assertSameResult(
+            lambda dal, table: dal.select(table('A')).where(
+                table('B').isin(['y', 'z']) | ~table('C').isin([10]))
+        )
+
+    def test_should_not_run_sql_for_single_table_queries(self):
+        with patch.object(self.dal.context, 'sql') as mock_sql:
+            result = self.dal.select(self.table('A')).where(
+                self.table('C') >= 30).execute()
+
+        self.assertFalse(mock_sql.called)
+        self.assertEqual([3, 4], sorted(row.A for row in result.collect()))
+
+    def test_should_run_sql_for_raw_sql_parts(self):
+        statement = self.dal.select(self.table('A')).where(
+            self.table('C') >= 30, BaseQuery("AND A < 4"))
+
+        self.assertIsNone(self.dal.compile(statement,
+                                           self.dal.connect(self.table_name)))
+        self.assertEqual([3], [row.A for row in statement.execute().collect()])
+
+    def tearDown(self):
+        shutil.rmtree(os.path.join(self.dirname, self.table_name))
@@ -0,0 +1,105 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import threading
+from unittest import TestCase
+
+from mock import Mock, call
+
+from microdrill.dal.executor import QueryExecutor
+from microdrill.statement import Statement
+from tests.helper import FakeTable, factory_field
+
+
+class TestQueryExecutor(TestCase):
+
+    def setUp(self):
+        self.dal = Mock()
+        self.sc = self.dal.context._sc
+        self.df = self.dal.execute.return_value
+        self.dal._action.side_effect = (
+            lambda statement, df, action: getattr(df, action)())
+        self.rows = self.df.collect.return_value
+        self.executor = QueryExecutor(self.dal, workers=2)
+        self.statement = Statement(self.dal).select(
+            factory_field(FakeTable('test_table')))
+
+    def test_should_return_result_of_action(self):
+        future = self.executor.submit(self.statement)
+
+        self.assertIs(self.rows,
+                      future.get(5))
+        self.assertTrue(future.ready())
+        self.assertTrue(future.successful())
+        self.dal.execute.assert_called_once_with(self.statement)
+
+    def test_should_return_dataframe_without_action(self):
+        future = self.executor.submit(self.statement, action=None)
+
+        self.assertIs(self.df, future.get(5))
+
+    def test_should_run_in_own_job_group(self):
+        future = self.executor.submit(self.statement)
+        future.get(5)
+
+        self.sc.setJobGroup.assert_called_once_with(
+            future.job_group, 'MicroDrill query on test_table')
+
+    def test_should_run_in_different_job_groups(self):
+        future1 = self.executor.submit(self.statement)
+        future2 = self.executor.submit(self.statement)
+
+        self.assertNotEqual(future1.job_group, future2.job_group)
+
+    def test_should_set_and_reset_scheduler_pool(self):
+        self.executor.submit(self.statement,
+                             scheduler_pool='dashboards').get(5)
+
+        self.assertEqual(
+            [call('spark.scheduler.pool', 'dashboards'),
+             call('spark.scheduler.pool', None)],
+            self.sc.setLocalProperty.call_args_list
+        )
+
+    def test_should_clear_job_group_after_query(self):
+        self.executor.submit(self.statement).get(5)
+
+        self.sc._jsc.clearJobGroup.assert_called_once_with()
+
+    def test_should_clear_job_group_after_failed_query(self):
+        self.dal.execute.side_effect = ValueError
+
+        self.assertRaises(ValueError, self.executor.submit(self.statement).get,
+                          5)
+        self.sc._jsc.clearJobGroup.assert_called_once_with()
+
+    def test_should_raise_error_of_query_on_get(self):
+        self.dal.execute.side_effect = ValueError
+
+        future = self.executor.submit(self.statement)
+
+        self.assertRaises(ValueError, future.get, 5)
+        self.assertFalse(future.successful())
+
+    def test_should_call_callback_with_result(self):
+        done = threading.Event()
+        results = []
+
+        def callback(result):
+            results.append(result)
+            done.set()
+
+        self.executor.submit(self.statement, callback=callback)
+        done.wait(5)
+
+        self.assertEqual([self.rows],
+                         results)
+
+    def test_should_execute_statement_async_through_dal(self):
+        self.statement.execute_async(action='count')
+
+        self.dal.execute_async.assert_called_once_with(self.statement,
+                                                       action='count')
+
+    def tearDown(self):
+        self.executor.close()
@@ -0,0 +1,46 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from unittest import TestCase
+
+from microdrill.dal.explain import Explanation, TableScan, pushed_filters
+
+
+class TestPushedFilters(TestCase):
+
+    def test_should_return_filters_of_scans(self):
+        plan = ("Project [A#0L]\n"
+                "+- Filter (B#1L = 2)\n"
+                "   +- Scan ParquetRelation[A#0L,B#1L] InputPaths: file:/t, "
+                "PushedFilters: [EqualTo(B,2), GreaterThan(A,1)]")
+
+        self.assertEqual(['EqualTo(B,2)', 'GreaterThan(A,1)'],
+                         pushed_filters(plan))
+
+    def test_should_return_no_filters(self):
+        self.assertEqual([], pushed_filters(
+            "Scan ParquetRelation[A#0L] PushedFilters: []"))
+        self.assertEqual([], pushed_filters("LocalTableScan [A#0L]"))
+
+
+class TestExplanation(TestCase):
+
+    def setUp(self):
+        self.explanation = Explanation(
+            "SELECT `t`.`A` FROM t", "logical", "physical", None, [], [
+                TableScan('t', ['/t/*'], ['/t/a', '/t/b'], ['/t/c'], 30, 10,
+                          ['A']),
+                TableScan('u', ['/u/*'], ['/u/a'], [], 5, 5, None),
+            ])
+
+    def test_should_sum_bytes_of_scans(self):
+        self.assertEqual(35, self.explanation.bytes)
+        self.assertEqual(15, self.explanation.estimated_bytes)
+
+    def test_should_describe_scans(self):
+        text = str(self.explanation)
+
+        self.assertIn("Scan t: 2 files, 1 pruned, 30 bytes, 10 estimated, "
+                      "columns A", text)
+        self.assertIn("Scan u: 1 files, 0 pruned, 5 bytes, 5 estimated, "
+                      "columns *", text)
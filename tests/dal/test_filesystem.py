@@ -0,0 +1,87 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from microdrill.dal.filesystem import FileSystem
+
+
+class TestFileSystem(TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filesystem = FileSystem(None)
+        self._touch('part-0.parquet', 'a')
+        self._touch('dt=2016-03-10/part-1.parquet', 'abc')
+        self._touch('dt=2016-03-10/_SUCCESS')
+        self._touch('_metadata')
+        self._touch('.part-0.parquet.crc')
+
+    def _touch(self, name, content=''):
+        path = os.path.join(self.dirname, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def test_should_recognize_local_paths(self):
+        self.assertTrue(FileSystem.is_local('/tmp/table'))
+        self.assertTrue(FileSystem.is_local('file:///tmp/table'))
+        self.assertFalse(FileSystem.is_local('hdfs://namenode/table'))
+
+    def test_should_walk_directories_ignoring_hidden_files(self):
+        files = self.filesystem.files(os.path.join(self.dirname, '*'))
+
+        self.assertEqual(
+            [os.path.join(self.dirname, 'dt=2016-03-10', 'part-1.parquet'),
+             os.path.join(self.dirname, 'part-0.parquet')],
+            [status.path for status in files]
+        )
+
+    def test_should_return_file_sizes(self):
+        files = self.filesystem.files(os.path.join(self.dirname, '*'))
+
+        self.assertEqual([3, 1], [status.size for status in files])
+
+    def test_should_accept_file_scheme(self):
+        files = self.filesystem.files('file://%s/part-0.parquet' %
+                                      self.dirname)
+
+        self.assertEqual(1, len(files))
+
+    def test_should_return_empty_list_when_nothing_matches(self):
+        files = self.filesystem.files(os.path.join(self.dirname, 'missing'))
+
+        self.assertEqual([], files)
+
+    def test_should_return_paths_matched_without_walking_them(self):
+        paths = self.filesystem.glob(os.path.join(self.dirname, '*'))
+
+        self.assertEqual([os.path.join(self.dirname, 'dt=2016-03-10'),
+                          os.path.join(self.dirname, 'part-0.parquet')],
+                         paths)
+
+    def test_should_list_directories(self):
+        directories = self.filesystem.directories(self.dirname)
+
+        self.assertEqual([self.dirname + '/dt=2016-03-10'], directories)
+
+    def test_should_delete_directory(self):
+        path = os.path.join(self.dirname, 'dt=2016-03-10')
+        self.filesystem.delete(path)
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_should_rename_path(self):
+        source = os.path.join(self.dirname, 'part-0.parquet')
+        destination = os.path.join(self.dirname, 'part-2.parquet')
+        self.filesystem.rename(source, destination)
+
+        self.assertFalse(os.path.exists(source))
+        self.assertTrue(os.path.exists(destination))
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
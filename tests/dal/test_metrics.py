@@ -0,0 +1,64 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from unittest import TestCase
+
+from microdrill.dal.metrics import QueryEvent, QueryMetrics
+
+
+def event(phase, duration):
+    return QueryEvent(phase, duration, "SELECT 1", [], None, None)
+
+
+class TestQueryMetrics(TestCase):
+
+    def setUp(self):
+        self.metrics = QueryMetrics()
+        for duration in range(1, 101):
+            self.metrics(event('execute', duration / 100.0))
+
+    def test_should_count_events_by_phase(self):
+        self.metrics(event('listing', 0.5))
+
+        self.assertEqual(100, self.metrics.count('execute'))
+        self.assertEqual(1, self.metrics.count('listing'))
+        self.assertEqual(0, self.metrics.count('read'))
+
+    def test_should_return_nearest_rank_percentiles(self):
+        self.assertEqual(0.5, self.metrics.percentile('execute', 50))
+        self.assertEqual(0.99, self.metrics.percentile('execute', 99))
+        self.assertEqual(1.0, self.metrics.percentile('execute', 100))
+        self.assertEqual(0.01, self.metrics.percentile('execute', 0))
+
+    def test_should_return_none_percentile_without_events(self):
+        self.assertIsNone(self.metrics.percentile('read', 50))
+
+    def test_should_keep_only_last_durations(self):
+        metrics = QueryMetrics(size=2)
+        for duration in (3, 1, 2):
+            metrics(event('execute', duration))
+
+        self.assertEqual(2, metrics.percentile('execute', 100))
+        self.assertEqual(3, metrics.count('execute'))
+
+    def test_should_summarize_phases(self):
+        summary = self.metrics.summary()
+
+        self.assertEqual(['execute'], summary.keys())
+        self.assertEqual(100, summary['execute']['count'])
+        self.assertAlmostEqual(0.505, summary['execute']['mean'])
+        self.assertEqual(1.0, summary['execute']['max'])
+        self.assertEqual(0.9, summary['execute']['p90'])
+
+    def test_should_sort_phases_in_query_order(self):
+        self.metrics(event('custom', 1))
+        self.metrics(event('listing', 1))
+
+        self.assertEqual(['listing', 'execute', 'custom'],
+                         self.metrics.phases)
+
+    def test_should_reset(self):
+        self.metrics.reset()
+
+        self.assertEqual(0, self.metrics.count('execute'))
+        self.assertEqual({}, self.metrics.summary())
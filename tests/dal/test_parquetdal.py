@@ -3,15 +3,25 @@
 
 import os
 import shutil
+import tempfile
+import warnings
 from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 from unittest import TestCase
 
 import pandas as pd
 from mock import patch
 from pyspark import SparkContext
 from pyspark.sql import dataframe
+from pyspark.sql.readwriter import DataFrameWriter
 
+from microdrill.catalog import SchemaCatalog
+from microdrill.dal.cache import ResultCache
 from microdrill.dal.parquet import ParquetDAL
+from microdrill.incremental import AggregateState
+from microdrill.manifest import FileManifest
+from microdrill.query import Param
+from microdrill.statistics import StatisticsIndex
 from microdrill.table import ParquetTable
 
 
@@ -91,15 +101,993 @@ class TestParquetDal(TestCase):
         self.assertDictEqual({'A': 1, 'B': 2, 'C': 3},
                              result.head().asDict())
 
-    def test_should_reset_query_when_execute(self):
+    def test_should_execute_statement_passed_to_dal(self):
         table = ParquetTable(self.table_name, schema_index_file=self.filename)
         self.dal.set_table(table)
 
-        self.dal.select(table('A'), table('B'), table('C'))
-        query_select = self.dal._query['select']
-        self.dal.execute()
+        result = self.dal.execute(self.dal.select(table('A')))
 
-        self.assertNotEqual(id(query_select), id(self.dal._query.get('select')))
+        self.assertEqual({'A': 1}, result.head().asDict())
+
+    def test_should_execute_statements_from_many_threads(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        statements = [self.dal.select(table(name)) for name in 'ABC' * 4]
+        pool = ThreadPool(4)
+
+        results = pool.map(lambda statement: statement.execute().head(),
+                           statements)
+        pool.close()
+        pool.join()
+
+        self.assertEqual([1, 2, 3] * 4, [row[0] for row in results])
+
+    def test_should_read_only_columns_used_by_query(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        signature, df = self.dal._dataframe(table.name, None, ['A', 'C'])
+
+        self.assertEqual(['A', 'C'], df.columns)
+
+    def test_should_execute_query_reading_only_used_columns(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        with patch.object(ParquetDAL, '_dataframe',
+                          wraps=self.dal._dataframe) as mock_dataframe:
+            result = self.dal.select(table('A')).where(
+                table('C') == 3).execute()
+
+        self.assertEqual(['A', 'C'], mock_dataframe.call_args[0][2])
+        self.assertEqual({'A': 1}, result.head().asDict())
+
+    def test_should_warn_selecting_all_columns_of_wide_table(self):
+        self.dal.wide_table_columns = 2
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            result = self.dal.select().where(table('A') == 1).execute()
+
+        self.assertEqual(1, len(caught))
+        self.assertEqual(3, len(result.columns))
+
+    def test_should_refuse_selecting_all_columns_of_wide_table(self):
+        self.dal.wide_table_columns = 2
+        self.dal.refuse_wide_select = True
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        self.assertRaises(ValueError,
+                          self.dal.select().where(table('A') == 1).execute)
+
+    def test_should_execute_prepared_statement(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        prepared = self.dal.prepare(
+            self.dal.select(table('A')).where(table('C') == Param('c')))
+
+        self.assertEqual([1], [row.A for row in
+                               prepared.execute(c=3).collect()])
+        self.assertEqual([], prepared.execute(c=4).collect())
+        self.assertIs(prepared.execute(c=3), prepared.execute(c=3))
+
+    def test_should_list_files_of_prepared_statement_once(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        events = []
+        self.dal.hooks = [events.append]
+        prepared = self.dal.prepare(
+            self.dal.select(table('A')).where(table('C') == Param('c')))
+
+        prepared.execute(c=3)
+        with patch.object(ParquetDAL, '_scan_paths',
+                          wraps=self.dal._scan_paths) as mock_scan:
+            prepared.execute(c=3)
+            self.dal.invalidate(self.table_name)
+            prepared.execute(c=3)
+
+        self.assertEqual(1, mock_scan.call_count)
+        self.assertEqual(3, [event.phase for event in events].count(
+            'execute'))
+
+    def test_should_filter_by_in_values(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        result = self.dal.select(table('A')).where(
+            table('C').isin([2, 3])).execute()
+
+        self.assertEqual([1], [row.A for row in result.collect()])
+
+    def test_should_semi_join_many_in_values(self):
+        self.dal.isin_broadcast_size = 2
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        statement = self.dal.select(table('A')).where(
+            table('C').isin([2, 3, 4]), table('B') == 2)
+
+        joined, dataframes = self.dal._semi_join(
+            statement, self.dal._dataframes(statement))
+
+        self.assertNotIn(" IN ", joined.query)
+        self.assertEqual([1], [row.A for row in
+                               self.dal.execute(statement).collect()])
+        self.assertEqual([], self.dal.select(table('A')).where(
+            table('C').isin([4, 5, 6])).execute().collect())
+
+    def test_should_join_tables(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        other = self._partitioned_table()
+        self.dal.set_table(table)
+
+        inner = self.dal.select(table('C'), other('dt')).join(
+            other, table('A') == other('A')).execute()
+        left = self.dal.select(other('A'), table('C')).join(
+            table, other('A') == table('A'), how='left').order_by(
+            other('A')).execute()
+        semi = self.dal.select(other('dt')).join(
+            table, other('A') == table('A'), how='semi').execute()
+
+        self.assertEqual([(3, '2016-03-10')], [tuple(row) for row
+                                               in inner.collect()])
+        self.assertEqual([(1, 3), (2, None), (3, None)],
+                         [tuple(row) for row in left.collect()])
+        self.assertEqual(['2016-03-10'], [row.dt for row in semi.collect()])
+
+    def test_should_broadcast_small_joined_tables(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        other = self._partitioned_table()
+        self.dal.set_table(table)
+        statement = self.dal.select(table('C')).join(
+            other, table('A') == other('A'))
+        dataframes = self.dal._dataframes(statement)
+
+        self.assertEqual(set(['partitioned_table']),
+                         self.dal._broadcast_tables(statement, dataframes))
+        self.dal.broadcast_join_bytes = 0
+        self.assertEqual(set(),
+                         self.dal._broadcast_tables(statement, dataframes))
+
+    def test_should_scale_aggregates_of_sampled_files(self):
+        for _ in range(7):
+            self.spark_df.write.mode('append').parquet(self.full_path_file)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        sampled = self.dal.context.read.parquet(
+            *self.dal._scan_paths(table.name, None, (0.5, 0, None))).count()
+
+        row = self.dal.select(table('A').count, table('C').sum,
+                              table('C').max).sample(
+            0.5, confidence=0.95).execute().head()
+
+        self.assertEqual(['_c0', '_c0_error', '_c1', '_c2'], row.__fields__)
+        self.assertEqual(sampled * 2, row._c0)
+        self.assertEqual(sampled * 6, row._c1)
+        self.assertEqual(3, row._c2)
+        self.assertTrue(row._c0_error > 0)
+
+    def test_should_raise_error_sampling_many_tables(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        other = self._partitioned_table()
+        self.dal.set_table(table)
+
+        self.assertRaises(ValueError, self.dal.select(table('C')).join(
+            other, table('A') == other('A')).sample(0.5).execute)
+
+    def test_should_read_materialized_rollup(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        table.add_rollup('by_b', [table('B')],
+                         [table('A').avg, table('C').sum])
+        table.add_rollup('total', [], [table('C').sum])
+        statement = self.dal.select(table('B'), table('A').avg,
+                                    table('C').sum).group_by(table('B'))
+        expected = statement.execute().collect()
+
+        self.dal.materialize(table.name)
+        routed, dataframes = self.dal._plan(statement)
+
+        self.assertIn('sum__A', routed.query)
+        self.assertEqual(expected, statement.execute().collect())
+        self.assertEqual([(3, )], [tuple(row) for row in self.dal.select(
+            table('C').sum).execute().collect()])
+        shutil.rmtree(os.path.join(self.dirname, self.table_name + '__by_b'))
+        shutil.rmtree(os.path.join(self.dirname, self.table_name + '__total'))
+
+    def test_should_not_read_rollup_after_files_change(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        table.add_rollup('by_b', [table('B')], [table('C').sum])
+        statement = self.dal.select(table('B'), table('C').sum).group_by(
+            table('B'))
+        self.dal.materialize(table.name)
+        self.spark_df.write.mode('append').parquet(self.full_path_file)
+        self.dal.refresh(table.name)
+
+        routed, dataframes = self.dal._plan(statement)
+
+        self.assertIs(statement, routed)
+        self.assertEqual([(2, 6)], [tuple(row) for row in
+                                    statement.execute().collect()])
+        shutil.rmtree(os.path.join(self.dirname, self.table_name + '__by_b'))
+
+    def test_should_list_files_of_routed_table_once(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        table.add_rollup('by_b', [table('B')], [table('C').sum])
+        statement = self.dal.select(table('B'), table('C').sum).group_by(
+            table('B'))
+        self.dal.materialize(table.name)
+
+        with patch.object(ParquetDAL, '_table_listing',
+                          wraps=self.dal._table_listing) as mock_listing:
+            first, dataframes = self.dal._plan(statement)
+            second, dataframes = self.dal._plan(statement)
+
+        self.assertIn('sum__C', first.query)
+        self.assertEqual(first.query, second.query)
+        self.assertFalse(mock_listing.called)
+        shutil.rmtree(os.path.join(self.dirname, self.table_name + '__by_b'))
+
+    def test_should_execute_aggregation_incrementally(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        state = AggregateState(os.path.join(self.full_path_file,
+                                            '_state.json'))
+        statement = self.dal.select(table('B'), table('A').count,
+                                    table('C').avg, table('C').max).where(
+            table('A') > 0).group_by(table('B'))
+
+        first = self.dal.execute_incremental(statement, state)
+        folded = set(status.path for status in
+                     self.dal._filesystem.files(self.full_path_file))
+        self.spark_df.write.mode('append').parquet(self.full_path_file)
+        new_files = set(status.path for status in
+                        self.dal._filesystem.files(self.full_path_file))
+        new_files -= folded
+        with patch.object(ParquetDAL, '_read',
+                          wraps=self.dal._read) as mock_read:
+            second = self.dal.execute_incremental(statement, state)
+        paths = mock_read.call_args[0][1]
+
+        self.assertEqual(statement.execute().columns, second.columns)
+        self.assertEqual([(2, 1, 3.0, 3)], [tuple(row) for row in
+                                            first.collect()])
+        self.assertEqual([tuple(row) for row in statement.execute().collect()],
+                         [tuple(row) for row in second.collect()])
+        self.assertEqual(new_files, set(paths))
+
+    def test_should_raise_error_executing_incrementally_with_order(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        state = AggregateState(os.path.join(self.full_path_file,
+                                            '_state.json'))
+
+        self.assertRaises(ValueError, self.dal.execute_incremental,
+                          self.dal.select(table('A').sum).order_by(
+                              table('A')), state)
+
+    def test_should_raise_error_executing_incrementally_no_aggregates(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        state = AggregateState(os.path.join(self.full_path_file,
+                                            '_state.json'))
+
+        self.assertRaises(ValueError, self.dal.execute_incremental,
+                          self.dal.select(table('A')).group_by(table('A')),
+                          state)
+
+    def test_should_raise_error_executing_incrementally_unbound_params(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        state = AggregateState(os.path.join(self.full_path_file,
+                                            '_state.json'))
+
+        self.assertRaises(ValueError, self.dal.execute_incremental,
+                          self.dal.select(table('A').sum).where(
+                              table('C') == Param('c')), state)
+
+    def test_should_raise_error_executing_unbound_params(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        self.assertRaises(ValueError, self.dal.select(table('A')).where(
+            table('C') == Param('c')).execute)
+
+    def test_should_iterate_rows(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        rows = self.dal.iterate(self.dal.select(table('A'), table('B')))
+
+        self.assertEqual([{'A': 1, 'B': 2}], [row.asDict() for row in rows])
+
+    def test_should_iterate_rows_in_batches(self):
+        self.spark_df.write.mode('append').parquet(self.full_path_file)
+        self.spark_df.write.mode('append').parquet(self.full_path_file)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        batches = list(self.dal.iterate(self.dal.select(table('A')),
+                                        batch_size=2))
+
+        self.assertEqual([2, 1], [len(batch) for batch in batches])
+
+    def test_should_not_compute_rows_before_iterating(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        with patch.object(ParquetDAL, 'execute') as mock_execute:
+            rows = self.dal.iterate(self.dal.select(table('A')))
+            self.assertFalse(mock_execute.called)
+            list(rows)
+        self.assertTrue(mock_execute.called)
+
+    def test_should_stream_rows_as_json_lines(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        chunks = self.dal.stream(self.dal.select(table('A'), table('C')))
+
+        self.assertEqual(['{"A": 1, "C": 3}\n'], list(chunks))
+
+    def test_should_stream_rows_with_serializer(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        chunks = self.dal.stream(self.dal.select(table('A'), table('C')),
+                                 serializer=lambda row: '%s,%s' % row)
+
+        self.assertEqual(['1,3\n'], list(chunks))
+
+    def test_should_send_phases_of_query_to_hooks(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        events = []
+        self.dal.hooks = [events.append]
+        statement = self.dal.select(table('A')).where(table('B') == 2)
+
+        self.dal._action(statement, self.dal.execute(statement), 'collect')
+
+        self.assertEqual(['compile', 'listing', 'read', 'register',
+                          'planning', 'execute', 'execution'],
+                         [event.phase for event in events])
+        self.assertEqual(set([statement.query]),
+                         set(event.query for event in events))
+        self.assertEqual([self.table_name], events[0].tables)
+        self.assertEqual(sum(os.path.getsize(os.path.join(
+            self.full_path_file, name)) for name in os.listdir(
+            self.full_path_file) if name[0] not in '._'), events[1].bytes)
+        self.assertEqual(1, events[-1].rows)
+
+    def test_should_send_rows_iterated_to_hooks(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        events = []
+        self.dal.hooks = [events.append]
+
+        list(self.dal.iterate(self.dal.select(table('A'))))
+
+        self.assertEqual(('execution', 1),
+                         (events[-1].phase, events[-1].rows))
+
+    def test_should_execute_many_statements(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        statements = [self.dal.select(table('A')).where(table('B') == 2),
+                      self.dal.select(table('B')).where(table('A') == 2),
+                      self.dal.select(table('C').sum)]
+
+        results = self.dal.execute_many(statements)
+
+        self.assertEqual([[1], [], [3]],
+                         [[row[0] for row in rows] for rows in results])
+
+    def test_should_raise_error_executing_many_unbound_params(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        statements = [self.dal.select(table('A')).where(table('B') == 2),
+                      self.dal.select(table('B')).where(
+                          table('A') == Param('a'))]
+
+        self.assertRaises(ValueError, self.dal.execute_many, statements)
+
+    def test_should_scan_table_once_for_many_statements(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        statements = [self.dal.select(table('A')).where(table('B') == 2),
+                      self.dal.select(table('B')).where(table('C') == 3)]
+
+        with patch.object(ParquetDAL, '_shared_scan',
+                          wraps=self.dal._shared_scan) as mock_scan:
+            self.dal.execute_many(statements)
+
+        self.assertEqual(1, mock_scan.call_count)
+
+    def test_should_return_dataframes_of_many_statements_without_action(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        statements = [self.dal.select(table('A')), self.dal.select(table('B'))]
+
+        results = self.dal.execute_many(statements, action=None)
+
+        self.assertIsInstance(results[0], dataframe.DataFrame)
+        self.assertEqual({'B': 2}, results[1].head().asDict())
+
+    def test_should_execute_statements_async(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        futures = [self.dal.execute_async(self.dal.select(table(name)))
+                   for name in 'ABC']
+
+        self.assertEqual([[1], [2], [3]],
+                         [[row[0] for row in future.get(60)]
+                          for future in futures])
+        self.dal.close()
+
+    @patch('microdrill.dal.parquet.SQLContext.sql')
+    @patch('microdrill.dal.parquet.SQLContext.read')
+    def test_should_register_table_once_for_multiple_fields(self, mock_df,
+                                                            mock_sql):
+        dal = ParquetDAL(self.dirname, self.sc)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        dal.set_table(table)
+        mock_df.reset_mock()
+
+        dal.select(table('A'), table('B'), table('C')).execute()
+
+        self.assertEqual(1, mock_df.parquet.call_count)
+
+    @patch('microdrill.dal.parquet.SQLContext.read')
+    def test_should_reuse_registered_table_between_executes(self, mock_df):
+        dal = ParquetDAL(self.dirname, self.sc)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        dal.set_table(table)
+        mock_df.reset_mock()
+
+        dal.register(table.name)
+        dal.register(table.name)
+
+        self.assertEqual(1, mock_df.parquet.call_count)
+
+    @patch('microdrill.dal.parquet.SQLContext.read')
+    def test_should_register_again_when_files_config_changes(self, mock_df):
+        dal = ParquetDAL(self.dirname, self.sc)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        dal.set_table(table)
+        mock_df.reset_mock()
+
+        dal.register(table.name)
+        dal.configure(table.name, files=['*'])
+        dal.register(table.name)
+
+        self.assertEqual(2, mock_df.parquet.call_count)
+
+    @patch('microdrill.dal.parquet.SQLContext.read')
+    def test_should_register_again_when_files_listing_changes(self, mock_df):
+        dal = ParquetDAL(self.dirname, self.sc)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        dal.set_table(table)
+        mock_df.reset_mock()
+
+        dal.register(table.name)
+        self.spark_df.write.mode('append').parquet(self.full_path_file)
+        dal.register(table.name)
+
+        self.assertEqual(2, mock_df.parquet.call_count)
+
+    @patch('microdrill.dal.parquet.SQLContext.read')
+    def test_should_register_again_after_invalidate(self, mock_df):
+        dal = ParquetDAL(self.dirname, self.sc)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        dal.set_table(table)
+        mock_df.reset_mock()
+
+        dal.register(table.name)
+        dal.invalidate(table.name)
+        dal.register(table.name)
+
+        self.assertEqual(2, mock_df.parquet.call_count)
+
+    def test_should_get_schema_from_parquet_with_catalog(self):
+        catalog_dir = tempfile.mkdtemp()
+        self.dal.catalog = SchemaCatalog(os.path.join(catalog_dir, 'c.json'))
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        self.assertEqual(table.schema(), self.dataframe.keys())
+        shutil.rmtree(catalog_dir)
+
+    def test_should_not_read_parquet_for_schema_found_in_catalog(self):
+        catalog_dir = tempfile.mkdtemp()
+        catalog = SchemaCatalog(os.path.join(catalog_dir, 'c.json'))
+        self.dal.catalog = catalog
+        self.dal.set_table(ParquetTable(self.table_name,
+                                        schema_index_file=self.filename))
+
+        with patch('microdrill.dal.parquet.SQLContext.read') as mock_df:
+            dal = ParquetDAL(self.dirname, self.sc)
+            dal.catalog = SchemaCatalog(catalog.filename)
+            table = ParquetTable(self.table_name,
+                                 schema_index_file=self.filename)
+            dal.set_table(table)
+
+            self.assertFalse(mock_df.parquet.called)
+            self.assertFalse(mock_df.option.called)
+        self.assertEqual(table.schema(), self.dataframe.keys())
+        shutil.rmtree(catalog_dir)
+
+    def test_should_merge_schema_of_new_files_into_catalog(self):
+        catalog_dir = tempfile.mkdtemp()
+        self.dal.catalog = SchemaCatalog(os.path.join(catalog_dir, 'c.json'))
+        self.dal.set_table(ParquetTable(self.table_name,
+                                        schema_index_file=self.filename))
+        new_df = self.dal.context.createDataFrame(pd.DataFrame({'D': [4]}),
+                                                  ['D'])
+        new_df.write.mode('append').parquet(self.full_path_file)
+
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        self.assertEqual(table.schema(), self.dataframe.keys() + ['D'])
+        shutil.rmtree(catalog_dir)
+
+    @patch('microdrill.dal.parquet.SQLContext.read')
+    def test_should_not_connect_for_schema_in_lazy_mode(self, mock_df):
+        dal = ParquetDAL(self.dirname, self.sc)
+        dal.lazy = True
+        dal.set_table(ParquetTable(self.table_name,
+                                   schema_index_file=self.filename))
+
+        self.assertFalse(mock_df.parquet.called)
+
+    def test_should_connect_for_schema_on_first_field_in_lazy_mode(self):
+        self.dal.lazy = True
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        result = self.dal.select(self.dal(self.table_name)('A')).execute()
+
+        self.assertEqual({'A': 1}, result.head().asDict())
+
+    def test_should_keep_files_configured_before_first_field_in_lazy_mode(
+            self):
+        other_path = os.path.join(self.dirname, self.table_name,
+                                  'other.parquet')
+        df = self.dal.context.createDataFrame(
+            pd.DataFrame(OrderedDict([('A', [7]), ('B', [8]), ('C', [9])])),
+            ['A', 'B', 'C'])
+        df.write.parquet(other_path)
+        self.dal.lazy = True
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        self.dal.configure(self.table_name, files=['other.parquet'])
+
+        result = self.dal.select(table('A')).execute().collect()
+
+        self.assertEqual(['other.parquet'], table.config['files'])
+        self.assertEqual([7], [row.A for row in result])
+        shutil.rmtree(other_path)
+
+    def test_should_set_multiple_tables_concurrently(self):
+        tables = [ParquetTable('table_%s' % index,
+                               schema_index_file=self.filename)
+                  for index in range(3)]
+
+        with patch.object(ParquetDAL, '_paths',
+                          return_value=[self.full_path_file]):
+            self.dal.set_tables(tables, workers=3)
+
+        for table in tables:
+            self.assertIsNone(table.loader)
+            self.assertEqual(table.schema(), self.dataframe.keys())
+
+    def test_should_prune_partitions_from_where(self):
+        table = self._partitioned_table()
+
+        paths = self.dal._scan_paths(
+            table.name, (table('dt') == '2016-03-10').predicate)
+
+        self.assertEqual(['%s/%s/dt=2016-03-10' % (self.dirname, table.name)],
+                         paths)
+
+    def test_should_prune_partitions_from_or_predicates(self):
+        table = self._partitioned_table()
+
+        paths = self.dal._scan_paths(
+            table.name, ((table('dt') == '2016-03-10') |
+                         (table('dt') > '2016-03-11')).predicate)
+
+        self.assertEqual(['%s/%s/dt=2016-03-10' % (self.dirname, table.name),
+                          '%s/%s/dt=2016-03-12' % (self.dirname, table.name)],
+                         paths)
+
+    def test_should_not_prune_partitions_for_other_fields(self):
+        table = self._partitioned_table()
+
+        paths = self.dal._scan_paths(table.name, (table('A') == 1).predicate)
+
+        self.assertEqual(3, len(paths))
+
+    def test_should_execute_query_in_pruned_partitions(self):
+        table = self._partitioned_table()
+
+        result = self.dal.select(table('A'), table('dt')).where(
+            table('dt') >= '2016-03-11').order_by(table('A')).execute()
+
+        self.assertEqual([{'A': 2, 'dt': '2016-03-11'},
+                          {'A': 3, 'dt': '2016-03-12'}],
+                         [row.asDict() for row in result.collect()])
+
+    def test_should_execute_query_without_matching_partitions(self):
+        table = self._partitioned_table()
+
+        result = self.dal.select(table('A')).where(
+            table('dt') == '2017-01-01').execute()
+
+        self.assertEqual(0, result.count())
+
+    def test_should_skip_files_using_statistics(self):
+        statistics_dir = tempfile.mkdtemp()
+        self.dal.statistics = StatisticsIndex(
+            os.path.join(statistics_dir, 'statistics.json'))
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        matched = self.dal._scan_paths(table.name, (table('A') == 1).predicate)
+        skipped = self.dal._scan_paths(table.name, (table('A') == 5).predicate)
+
+        self.assertEqual(1, len([path for path in matched
+                                 if path.endswith('.parquet')]))
+        self.assertEqual([], skipped)
+        shutil.rmtree(statistics_dir)
+
+    def test_should_execute_query_skipping_files_using_statistics(self):
+        statistics_dir = tempfile.mkdtemp()
+        self.dal.statistics = StatisticsIndex(
+            os.path.join(statistics_dir, 'statistics.json'))
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        result = self.dal.select(table('A')).where(table('A') == 5).execute()
+
+        self.assertEqual(0, result.count())
+        shutil.rmtree(statistics_dir)
+
+    def test_should_read_files_listed_in_manifest(self):
+        manifest_dir = tempfile.mkdtemp()
+        self.dal.manifest = FileManifest(
+            os.path.join(manifest_dir, 'manifest.json'))
+        table = self._partitioned_table()
+
+        paths = self.dal._scan_paths(table.name,
+                                     (table('dt') == '2016-03-10').predicate)
+        result = self.dal.select(table('A')).where(
+            table('dt') == '2016-03-10').execute()
+
+        self.assertTrue(paths)
+        self.assertTrue(all(path.endswith('.parquet') and
+                            'dt=2016-03-10' in path for path in paths))
+        self.assertEqual([1], [row.A for row in result.collect()])
+        entry = self.dal.manifest.get(self.partitioned_path)
+        self.assertEqual({'dt': '2016-03-10'}, entry[
+            '%s/dt=2016-03-10' % self.partitioned_path]['values'])
+        shutil.rmtree(manifest_dir)
+
+    def test_should_list_only_new_partitions_until_refresh(self):
+        manifest_dir = tempfile.mkdtemp()
+        self.dal.manifest = FileManifest(
+            os.path.join(manifest_dir, 'manifest.json'))
+        table = self._partitioned_table()
+        self.dal.select(table('A')).execute()
+        data = OrderedDict([('A', [4, 5]),
+                            ('dt', ['2016-03-12', '2016-03-13'])])
+        df = self.dal.context.createDataFrame(pd.DataFrame(data), data.keys())
+        df.write.mode('append').partitionBy('dt').parquet(
+            self.partitioned_path)
+
+        listed = self.dal.select(table('A')).execute().collect()
+        self.dal.refresh(table.name)
+        refreshed = self.dal.select(table('A')).execute().collect()
+
+        self.assertEqual([1, 2, 3, 5], sorted(row.A for row in listed))
+        self.assertEqual([1, 2, 3, 4, 5], sorted(row.A for row in refreshed))
+        shutil.rmtree(manifest_dir)
+
+    def test_should_compact_partition_into_one_file(self):
+        self._manifest()
+        table = self._partitioned_table()
+        data = OrderedDict([('A', [4, 5]),
+                            ('dt', ['2016-03-10', '2016-03-11'])])
+        df = self.dal.context.createDataFrame(pd.DataFrame(data), data.keys())
+        df.write.mode('append').partitionBy('dt').parquet(
+            self.partitioned_path)
+        partition = '%s/dt=2016-03-10' % self.partitioned_path
+        old_files = self.dal._filesystem.files(partition)
+        other_files = self.dal._filesystem.files(
+            '%s/dt=2016-03-11' % self.partitioned_path)
+        names = sorted(os.listdir(self.partitioned_path))
+
+        compacted = self.dal.compact(table.name, where=(
+            table('dt') == '2016-03-10'))
+
+        self.assertEqual([partition], compacted)
+        files = self.dal._scan_paths(table.name, (
+            table('dt') == '2016-03-10').predicate)
+        self.assertEqual(1, len(files))
+        self.assertTrue(files[0].startswith(partition + '/part-'))
+        self.assertEqual(other_files, self.dal._filesystem.files(
+            '%s/dt=2016-03-11' % self.partitioned_path))
+        self.assertEqual(names, sorted(os.listdir(self.partitioned_path)))
+        result = self.dal.select(table('A'), table('dt')).execute().collect()
+        self.assertEqual([(1, '2016-03-10'), (2, '2016-03-11'),
+                          (3, '2016-03-12'), (4, '2016-03-10'),
+                          (5, '2016-03-11')],
+                         sorted((row.A, row.dt) for row in result))
+        self.assertTrue(all(os.path.exists(status.path)
+                            for status in old_files))
+
+    def test_should_keep_files_written_while_compacting(self):
+        self._manifest()
+        table = self._partitioned_table()
+        partition = '%s/dt=2016-03-10' % self.partitioned_path
+        new_df = self.dal.context.createDataFrame(
+            pd.DataFrame(OrderedDict([('A', [6])])), ['A'])
+        write = DataFrameWriter.parquet
+        appended = []
+
+        def write_and_append(writer, path, *args, **kwargs):
+            write(writer, path, *args, **kwargs)
+            if not appended:
+                appended.append(path)
+                new_df.write.mode('append').parquet(partition)
+
+        with patch.object(DataFrameWriter, 'parquet', autospec=True,
+                          side_effect=write_and_append):
+            self.dal.compact(table.name, sort_by=[table('A')],
+                             where=(table('dt') == '2016-03-10'))
+        self.dal.refresh(table.name)
+
+        self.assertTrue(appended)
+        result = self.dal.select(table('A')).where(
+            table('dt') == '2016-03-10').execute().collect()
+        self.assertEqual([1, 6], sorted(row.A for row in result))
+
+    def test_should_not_compact_files_rewritten_while_compacting(self):
+        self._manifest()
+        table = self._partitioned_table()
+        partition = '%s/dt=2016-03-10' % self.partitioned_path
+        files = self.dal._filesystem.files(partition)
+        write = DataFrameWriter.parquet
+
+        def write_and_touch(writer, path, *args, **kwargs):
+            write(writer, path, *args, **kwargs)
+            os.utime(files[0].path, (0, 0))
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            with patch.object(DataFrameWriter, 'parquet', autospec=True,
+                              side_effect=write_and_touch):
+                compacted = self.dal.compact(
+                    table.name, sort_by=[table('A')],
+                    where=(table('dt') == '2016-03-10'))
+
+        self.assertEqual([], compacted)
+        self.assertTrue(caught)
+        self.assertEqual([status.path for status in files],
+                         [status.path for status in
+                          self.dal._filesystem.files(partition)])
+
+    def test_should_compact_table_sorted_by_fields(self):
+        self._manifest()
+        data = OrderedDict([('A', [3, 1, 2]), ('B', [2, 2, 2]),
+                            ('C', [3, 3, 3])])
+        df = self.dal.context.createDataFrame(pd.DataFrame(data), data.keys())
+        df.write.mode('append').parquet(self.full_path_file)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        compacted = self.dal.compact(table.name, sort_by=[~table('A')])
+
+        self.assertEqual([self.full_path_file], compacted)
+        paths = self.dal._scan_paths(table.name)
+        self.assertEqual(1, len(paths))
+        rows = self.dal.context.read.parquet(paths[0]).collect()
+        self.assertEqual([3, 2, 1, 1], [row.A for row in rows])
+        self.assertEqual(4, self.dal.select(table('A')).execute().count())
+
+    def test_should_compact_files_holding_ranges_of_sorted_fields(self):
+        self._manifest()
+        for values in ([7, 1, 5], [2, 8, 4], [6, 3, 9]):
+            data = OrderedDict([('A', values), ('B', [2] * 3),
+                                ('C', [3] * 3)])
+            df = self.dal.context.createDataFrame(pd.DataFrame(data),
+                                                  data.keys())
+            df.coalesce(1).write.mode('append').parquet(self.full_path_file)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        size = sum(status.size for status in
+                   self.dal._filesystem.files(self.full_path_file))
+
+        self.dal.compact(table.name, target_file_size=size / 2 + 1,
+                         sort_by=[table('A')])
+
+        ranges = []
+        for path in self.dal._scan_paths(table.name):
+            values = [row.A for row in
+                      self.dal.context.read.parquet(path).collect()]
+            self.assertEqual(sorted(values), values)
+            ranges.append((values[0], values[-1]))
+        ranges.sort()
+        self.assertEqual(2, len(ranges))
+        self.assertLess(ranges[0][1], ranges[1][0])
+
+    def test_should_not_compact_files_named_by_table_config(self):
+        self._manifest()
+        table = self._partitioned_table()
+        partition = '%s/dt=2016-03-10' % self.partitioned_path
+        self.spark_df.select('A').write.mode('append').parquet(partition)
+        schema_file = self.dal._filesystem.files(partition)[0].path
+        self.dal.configure(table.name, files=[
+            schema_file[len(self.partitioned_path) + 1:]])
+        self.spark_df.select('A').write.mode('append').parquet(partition)
+
+        self.dal.compact(table.name, where=(table('dt') == '2016-03-10'))
+
+        paths = self.dal._scan_paths(table.name, (
+            table('dt') == '2016-03-10').predicate)
+        self.assertIn(schema_file, paths)
+        self.assertEqual(2, len(paths))
+
+    def test_should_raise_error_compacting_table_configured_with_globs(self):
+        self._manifest()
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        self.dal.configure(table.name, files=['example*'])
+
+        self.assertRaises(ValueError, self.dal.compact, table.name)
+
+    def test_should_raise_error_compacting_without_manifest(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+
+        self.assertRaises(ValueError, self.dal.compact, table.name)
+
+    def test_should_purge_files_replaced_by_compaction(self):
+        self._manifest()
+        self.spark_df.write.mode('append').parquet(self.full_path_file)
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        old_paths = [status.path for status in
+                     self.dal._filesystem.files(self.full_path_file)]
+        self.dal.compact(table.name)
+
+        kept = self.dal.purge(table.name)
+        purged = self.dal.purge(table.name, age=0)
+        self.dal.refresh(table.name)
+
+        self.assertEqual([], kept)
+        self.assertEqual(sorted(old_paths), purged)
+        self.assertEqual(self.dal._scan_paths(table.name), [
+            status.path for status in
+            self.dal._filesystem.files(self.full_path_file)])
+        self.assertEqual(2, self.dal.select(table('A')).execute().count())
+
+    def test_should_not_compact_table_in_target_files(self):
+        self._manifest()
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        files = self.dal._filesystem.files(self.full_path_file)
+
+        self.dal.compact(table.name, target_file_size=1)
+
+        self.assertEqual(files, self.dal._filesystem.files(
+            self.full_path_file))
+
+    def test_should_raise_error_compacting_unknown_table(self):
+        self._manifest()
+        self.assertRaises(ValueError, self.dal.compact, 'unknown')
+
+    def test_should_return_cached_result_for_same_query(self):
+        self.dal.cache = ResultCache()
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        self.dal.select(table('A')).execute()
+
+        with patch('microdrill.dal.parquet.SQLContext.sql') as mock_sql:
+            result = self.dal.select(table('A')).execute()
+
+        self.assertFalse(mock_sql.called)
+        self.assertEqual({'A': 1}, result.head().asDict())
+
+    def test_should_not_return_cached_result_when_files_change(self):
+        self.dal.cache = ResultCache()
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        self.dal.select(table('A')).execute()
+        self.spark_df.write.mode('append').parquet(self.full_path_file)
+
+        result = self.dal.select(table('A')).execute()
+
+        self.assertEqual(2, result.count())
+
+    def test_should_explain_statement(self):
+        table = ParquetTable(self.table_name, schema_index_file=self.filename)
+        self.dal.set_table(table)
+        statement = self.dal.select(table('A')).where(table('B') == 2)
+
+        explanation = self.dal.explain(statement)
+
+        self.assertEqual(statement.query, explanation.query)
+        self.assertEqual(statement.predicate.query, explanation.predicate)
+        self.assertIn('Project', explanation.physical_plan)
+        self.assertTrue(explanation.logical_plan)
+        scan = explanation.scans[0]
+        self.assertEqual((self.table_name, ['A'], []),
+                         (scan.table, scan.columns, scan.pruned_files))
+        self.assertTrue(scan.files)
+        self.assertEqual(sum(os.path.getsize(path) for path in scan.files),
+                         scan.bytes)
+        self.assertEqual(scan.bytes / 3, scan.estimated_bytes)
+
+    def test_should_list_partitions_scanned_for_table_files(self):
+        table = self._partitioned_table()
+        self.dal.configure(table.name, files=['dt=2016-03-10'])
+        digest = self.dal._rollups.digest(table.name)
+        data = OrderedDict([('A', [4]), ('dt', ['2016-03-13'])])
+        df = self.dal.context.createDataFrame(pd.DataFrame(data), data.keys())
+        df.write.mode('append').partitionBy('dt').parquet(
+            self.partitioned_path)
+
+        listed = [status.path for files in self.dal._table_listing(table.name)
+                  for status in files]
+        scanned = [status.path for path in self.dal._scan_paths(table.name)
+                   for status in self.dal._filesystem.files(path)]
+
+        self.assertEqual(scanned, listed)
+        self.assertTrue(any('dt=2016-03-13' in path for path in listed))
+        self.assertEqual(digest, self.dal._rollups.digest(table.name))
+        self.assertNotEqual(digest, self.dal._rollups.digest(table.name,
+                                                             relist=True))
+
+    def test_should_explain_pruned_partitions(self):
+        table = self._partitioned_table()
+
+        explanation = self.dal.explain(self.dal.select(table('A')).where(
+            table('dt') == '2016-03-10'))
+
+        scan = explanation.scans[0]
+        self.assertEqual(['%s/%s/dt=2016-03-10' % (self.dirname, table.name)],
+                         scan.paths)
+        self.assertTrue(all('dt=2016-03-10' in path for path in scan.files))
+        self.assertTrue(scan.pruned_files)
+        self.assertFalse(any('dt=2016-03-10' in path
+                             for path in scan.pruned_files))
+
+    def _manifest(self):
+        manifest_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, manifest_dir)
+        self.dal.manifest = FileManifest(
+            os.path.join(manifest_dir, 'manifest.json'))
+
+    def _partitioned_table(self):
+        name = 'partitioned_table'
+        self.partitioned_path = os.path.join(self.dirname, name)
+        data = OrderedDict([
+            ('A', [1, 2, 3]),
+            ('dt', ['2016-03-10', '2016-03-11', '2016-03-12'])])
+        df = self.dal.context.createDataFrame(pd.DataFrame(data), data.keys())
+        df.write.partitionBy('dt').parquet(self.partitioned_path)
+
+        table = ParquetTable(name, partitions=['dt'])
+        self.dal.set_table(table)
+        return table
 
     def tearDown(self):
         shutil.rmtree(self.full_path_file)
+        if hasattr(self, 'partitioned_path'):
+            shutil.rmtree(self.partitioned_path)
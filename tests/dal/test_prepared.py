@@ -0,0 +1,75 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from unittest import TestCase
+
+from mock import Mock
+
+from microdrill.dal.prepared import PreparedStatement
+from microdrill.query import Param
+from microdrill.statement import Statement
+from tests.helper import FakeTable, factory_field
+
+
+class TestPreparedStatement(TestCase):
+
+    def setUp(self):
+        self.dal = Mock()
+        self.versions = {'test_table': 0}
+        self.dal._table_version.side_effect = self.versions.get
+        self.dal._execute.side_effect = lambda statement, plan, run: run(
+            *plan(statement))
+        self.dal._plan.side_effect = lambda statement: (
+            statement, [('test_table', 'files', Mock())])
+        self.dal._run.side_effect = lambda statement, dataframes: Mock()
+        self.field = factory_field(FakeTable('test_table'))
+        self.prepared = PreparedStatement(
+            self.dal,
+            Statement(self.dal).select(self.field).where(
+                self.field == Param('value')),
+            size=2
+        )
+
+    def test_should_execute_bound_statement(self):
+        self.prepared.execute(value=1)
+
+        statement = self.dal._run.call_args[0][0]
+        self.assertEqual(self.prepared.statement.bind(value=1), statement)
+
+    def test_should_execute_through_measured_path_of_dal(self):
+        self.prepared.execute(value=1)
+
+        self.assertEqual(self.prepared.statement.bind(value=1),
+                         self.dal._execute.call_args[0][0])
+
+    def test_should_reuse_plan_and_dataframe_for_same_values(self):
+        result = self.prepared.execute(value=1)
+
+        self.assertIs(result, self.prepared.execute(value=1))
+        self.assertIsNot(result, self.prepared.execute(value=2))
+        self.assertEqual(2, self.dal._plan.call_count)
+        self.assertEqual(2, self.dal._run.call_count)
+
+    def test_should_plan_again_after_table_is_invalidated(self):
+        result = self.prepared.execute(value=1)
+        self.versions['test_table'] = 1
+
+        self.assertIsNot(result, self.prepared.execute(value=1))
+        self.assertEqual(2, self.dal._plan.call_count)
+
+    def test_should_not_reuse_dataframe_of_other_plan(self):
+        statement, dataframes = self.prepared._plan(
+            'key', self.prepared.bind(value=1))
+        result = self.prepared._run('key', statement, dataframes)
+
+        self.assertIsNot(result, self.prepared._run('key', statement, []))
+
+    def test_should_keep_only_last_values(self):
+        result = self.prepared.execute(value=1)
+        self.prepared.execute(value=2)
+        self.prepared.execute(value=3)
+
+        self.assertIsNot(result, self.prepared.execute(value=1))
+
+    def test_should_raise_error_executing_without_values(self):
+        self.assertRaises(ValueError, self.prepared.execute)
@@ -1,10 +1,14 @@
 #! /usr/bin/env python
 # -*- coding: UTF-8 -*- #
 
+import warnings
 from unittest import TestCase
 
+from mock import Mock
+
 from microdrill.dal.sql import SQLDAL
 from microdrill.query import BaseQuery
+from microdrill.statement import Statement
 from tests.helper import FakeTable, factory_field
 
 
@@ -16,143 +20,213 @@ class TestSQLDAL(TestCase):
         self.field = factory_field(self.table)
 
     def test_should_return_base_query(self):
-        self.assertIsInstance(self.dal.base_query, BaseQuery)
+        self.assertIsInstance(self.dal.statement().base_query, BaseQuery)
 
-        self.dal.select(self.field)
+        query = self.dal.select(self.field)
 
-        self.assertIsInstance(self.dal.base_query, BaseQuery)
+        self.assertIsInstance(query.base_query, BaseQuery)
 
     def test_should_append_table_in_from_using_group_by(self):
         field1 = factory_field(FakeTable('test_table2'))
-        self.dal.select(self.field).group_by(field1)
+        query = self.dal.select(self.field).group_by(field1)
 
-        self.assertEqual(2, self.dal.query.count('test_table2'))
+        self.assertEqual(2, query.query.count('test_table2'))
 
     def test_should_append_table_in_from_using_where(self):
         field1 = factory_field(FakeTable('test_table2'))
-        self.dal.select(self.field).where(field1 == 2)
+        query = self.dal.select(self.field).where(field1 == 2)
 
-        self.assertEqual(2, self.dal.query.count('test_table2'))
+        self.assertEqual(2, query.query.count('test_table2'))
 
     def test_should_append_table_in_from_using_having(self):
         field1 = factory_field(FakeTable('test_table2'))
-        self.dal.select(self.field).having(field1 == 2)
+        query = self.dal.select(self.field).having(field1 == 2)
+
+        self.assertEqual(2, query.query.count('test_table2'))
+
+    def test_should_return_statement_when_call_select(self):
+        self.assertIsInstance(self.dal.select(), Statement)
 
-        self.assertEqual(2, self.dal.query.count('test_table2'))
+    def test_should_return_statement_when_call_where(self):
+        self.assertIsInstance(self.dal.where(), Statement)
 
-    def test_should_return_dal_when_call_select(self):
-        self.assertEqual(id(self.dal), id(self.dal.select()))
+    def test_should_return_statement_when_call_order_by(self):
+        self.assertIsInstance(self.dal.order_by(), Statement)
 
-    def test_should_return_dal_when_call_where(self):
-        self.assertEqual(id(self.dal), id(self.dal.where()))
+    def test_should_return_statement_when_call_group_by(self):
+        self.assertIsInstance(self.dal.group_by(), Statement)
 
-    def test_should_return_dal_when_call_order_by(self):
-        self.assertEqual(id(self.dal), id(self.dal.order_by()))
+    def test_should_return_statement_when_call_limit(self):
+        self.assertIsInstance(self.dal.limit(10), Statement)
 
-    def test_should_return_dal_when_call_group_by(self):
-        self.assertEqual(id(self.dal), id(self.dal.group_by()))
+    def test_should_return_statement_when_call_having(self):
+        self.assertIsInstance(self.dal.having(), Statement)
 
-    def test_should_return_dal_when_call_limit(self):
-        self.assertEqual(id(self.dal), id(self.dal.limit(10)))
+    def test_should_return_statement_bound_to_dal(self):
+        self.assertIs(self.dal, self.dal.select().dal)
 
-    def test_should_return_dal_when_call_having(self):
-        self.assertEqual(id(self.dal), id(self.dal.having()))
+    def test_should_return_new_statement_for_each_call(self):
+        self.assertIsNot(self.dal.select(), self.dal.select())
 
     def test_should_return_query_for_select_field(self):
-        self.dal.select(self.field)
+        query = self.dal.select(self.field)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_select_all_fields(self):
-        self.dal.select()
+        query = self.dal.select()
 
         expected = "SELECT * FROM"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_select_all_fields_with_where(self):
-        self.dal.select().where(self.field == 2)
+        query = self.dal.select().where(self.field == 2)
 
         expected = "SELECT * FROM test_table WHERE `test_table`.`My_Field` = 2"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_select_multiple_fields(self):
         field1 = factory_field(self.table)
         field2 = factory_field(self.table)
-        self.dal.select(self.field, field1, field2)
+        query = self.dal.select(self.field, field1, field2)
 
         expected = "SELECT `test_table`.`My_Field`, `test_table`.`My_Field1`, `test_table`.`My_Field2` FROM test_table"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_where_fields(self):
-        self.dal.select(self.field).where(self.field==1)
+        query = self.dal.select(self.field).where(self.field == 1)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table WHERE `test_table`.`My_Field` = 1"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_where_multiple_fields(self):
         field1 = factory_field(self.table)
         field2 = factory_field(self.table)
-        self.dal.select(self.field).where(~(field1 == 2) &(field2 != 1))
+        query = self.dal.select(self.field).where(~(field1 == 2) &
+                                                  (field2 != 1))
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table WHERE (NOT (`test_table`.`My_Field1` = 2)) AND (`test_table`.`My_Field2` <> 1)"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_order_by_fields(self):
-        self.dal.select(self.field).order_by(self.field)
+        query = self.dal.select(self.field).order_by(self.field)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table ORDER BY `test_table`.`My_Field` ASC"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_order_by_multiple_fields(self):
         field1 = factory_field(self.table)
         field2 = factory_field(self.table)
-        self.dal.select(self.field).order_by(~field1, field2)
+        query = self.dal.select(self.field).order_by(~field1, field2)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table ORDER BY `test_table`.`My_Field1` DESC, `test_table`.`My_Field2` ASC"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_group_by_fields(self):
-        self.dal.select(self.field).group_by(self.field)
+        query = self.dal.select(self.field).group_by(self.field)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table GROUP BY `test_table`.`My_Field`"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_group_by_multiple_fields(self):
         field1 = factory_field(self.table)
         field2 = factory_field(self.table)
-        self.dal.select(self.field).group_by(~field1, field2)
+        query = self.dal.select(self.field).group_by(~field1, field2)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table GROUP BY `test_table`.`My_Field1`, `test_table`.`My_Field2`"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_limit_field(self):
-        self.dal.select(self.field).limit(10)
+        query = self.dal.select(self.field).limit(10)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table LIMIT 10"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_having_fields(self):
-        self.dal.select(self.field).having(self.field==1)
+        query = self.dal.select(self.field).having(self.field == 1)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table HAVING `test_table`.`My_Field` = 1"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_return_query_for_having_multiple_fields(self):
         field1 = factory_field(self.table)
         field2 = factory_field(self.table)
-        self.dal.select(self.field).having(~(field1 == 2) &(field2 != 1))
+        query = self.dal.select(self.field).having(~(field1 == 2) &
+                                                   (field2 != 1))
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table HAVING (NOT (`test_table`.`My_Field1` = 2)) AND (`test_table`.`My_Field2` <> 1)"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
 
     def test_should_create_query_in_correct_order(self):
-        self.dal.limit(2)
-        self.dal.group_by(self.field)
-        self.dal.order_by(self.field)
-        self.dal.where(self.field == 1)
-        self.dal.select(self.field)
-        self.dal.having(self.field == 22)
+        query = self.dal.limit(2)
+        query = query.group_by(self.field)
+        query = query.order_by(self.field)
+        query = query.where(self.field == 1)
+        query = query.select(self.field)
+        query = query.having(self.field == 22)
 
         expected = "SELECT `test_table`.`My_Field` FROM test_table WHERE `test_table`.`My_Field` = 1 GROUP BY `test_table`.`My_Field` HAVING `test_table`.`My_Field` = 22 ORDER BY `test_table`.`My_Field` ASC LIMIT 2"
-        self.assertEqual(expected, self.dal.query)
+        self.assertEqual(expected, query.query)
+
+    def test_should_compile_base_query_once(self):
+        query = self.dal.select(self.field).where(self.field == 1)
+
+        self.assertIs(query.base_query, query.base_query)
+
+    def test_should_not_change_statement_when_adding_clause(self):
+        query = self.dal.select(self.field).where(self.field == 1)
+        sql = query.query
+        query2 = query.where(self.field == 2)
+
+        self.assertEqual(sql, query.query)
+        self.assertTrue(query2.query.endswith("`My_Field` = 2"))
+
+    def test_should_return_where_predicate_fields(self):
+        field1 = factory_field(self.table)
+        query = self.dal.select(self.field).where((field1 == 1) |
+                                                  (field1 == 2))
+
+        self.assertEqual([field1, field1],
+                         query.base_query.predicate.fields)
+
+    def test_should_return_tables_in_from_sorted(self):
+        field1 = factory_field(FakeTable('a_table'))
+        query = self.dal.select(self.field, field1)
+
+        self.assertTrue(query.query.endswith("FROM a_table, test_table"))
+
+    def test_should_send_measured_phase_to_hooks(self):
+        hook = Mock()
+        self.dal.hooks = [hook]
+        statement = self.dal.select(self.field).where(self.field == 1)
+
+        with self.dal._measure('listing', statement) as event:
+            event['bytes'] = 10
+
+        measured = hook.call_args[0][0]
+        self.assertEqual('listing', measured.phase)
+        self.assertGreaterEqual(measured.duration, 0)
+        self.assertEqual(statement.query, measured.query)
+        self.assertEqual(['test_table'], measured.tables)
+        self.assertEqual(10, measured.bytes)
+        self.assertIsNone(measured.rows)
+
+    def test_should_not_send_failed_phase_to_hooks(self):
+        hook = Mock()
+        self.dal.hooks = [hook]
+
+        def fail():
+            with self.dal._measure('read', self.dal.select(self.field)):
+                raise ValueError()
+        self.assertRaises(ValueError, fail)
+        self.assertFalse(hook.called)
+
+    def test_should_warn_when_hook_fails(self):
+        self.dal.hooks = [Mock(side_effect=IOError)]
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            with self.dal._measure('read', self.dal.select(self.field)):
+                pass
+        self.assertEqual(1, len(caught))
@@ -18,6 +18,12 @@ class TestField(TestCase):
     def test_quote_string_value(self):
         self.assertEqual(self.field._quote('bad guy'), "'bad guy'")
 
+    def test_quote_string_value_with_single_quote(self):
+        self.assertEqual(self.field._quote("bad guy's"), '"bad guy\'s"')
+
+    def test_should_raise_error_quoting_string_with_both_quotes(self):
+        self.assertRaises(ValueError, self.field._quote, 'bad "guy\'s"')
+
     def test_should_decorate_adding_not_for_field_with_invert(self):
         self.field._invert = True
         base_query = (self.field == 2)
@@ -69,6 +75,34 @@ class TestField(TestCase):
         self.assertNotEqual(id(self.field), id(field1))
         self.assertEqual('SUM(`my_table`.`my_field`)', field1.sql())
 
+    def test_should_create_new_fields_with_min_and_max(self):
+        self.assertEqual('MIN(`my_table`.`my_field`)', self.field.min.sql())
+        self.assertEqual('MAX(`my_table`.`my_field`)', self.field.max.sql())
+
+    def test_should_create_new_field_with_approx_count_distinct(self):
+        field1 = self.field.approx_count_distinct(rsd=0.01)
+
+        self.assertEqual('APPROXCOUNTDISTINCT(`my_table`.`my_field`, 0.01)',
+                         field1.sql())
+
+    def test_should_create_new_field_with_approx_percentile(self):
+        field1 = self.field.approx_percentile(0.5)
+
+        self.assertEqual(
+            'PERCENTILE_APPROX(`my_table`.`my_field`, 0.5, 10000)',
+            field1.sql())
+
+    def test_should_return_same_derived_field(self):
+        self.assertIs(self.field.sum, self.field.sum)
+        self.assertIs(~self.field, ~self.field)
+        self.assertIs(self.field.approx_percentile(0.5),
+                      self.field.approx_percentile(0.5))
+        self.assertIsNot(self.field.approx_percentile(0.5),
+                         self.field.approx_percentile(0.9))
+
+    def test_should_not_have_instance_dict(self):
+        self.assertFalse(hasattr(self.field, '__dict__'))
+
 
 class TestQueryField(TestCase):
 
@@ -113,6 +147,17 @@ class TestQueryField(TestCase):
         compare = self.field.regexp('a.*')
         self.assertEqual(compare.query, "`my_table`.`my_field` REGEXP 'a.*'")
 
+    def test_should_return_in_query(self):
+        compare = self.field.isin([1, 'a'])
+        self.assertEqual(compare.query, "`my_table`.`my_field` IN (1, 'a')")
+
+    def test_should_return_in_not_query(self):
+        compare = (~self.field).isin([1])
+        self.assertEqual(compare.query, "NOT (`my_table`.`my_field` IN (1))")
+
+    def test_should_raise_error_without_in_values(self):
+        self.assertRaises(ValueError, self.field.isin, [])
+
     def test_should_return_regexp_not_query(self):
         compare = ~self.field.regexp('a.*')
         self.assertEqual(compare.query, "NOT (`my_table`.`my_field` REGEXP 'a.*')")
@@ -120,3 +165,23 @@ class TestQueryField(TestCase):
     def test_should_return_equal_not_query(self):
         compare = ~self.field == 2
         self.assertEqual(compare.query, "NOT (`my_table`.`my_field` = 2)")
+
+    def test_should_return_predicate_for_comparison(self):
+        compare = self.field >= 2
+        self.assertIs(compare.predicate, compare)
+        self.assertEqual('>=', compare.operator)
+        self.assertIs(self.field, compare.field)
+        self.assertEqual(2, compare.value)
+
+    def test_should_return_not_predicate_for_inverted_field(self):
+        field = ~self.field
+        compare = field == 2
+        self.assertEqual('NOT', compare.predicate.operator)
+        self.assertIs(field, compare.operand.field)
+
+    def test_should_raise_error_comparing_with_wrong_type(self):
+        self.assertRaises(TypeError, self.field.__eq__, None)
+
+    def test_should_return_key_for_field(self):
+        self.assertEqual(('my_table', 'my_field', None, False), self.field.key)
+        self.assertNotEqual(self.field.key, self.field.count.key)
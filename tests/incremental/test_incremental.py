@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import datetime
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import TestCase
+
+from microdrill.dal.filesystem import FileStatus
+from microdrill.incremental import AggregateState, merge_partials
+
+
+class TestMergePartials(TestCase):
+
+    def test_should_merge_partials(self):
+        self.assertEqual(
+            [5, 3, 1, 9],
+            merge_partials(['sum', 'count', 'min', 'max'],
+                           [2, 1, 1, 4], [3, 2, 6, 9])
+        )
+
+    def test_should_ignore_nulls(self):
+        self.assertEqual([2, 3], merge_partials(['sum', 'min'],
+                                                [2, None], [None, 3]))
+
+    def test_should_raise_error_merging_other_aggregates(self):
+        self.assertRaises(ValueError, merge_partials, ['avg'], [1], [2])
+
+
+class TestAggregateState(TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, 'state.json')
+        self.state = AggregateState(self.filename)
+        self.key = 'SELECT ...'
+        self.functions = ['count', 'sum']
+        self.files = [FileStatus('/data/table/a.parquet', 10, 1.5)]
+        self.new_file = FileStatus('/data/table/b.parquet', 20, 2.5)
+
+    def test_should_return_all_files_for_unknown_key(self):
+        entry, new_files = self.state.changes(self.key, self.files)
+
+        self.assertIsNone(entry)
+        self.assertEqual(self.files, new_files)
+
+    def test_should_persist_folded_rows_across_instances(self):
+        self.state.fold(self.key, self.files, self.functions,
+                        [['a', 1, 2], ['b', 2, 5]])
+
+        entry = AggregateState(self.filename).get(self.key)
+
+        self.assertEqual([['a', 1, 2], ['b', 2, 5]], entry['rows'])
+        self.assertEqual([['/data/table/a.parquet', 10, 1.5]], entry['files'])
+
+    def test_should_return_new_files(self):
+        self.state.fold(self.key, self.files, self.functions, [['a', 1, 2]])
+
+        entry, new_files = self.state.changes(self.key,
+                                              self.files + [self.new_file])
+
+        self.assertEqual([['a', 1, 2]], entry['rows'])
+        self.assertEqual([self.new_file], new_files)
+
+    def test_should_return_no_entry_when_files_are_rewritten(self):
+        self.state.fold(self.key, self.files, self.functions, [['a', 1, 2]])
+        rewritten = [FileStatus('/data/table/a.parquet', 10, 3.0)]
+
+        entry, new_files = self.state.changes(self.key, rewritten)
+
+        self.assertIsNone(entry)
+        self.assertEqual(rewritten, new_files)
+
+    def test_should_merge_rows_into_entry(self):
+        entry = self.state.fold(self.key, self.files, self.functions,
+                                [['a', 1, 2], ['b', 2, 5]])
+
+        entry = self.state.fold(self.key, self.files + [self.new_file],
+                                self.functions, [['b', 1, 1], ['c', 1, 7]],
+                                entry)
+
+        self.assertEqual([['a', 1, 2], ['b', 3, 6], ['c', 1, 7]],
+                         entry['rows'])
+        self.assertEqual(2, len(entry['files']))
+
+    def test_should_merge_rows_without_groups(self):
+        entry = self.state.fold(self.key, self.files, self.functions, [[1, 2]])
+
+        entry = self.state.fold(self.key, self.files, self.functions,
+                                [[3, 4]], entry)
+
+        self.assertEqual([[4, 6]], entry['rows'])
+
+    def test_should_persist_and_merge_dates_and_decimals(self):
+        day = datetime.date(2016, 3, 10)
+        moment = datetime.datetime(2016, 3, 10, 5, 30, 1, 20)
+        self.state.fold(self.key, self.files, ['sum', 'max'],
+                        [[day, Decimal('1.10'), moment]])
+        entry = AggregateState(self.filename).get(self.key)
+
+        entry = self.state.fold(self.key, self.files, ['sum', 'max'],
+                                [[day, Decimal('2.05'), moment]], entry)
+
+        self.assertEqual([[day, Decimal('3.15'), moment]], entry['rows'])
+        self.assertEqual(entry['rows'],
+                         AggregateState(self.filename).get(self.key)['rows'])
+
+    def test_should_raise_error_folding_without_aggregates(self):
+        self.assertRaises(ValueError, self.state.fold, self.key, self.files,
+                          [], [['a'], ['b']])
+
+    def test_should_invalidate_entries(self):
+        self.state.fold(self.key, self.files, self.functions, [['a', 1, 2]])
+        self.state.invalidate(self.key)
+
+        self.assertIsNone(AggregateState(self.filename).get(self.key))
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
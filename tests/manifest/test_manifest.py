@@ -0,0 +1,108 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from microdrill.dal.filesystem import FileStatus
+from microdrill.manifest import FileManifest
+
+
+class TestFileManifest(TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, 'manifest.json')
+        self.manifest = FileManifest(self.filename)
+        self.key = '/data/table'
+        self.partitions = {
+            '/data/table/dt=1': {
+                'values': {'dt': '1'},
+                'files': [FileStatus('/data/table/dt=1/a.parquet', 10, 1.0)],
+            },
+        }
+
+    def test_should_return_none_for_missing_table(self):
+        self.assertIsNone(self.manifest.get(self.key))
+        self.assertIsNone(self.manifest.status('/data/table/dt=1/a.parquet'))
+
+    def test_should_store_partitions(self):
+        self.manifest.set(self.key, self.partitions)
+
+        entry = FileManifest(self.filename).get(self.key)
+        self.assertEqual({'dt': '1'}, entry['/data/table/dt=1']['values'])
+        self.assertEqual([['/data/table/dt=1/a.parquet', 10, 1.0]],
+                         entry['/data/table/dt=1']['files'])
+        self.assertEqual(entry, self.manifest.get(self.key))
+
+    def test_should_return_status_of_files(self):
+        self.manifest.set(self.key, self.partitions)
+
+        self.assertEqual(FileStatus('/data/table/dt=1/a.parquet', 10, 1.0),
+                         self.manifest.status('/data/table/dt=1/a.parquet'))
+
+    def test_should_forget_status_of_files_replaced(self):
+        self.manifest.status('/data/table/dt=1/a.parquet')
+        self.manifest.set(self.key, self.partitions)
+        self.manifest.set(self.key, {})
+
+        self.assertIsNone(self.manifest.status('/data/table/dt=1/a.parquet'))
+
+    def test_should_replace_files_of_partition_retiring_them(self):
+        self.manifest.set(self.key, self.partitions)
+        new_files = [FileStatus('/data/table/dt=1/b.parquet', 20, 2.0)]
+
+        self.manifest.replace(self.key, '/data/table/dt=1',
+                              self.partitions['/data/table/dt=1']['files'],
+                              new_files)
+
+        manifest = FileManifest(self.filename)
+        self.assertEqual([['/data/table/dt=1/b.parquet', 20, 2.0]],
+                         manifest.get(self.key)['/data/table/dt=1']['files'])
+        self.assertEqual(['/data/table/dt=1/a.parquet'],
+                         manifest.retired(self.key).keys())
+        self.assertIsNone(manifest.status('/data/table/dt=1/a.parquet'))
+        self.assertEqual(new_files[0],
+                         manifest.status('/data/table/dt=1/b.parquet'))
+
+    def test_should_keep_retired_files_when_partitions_are_stored(self):
+        self.manifest.set(self.key, self.partitions)
+        self.manifest.replace(self.key, '/data/table/dt=1',
+                              self.partitions['/data/table/dt=1']['files'],
+                              [])
+
+        self.manifest.set(self.key, self.manifest.get(self.key))
+
+        self.assertEqual(['/data/table/dt=1/a.parquet'],
+                         self.manifest.retired(self.key).keys())
+
+    def test_should_forget_retired_files_purged(self):
+        self.manifest.set(self.key, self.partitions)
+        self.manifest.replace(self.key, '/data/table/dt=1',
+                              self.partitions['/data/table/dt=1']['files'],
+                              [])
+
+        self.manifest.purge(self.key, ['/data/table/dt=1/a.parquet'])
+
+        self.assertEqual({}, FileManifest(self.filename).retired(self.key))
+
+    def test_should_invalidate_table(self):
+        self.manifest.set(self.key, self.partitions)
+        self.manifest.set('/data/other', self.partitions)
+
+        self.manifest.invalidate(self.key)
+
+        self.assertIsNone(FileManifest(self.filename).get(self.key))
+        self.assertIsNotNone(self.manifest.get('/data/other'))
+
+    def test_should_invalidate_all_tables(self):
+        self.manifest.set(self.key, self.partitions)
+
+        self.manifest.invalidate()
+
+        self.assertIsNone(self.manifest.get(self.key))
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
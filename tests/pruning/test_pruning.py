@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from unittest import TestCase
+
+from microdrill.field import BaseField
+from microdrill.pruning import may_match
+from microdrill.table import BaseTable
+
+
+class TestMayMatch(TestCase):
+
+    def setUp(self):
+        self.table = BaseTable('my_table')
+        self.dt = BaseField('dt', self.table)
+        self.hour = BaseField('hour', self.table)
+        self.other = BaseField('other', self.table)
+        self.ranges = {'dt': ('2016-03-10', '2016-03-10'),
+                       'hour': ('05', '05')}
+
+    def may_match(self, base_query, ranges=None):
+        return may_match(base_query.predicate, self.table.name,
+                         ranges or self.ranges)
+
+    def test_should_match_without_predicate(self):
+        self.assertTrue(may_match(None, self.table.name, self.ranges))
+
+    def test_should_match_equal_value(self):
+        self.assertTrue(self.may_match(self.dt == '2016-03-10'))
+        self.assertFalse(self.may_match(self.dt == '2016-03-11'))
+
+    def test_should_match_not_equal_value(self):
+        self.assertFalse(self.may_match(self.dt != '2016-03-10'))
+        self.assertTrue(self.may_match(self.dt != '2016-03-11'))
+
+    def test_should_match_in_values(self):
+        self.assertTrue(self.may_match(self.dt.isin(['2016-03-09',
+                                                     '2016-03-10'])))
+        self.assertFalse(self.may_match(self.dt.isin(['2016-03-09',
+                                                      '2016-03-11'])))
+        self.assertFalse(self.may_match(~self.dt.isin(['2016-03-10'])))
+
+    def test_should_match_comparison_between_fields(self):
+        self.assertTrue(self.may_match(self.dt > self.hour))
+
+    def test_should_match_ranges(self):
+        self.assertTrue(self.may_match(self.dt >= '2016-03-10'))
+        self.assertFalse(self.may_match(self.dt > '2016-03-10'))
+        self.assertTrue(self.may_match(self.dt <= '2016-03-10'))
+        self.assertFalse(self.may_match(self.dt < '2016-03-10'))
+
+    def test_should_compare_numbers_with_partition_strings(self):
+        self.assertTrue(self.may_match(self.hour == 5))
+        self.assertFalse(self.may_match(self.hour > 5))
+        self.assertTrue(self.may_match(self.hour < 10))
+
+    def test_should_match_min_max_ranges(self):
+        ranges = {'other': (10, 20)}
+
+        self.assertTrue(self.may_match(self.other == 15, ranges))
+        self.assertFalse(self.may_match(self.other == 21, ranges))
+        self.assertFalse(self.may_match(self.other < 10, ranges))
+        self.assertTrue(self.may_match(self.other != 15, ranges))
+
+    def test_should_not_match_only_nulls(self):
+        self.assertFalse(self.may_match(self.other == 1,
+                                        {'other': (None, None)}))
+
+    def test_should_match_unknown_fields(self):
+        self.assertTrue(self.may_match(self.other == 1))
+
+    def test_should_match_fields_from_other_tables(self):
+        field = BaseField('dt', BaseTable('other_table'))
+
+        self.assertTrue(self.may_match(field == '2000-01-01'))
+
+    def test_should_match_regexp(self):
+        self.assertTrue(self.may_match(self.dt.regexp('2017.*')))
+
+    def test_should_match_and_predicates(self):
+        self.assertTrue(self.may_match((self.dt == '2016-03-10') &
+                                       (self.hour == 5)))
+        self.assertFalse(self.may_match((self.dt == '2016-03-10') &
+                                        (self.hour == 6)))
+        self.assertFalse(self.may_match((self.other == 1) &
+                                        (self.hour == 6)))
+
+    def test_should_match_or_predicates(self):
+        self.assertTrue(self.may_match((self.dt == '2016-03-11') |
+                                       (self.hour == 5)))
+        self.assertFalse(self.may_match((self.dt == '2016-03-11') |
+                                        (self.hour == 6)))
+        self.assertTrue(self.may_match((self.other == 1) |
+                                       (self.hour == 6)))
+
+    def test_should_match_not_predicates(self):
+        self.assertFalse(self.may_match(~(self.dt == '2016-03-10')))
+        self.assertTrue(self.may_match(~(self.dt == '2016-03-11')))
+        self.assertTrue(self.may_match(~(self.other == 1)))
+
+    def test_should_match_inverted_fields(self):
+        self.assertFalse(self.may_match(~self.dt == '2016-03-10'))
+
+    def test_should_match_numbers_in_string_statistics(self):
+        ranges = {'other': ('100', '99')}
+
+        self.assertTrue(self.may_match(self.other == '5', ranges))
+        self.assertTrue(self.may_match(self.other > 200, ranges))
+
+    def test_should_cast_single_string_value_to_number(self):
+        self.assertTrue(self.may_match(self.hour == 5))
+        self.assertFalse(self.may_match(self.hour == 6))
+
+    def test_should_match_strings_in_number_statistics(self):
+        self.assertTrue(self.may_match(self.other == 'a',
+                                       {'other': (1, 3)}))
@@ -1,7 +1,7 @@
 from unittest import TestCase
 from microdrill.field import BaseField
 from microdrill.table import BaseTable
-from microdrill.query import BaseQuery
+from microdrill.query import BaseQuery, FieldList, Param
 
 
 class TestQuery(TestCase):
@@ -55,3 +55,130 @@ class TestQuery(TestCase):
             compare.fields,
             [self.field, field]
         )
+
+    def test_should_return_predicate_for_and_query(self):
+        left = self.field == 2
+        right = self.field == 3
+        compare = left & right
+        self.assertIs(compare.predicate, compare)
+        self.assertEqual('AND', compare.predicate.operator)
+        self.assertEqual((left, right), compare.operands)
+
+    def test_should_return_predicate_for_or_query(self):
+        compare = (self.field == 2) | (self.field == 3)
+        self.assertEqual('OR', compare.predicate.operator)
+
+    def test_should_return_predicate_for_not_query(self):
+        compare = self.field == 2
+        self.assertEqual('NOT', (~compare).predicate.operator)
+        self.assertIs(compare, (~compare).operand)
+
+    def test_should_keep_predicate_added_to_statement(self):
+        compare = self.field == 2
+        query = BaseQuery("WHERE") + compare
+        self.assertIs(query.predicate, compare)
+
+    def test_should_join_predicates_added_with_and(self):
+        left = self.field == 2
+        right = self.field == 3
+        query = BaseQuery("WHERE") + left + right
+        self.assertEqual(query.predicate, left & right)
+
+    def test_should_not_return_predicate_for_text_query(self):
+        self.assertIsNone(BaseQuery("a = 1").predicate)
+
+    def test_should_compile_query_once(self):
+        compare = (self.field == 2) & (self.field == 3)
+        self.assertIs(compare.query, compare.query)
+
+    def test_should_have_same_key_for_same_structure(self):
+        compare1 = (self.field == 2) | ~(self.field == 'new value')
+        compare2 = (self.field == 2) | ~(self.field == 'new value')
+        self.assertEqual(compare1, compare2)
+        self.assertEqual(hash(compare1), hash(compare2))
+
+    def test_should_have_different_key_for_different_structure(self):
+        self.assertNotEqual((self.field == 2) & (self.field == 3),
+                            (self.field == 2) | (self.field == 3))
+        self.assertNotEqual(self.field == 2, self.field == 3)
+
+    def test_should_flatten_added_queries(self):
+        query = BaseQuery("a") + BaseQuery("b") + "c"
+        self.assertEqual(3, len(query.parts))
+        self.assertEqual("a b c", query.query)
+
+    def test_should_raise_error_adding_other_objects(self):
+        self.assertRaises(ValueError, BaseQuery("a").__add__, 1)
+
+    def test_should_return_query_with_param(self):
+        compare = (self.field == Param('value')) & (self.field > 1)
+        self.assertEqual(
+            "(`my_table`.`my_field` = :value) AND (`my_table`.`my_field` > 1)",
+            compare.query
+        )
+        self.assertEqual(set(['value']), compare.params)
+
+    def test_should_bind_params(self):
+        compare = ~(self.field == Param('value')) + BaseQuery("a")
+        bound = compare.bind({'value': "it's"})
+        self.assertEqual(
+            "NOT (`my_table`.`my_field` = \"it's\") a", bound.query
+        )
+        self.assertEqual(set(), bound.params)
+        self.assertEqual(set(['value']), compare.params)
+
+    def test_should_return_range_of_in_values(self):
+        compare = self.field.isin(['5', 30, 12])
+        self.assertEqual(
+            "(`my_table`.`my_field` >= 5) AND (`my_table`.`my_field` <= 30)",
+            compare.range().query
+        )
+
+    def test_should_not_return_range_of_strings_and_numbers(self):
+        self.assertIsNone(self.field.isin([1, 'a']).range())
+
+    def test_should_replace_queries(self):
+        member = self.field.isin([1, 2])
+        compare = ((self.field > 0) & ~member) + BaseQuery("a")
+        replaced = compare.replace({member.key: self.field == 3})
+        self.assertEqual(
+            "(`my_table`.`my_field` > 0) AND "
+            "(NOT (`my_table`.`my_field` = 3)) a",
+            replaced.query
+        )
+
+    def test_should_raise_error_binding_missing_param(self):
+        compare = self.field == Param('value')
+        self.assertRaises(ValueError, compare.bind, {'other': 1})
+
+    def test_should_not_have_instance_dict(self):
+        compare = ((self.field > 0) & ~self.field.isin([1])) + BaseQuery("a")
+        self.assertFalse(hasattr(compare, '__dict__'))
+        self.assertFalse(any(hasattr(part, '__dict__')
+                             for part in compare.parts))
+
+
+class TestFieldList(TestCase):
+
+    def setUp(self):
+        table = BaseTable('my_table')
+        self.field = BaseField('my_field', table)
+        self.field2 = BaseField('my_field2', table)
+
+    def test_should_return_comma_separated_fields(self):
+        query = FieldList("SELECT", [self.field, self.field2.count])
+        self.assertEqual(
+            "SELECT `my_table`.`my_field`, COUNT(`my_table`.`my_field2`)",
+            query.query
+        )
+
+    def test_should_return_ordered_fields(self):
+        query = FieldList("ORDER BY", [~self.field, self.field2], order=True)
+        self.assertEqual(
+            "ORDER BY `my_table`.`my_field` DESC, `my_table`.`my_field2` ASC",
+            query.query
+        )
+
+    def test_should_return_fields(self):
+        query = FieldList("GROUP BY", [self.field, self.field2])
+        self.assertEqual([self.field, self.field2], query.fields)
@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from unittest import TestCase
+
+from microdrill.field import BaseField
+from microdrill.rollup import Rollup
+from microdrill.statement import Statement
+from tests.helper import FakeTable
+
+
+class TestRollup(TestCase):
+
+    def setUp(self):
+        self.table = FakeTable('hits')
+        self.day = BaseField('day', self.table)
+        self.site = BaseField('site', self.table)
+        self.clicks = BaseField('clicks', self.table)
+        self.rollup = Rollup('by_day_site', [self.day, self.site],
+                             [self.clicks.avg, self.clicks.max])
+
+    def test_should_store_avg_as_sum_and_count(self):
+        self.assertEqual([('count', 'clicks'), ('max', 'clicks'),
+                          ('sum', 'clicks')], self.rollup.aggregates)
+        self.assertEqual(['day', 'site', 'count__clicks', 'max__clicks',
+                          'sum__clicks'], self.rollup.columns)
+
+    def test_should_raise_error_with_other_aggregates(self):
+        self.assertRaises(ValueError, Rollup, 'by_day', [self.day],
+                          [self.clicks.approx_count_distinct()])
+
+    def test_should_return_sql_materializing_rollup(self):
+        self.assertEqual(
+            "SELECT `hits`.`day`, `hits`.`site`, "
+            "COUNT(`hits`.`clicks`) AS `count__clicks`, "
+            "MAX(`hits`.`clicks`) AS `max__clicks`, "
+            "SUM(`hits`.`clicks`) AS `sum__clicks` "
+            "FROM hits GROUP BY `hits`.`day`, `hits`.`site`",
+            self.rollup.sql('hits')
+        )
+
+    def test_should_match_grouping_by_some_groups(self):
+        statement = Statement().select(self.day, self.clicks.sum).where(
+            self.site == 'a').group_by(self.day).having(self.day > 1)
+
+        self.assertTrue(self.rollup.matches(statement))
+        self.assertTrue(self.rollup.matches(Statement().select(
+            self.clicks.count)))
+
+    def test_should_not_match_other_columns_or_aggregates(self):
+        other = BaseField('other', self.table)
+
+        self.assertFalse(self.rollup.matches(Statement().select(
+            self.day, self.clicks.min).group_by(self.day)))
+        self.assertFalse(self.rollup.matches(Statement().select(
+            other, self.clicks.sum).group_by(other)))
+        self.assertFalse(self.rollup.matches(Statement().select(
+            self.clicks.sum).where(other == 1)))
+        self.assertFalse(self.rollup.matches(Statement().select(
+            self.clicks.sum).having(self.clicks.sum > 1)))
+
+    def test_should_not_match_without_aggregates_or_fields(self):
+        self.assertFalse(self.rollup.matches(Statement().select(
+            self.day).group_by(self.day)))
+        self.assertFalse(self.rollup.matches(Statement().select()))
+        self.assertFalse(self.rollup.matches(Statement().select(
+            self.clicks.sum).sample(0.5)))
+
+    def test_should_rewrite_aggregates(self):
+        statement = Statement().select(
+            self.day, self.clicks.avg, self.clicks.count
+        ).group_by(self.day).order_by(self.clicks.max)
+
+        self.assertEqual(
+            "SELECT `hits`.`day`, "
+            "SUM(`hits`.`sum__clicks`) / SUM(`hits`.`count__clicks`), "
+            "COALESCE(SUM(`hits`.`count__clicks`), 0) "
+            "FROM hits GROUP BY `hits`.`day` "
+            "ORDER BY MAX(`hits`.`max__clicks`) ASC",
+            self.rollup.rewrite(statement).query
+        )
@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from unittest import TestCase
+
+from microdrill.sampling import count_error, sample_files, z_score
+
+
+class TestSampleFiles(TestCase):
+
+    def setUp(self):
+        self.paths = ['/data/table/part-%05d.parquet' % index
+                      for index in range(1000)]
+
+    def test_should_sample_same_files(self):
+        self.assertEqual(sample_files(self.paths, 0.1),
+                         sample_files(reversed(self.paths), 0.1))
+
+    def test_should_sample_other_files_with_other_seed(self):
+        self.assertNotEqual(sample_files(self.paths, 0.1),
+                            sample_files(self.paths, 0.1, seed=1))
+
+    def test_should_sample_about_fraction_of_files(self):
+        sampled = sample_files(self.paths, 0.1)
+
+        self.assertTrue(60 < len(sampled) < 140)
+        self.assertTrue(set(sampled) < set(self.paths))
+
+    def test_should_sample_all_files(self):
+        self.assertEqual(self.paths, sample_files(self.paths, 1))
+
+    def test_should_sample_at_least_one_file(self):
+        self.assertEqual(1, len(sample_files(self.paths[:2], 0.0001)))
+        self.assertEqual([], sample_files([], 0.5))
+
+    def test_should_raise_error_with_invalid_fraction(self):
+        self.assertRaises(ValueError, sample_files, self.paths, 0)
+        self.assertRaises(ValueError, sample_files, self.paths, 2)
+
+
+class TestConfidence(TestCase):
+
+    def test_should_return_z_score(self):
+        self.assertAlmostEqual(1.96, z_score(0.95), places=2)
+        self.assertAlmostEqual(2.576, z_score(0.99), places=3)
+
+    def test_should_raise_error_with_invalid_confidence(self):
+        self.assertRaises(ValueError, z_score, 1)
+
+    def test_should_return_count_error(self):
+        self.assertAlmostEqual(1.96 * (100 * (1 - 0.5)) ** 0.5 / 0.5,
+                               count_error(200, 0.5), places=2)
+        self.assertEqual(0, count_error(200, 1))
@@ -0,0 +1,155 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+from multiprocessing.pool import ThreadPool
+from unittest import TestCase
+
+from mock import Mock
+
+from microdrill.query import Param
+from microdrill.statement import Statement
+from tests.helper import FakeTable, factory_field
+
+
+class TestStatement(TestCase):
+
+    def setUp(self):
+        self.dal = Mock()
+        self.table = FakeTable('test_table')
+        self.field = factory_field(self.table)
+
+    def test_should_execute_statement_in_dal(self):
+        statement = Statement(self.dal).select(self.field)
+
+        result = statement.execute()
+
+        self.dal.execute.assert_called_once_with(statement)
+        self.assertIs(self.dal.execute.return_value, result)
+
+    def test_should_raise_error_executing_without_dal(self):
+        self.assertRaises(ValueError, Statement().select(self.field).execute)
+
+    def test_should_keep_dal_in_new_statements(self):
+        statement = Statement(self.dal).select(self.field).limit(1)
+
+        self.assertIs(self.dal, statement.dal)
+
+    def test_should_bind_params_in_new_statement(self):
+        statement = Statement(self.dal).select(self.field).where(
+            self.field == Param('value')).having(self.field > Param('low'))
+
+        bound = statement.bind(value='x', low=2)
+
+        self.assertEqual(['low', 'value'], statement.params)
+        self.assertEqual([], bound.params)
+        self.assertIs(self.dal, bound.dal)
+        self.assertEqual(
+            Statement().select(self.field).where(self.field == 'x').having(
+                self.field > 2).query,
+            bound.query
+        )
+
+    def test_should_keep_sampling_in_new_statements(self):
+        statement = Statement().select(self.field).sample(0.1, seed=2)
+
+        self.assertEqual((0.1, 2, None), statement.where(
+            self.field == 1).sampling)
+        self.assertNotEqual(statement, Statement().select(self.field))
+        self.assertEqual(Statement().select(self.field).query,
+                         statement.query)
+
+    def test_should_raise_error_sampling_invalid_fraction(self):
+        self.assertRaises(ValueError, Statement().sample, 0)
+        self.assertRaises(ValueError, Statement().sample, 1.5)
+
+    def test_should_return_clause(self):
+        where = self.field == 1
+        statement = Statement().where(where)
+
+        self.assertIs(where, statement.clause('where').predicate)
+        self.assertIsNone(statement.clause('group_by'))
+
+    def test_should_return_tables(self):
+        field = factory_field(FakeTable('a_table'))
+        statement = Statement().select(self.field).where(field == 1)
+
+        self.assertEqual(['a_table', 'test_table'], statement.tables)
+
+    def test_should_return_columns_used_from_table(self):
+        field = factory_field(self.table)
+        other = factory_field(FakeTable('a_table'))
+        statement = Statement().select(self.field.sum).where(
+            (field == 1) & (other == 2)).group_by(self.field)
+
+        self.assertEqual(['My_Field', 'My_Field1'],
+                         statement.columns('test_table'))
+        self.assertEqual(['My_Field'], statement.columns('a_table'))
+
+    def test_should_join_tables(self):
+        other = factory_field(FakeTable('a_table'))
+        third = factory_field(FakeTable('b_table'))
+        statement = Statement().select(self.field, other).join(
+            other.table, self.field == other, how='left').join(
+            third.table, (other == third), how='semi').where(self.field == 1)
+
+        self.assertEqual(
+            "SELECT `test_table`.`My_Field`, `a_table`.`My_Field` "
+            "FROM test_table "
+            "LEFT OUTER JOIN a_table "
+            "ON `test_table`.`My_Field` = `a_table`.`My_Field` "
+            "LEFT SEMI JOIN b_table "
+            "ON `a_table`.`My_Field` = `b_table`.`My_Field` "
+            "WHERE `test_table`.`My_Field` = 1",
+            statement.query
+        )
+        self.assertEqual(['a_table', 'b_table'],
+                         [join.table.name for join in statement.joins])
+        self.assertEqual(['a_table', 'b_table', 'test_table'],
+                         statement.tables)
+
+    def test_should_raise_error_with_unknown_join(self):
+        other = factory_field(FakeTable('a_table'))
+
+        self.assertRaises(ValueError, Statement().join, other.table,
+                          self.field == other, 'outer')
+
+    def test_should_return_no_columns_selecting_all(self):
+        statement = Statement().select().where(self.field == 1)
+
+        self.assertIsNone(statement.columns('test_table'))
+
+    def test_should_return_where_condition(self):
+        where = (self.field == 1) | (self.field == 2)
+        statement = Statement().select(self.field).where(where)
+
+        self.assertIs(where, statement.condition)
+        self.assertIs(where, statement.predicate)
+
+    def test_should_return_no_condition_without_where(self):
+        statement = Statement().select(self.field)
+
+        self.assertIsNone(statement.condition)
+        self.assertIsNone(statement.predicate)
+
+    def test_should_be_equal_for_same_clauses(self):
+        statement1 = Statement().select(self.field).where(self.field == 1)
+        statement2 = Statement().select(self.field).where(self.field == 1)
+
+        self.assertEqual(statement1, statement2)
+        self.assertEqual(hash(statement1), hash(statement2))
+        self.assertNotEqual(statement1, statement2.limit(1))
+
+    def test_should_build_statements_from_many_threads(self):
+        base = Statement().select(self.field)
+        pool = ThreadPool(4)
+        queries = pool.map(lambda value: base.where(self.field == value).query,
+                           range(20))
+        pool.close()
+        pool.join()
+
+        self.assertEqual(
+            ["SELECT `test_table`.`My_Field` FROM test_table "
+             "WHERE `test_table`.`My_Field` = %s" % value
+             for value in range(20)],
+            queries
+        )
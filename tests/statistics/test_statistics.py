@@ -0,0 +1,166 @@
+#! /usr/bin/env python
+# -*- coding: UTF-8 -*- #
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from mock import patch
+
+from microdrill.dal.filesystem import FileSystem
+from microdrill.field import BaseField
+from microdrill.statistics import StatisticsIndex
+from microdrill.table import BaseTable
+
+
+class TestStatisticsIndex(TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, 'statistics.json')
+        self.index = StatisticsIndex(self.filename)
+        self.filesystem = FileSystem(None)
+        self.table = BaseTable('my_table')
+        self.field = BaseField('A', self.table)
+        self.name = BaseField('B', self.table)
+        self.path = self._write('part-0.parquet', [1, 2, 3, 10, 11, 12],
+                                [u'a', u'b', u'c', u'x', u'y', None])
+
+    def _write(self, filename, values, names):
+        path = os.path.join(self.dirname, filename)
+        table = pa.Table.from_arrays([pa.array(values), pa.array(names)],
+                                     ['A', 'B'])
+        pq.write_table(table, path, row_group_size=3)
+        return path
+
+    def _update(self):
+        files = self.filesystem.files(os.path.join(self.dirname, '*.parquet'))
+        self.index.update(files)
+        return files
+
+    def test_should_store_row_group_statistics(self):
+        self._update()
+
+        entry = self.index.get(self.path)
+
+        self.assertEqual(6, entry['num_rows'])
+        self.assertEqual([[1, 3, 0], [10, 12, 0]],
+                         [row_group['A'] for row_group in entry['row_groups']])
+
+    def test_should_store_file_statistics(self):
+        self._update()
+
+        entry = self.index.get(self.path)
+
+        self.assertEqual([1, 12, 0], entry['columns']['A'])
+        self.assertEqual([u'a', u'y', 1], entry['columns']['B'])
+
+    def test_should_persist_statistics(self):
+        self._update()
+
+        self.assertIsNotNone(StatisticsIndex(self.filename).get(self.path))
+
+    def test_should_match_file_with_values_in_row_groups(self):
+        self._update()
+
+        self.assertTrue(self.index.may_match(
+            self.path, (self.field == 11).predicate, self.table.name))
+        self.assertTrue(self.index.may_match(
+            self.path, (self.name == 'b').predicate, self.table.name))
+
+    def test_should_not_match_file_with_values_between_row_groups(self):
+        self._update()
+
+        self.assertFalse(self.index.may_match(
+            self.path, (self.field == 5).predicate, self.table.name))
+        self.assertFalse(self.index.may_match(
+            self.path, (self.field > 12).predicate, self.table.name))
+
+    def test_should_match_unknown_file(self):
+        self.assertTrue(self.index.may_match(
+            self.path, (self.field == 5).predicate, self.table.name))
+
+    def test_should_read_only_new_footers(self):
+        self._update()
+        self._write('part-1.parquet', [20], [u'z'])
+
+        with patch.object(StatisticsIndex, '_read_footer',
+                          return_value={}) as mock_read:
+            self._update()
+
+        self.assertEqual(1, mock_read.call_count)
+
+    def test_should_read_rewritten_footers(self):
+        self._update()
+        self._write('part-0.parquet', [20, 21], [u'z', u'z'])
+        os.utime(self.path, (0, 0))
+
+        self._update()
+
+        self.assertEqual([20, 21, 0],
+                         self.index.get(self.path)['columns']['A'])
+
+    def test_should_remove_files(self):
+        self._update()
+        self.index.remove([self.path])
+
+        self.assertIsNone(StatisticsIndex(self.filename).get(self.path))
+
+    def test_should_keep_entries_written_by_other_processes(self):
+        self._update()
+        other = StatisticsIndex(self.filename)
+        other.remove([self.path])
+        self._write('part-1.parquet', [20], [u'z'])
+
+        self._update()
+
+        index = StatisticsIndex(self.filename)
+        self.assertIsNone(index.get(self.path))
+        self.assertIsNotNone(index.get(
+            os.path.join(self.dirname, 'part-1.parquet')))
+
+    @patch('microdrill.statistics.hdfs')
+    def test_should_read_hdfs_footers_with_pyarrow(self, mock_hdfs):
+        mock_hdfs.connect.return_value.open.side_effect = \
+            lambda path: open(path, 'rb')
+        path = 'hdfs://namenode:8020' + self.path
+        status = self.filesystem.files(self.path)[0]._replace(path=path)
+
+        self.index.update([status])
+
+        mock_hdfs.connect.assert_called_once_with('namenode', 8020)
+        self.assertFalse(self.index.may_match(
+            path, (self.field == 5).predicate, self.table.name))
+
+    @patch('microdrill.statistics.hdfs')
+    def test_should_not_index_hdfs_files_when_it_can_not_connect(
+            self, mock_hdfs):
+        mock_hdfs.connect.side_effect = IOError('libhdfs not found')
+        path = 'hdfs://namenode:8020' + self.path
+        status = self.filesystem.files(self.path)[0]._replace(path=path)
+
+        with patch('warnings.warn') as mock_warn:
+            self.index.update([status, status._replace(path=path + '2')])
+
+        self.assertEqual(1, mock_hdfs.connect.call_count)
+        self.assertEqual(1, mock_warn.call_count)
+        self.assertIsNone(self.index.get(path))
+        self.assertTrue(self.index.may_match(
+            path, (self.field == 5).predicate, self.table.name))
+
+    def test_should_not_index_files_of_other_schemes(self):
+        path = 's3://bucket' + self.path
+        status = self.filesystem.files(self.path)[0]._replace(path=path)
+
+        with patch('warnings.warn'):
+            self.index.update([status])
+
+        self.assertIsNone(self.index.get(path))
+        self.assertTrue(self.index.may_match(
+            path, (self.field == 5).predicate, self.table.name))
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
@@ -1,4 +1,7 @@
 from unittest import TestCase
+
+from mock import Mock
+
 from microdrill.table import BaseTable, ParquetTable
 from microdrill.field import BaseField
 
@@ -18,6 +21,36 @@ class TestGenericDatabase(TestCase):
         self.table._fields[name] = field
         self.assertIs(field, self.table(name))
 
+    def test_should_not_call_loader_before_table_is_used(self):
+        self.table.loader = Mock()
+
+        self.assertFalse(self.table.loader.called)
+
+    def test_should_call_loader_once_on_first_field_access(self):
+        loader = Mock()
+        self.table.loader = loader
+
+        self.table('My_Field')
+        self.table('My_Field')
+
+        self.assertEqual(1, loader.call_count)
+        self.assertIsNone(self.table.loader)
+
+    def test_should_call_loader_when_getting_fields(self):
+        loader = Mock()
+        self.table.loader = loader
+
+        self.table.fields
+
+        self.assertTrue(loader.called)
+
+    def test_should_keep_loader_when_it_fails(self):
+        loader = Mock(side_effect=IOError)
+        self.table.loader = loader
+
+        self.assertRaises(IOError, self.table.load)
+        self.assertIs(loader, self.table.loader)
+
 
 class TestParquetTable(TestCase):
 
@@ -25,3 +58,41 @@ class TestParquetTable(TestCase):
         name = 'Test Name'
         table = ParquetTable(name)
         self.assertEqual(table.schema_index_file, '*')
+
+    def test_should_add_rollup(self):
+        table = ParquetTable('hits')
+        day = BaseField('day', table)
+        clicks = BaseField('clicks', table)
+
+        rollup = table.add_rollup('by_day', [day], [clicks.sum])
+
+        self.assertEqual({'by_day': rollup}, table.rollups)
+        self.assertEqual(['day'], rollup.groups)
+
+    def test_should_create_fields_on_first_use(self):
+        table = ParquetTable('hits')
+        table.connection = Mock(**{'schema.names': ['day', 'clicks']})
+
+        self.assertEqual({}, table._fields)
+        field = table('day')
+
+        self.assertEqual('day', field.name)
+        self.assertIs(field, table('day'))
+        self.assertEqual(['day'], table._fields.keys())
+        self.assertIsNone(table('missing'))
+
+    def test_should_create_all_fields_when_getting_fields(self):
+        table = ParquetTable('hits')
+        table.connection = Mock(**{'schema.names': ['day', 'clicks']})
+        day = table('day')
+
+        self.assertEqual(['clicks', 'day'], sorted(table.fields))
+        self.assertIs(day, table.fields['day'])
+
+    def test_should_keep_fields_calling_schema_again(self):
+        table = ParquetTable('hits')
+        table.connection = Mock(**{'schema.names': ['day']})
+        day = table('day')
+
+        self.assertEqual(['day'], table.schema())
+        self.assertIs(day, table('day'))